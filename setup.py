@@ -8,7 +8,7 @@ setup(
         'typer',
         'pyperclip',
         'rich',
-        'tinydb',
+        'tinydb>=4.8',
         'pydantic',
         'python-dotenv',
         'pyyaml'
@@ -17,7 +17,7 @@ setup(
     include_package_data=True,
     entry_points='''
         [console_scripts]
-        snp=snips.app:app
+        snp=snips.app:main
     '''
 )
 
@@ -1,8 +1,18 @@
-import readline
+import sys
 
-from snips.entrypoints.cli import app
+from snips.entrypoints import daemon
+
+
+def main():
+    # running daemon answers without importing the application at all
+    code = daemon.forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    import readline  # to stop sending not char keysrtokes as text to terminal
+    from snips.entrypoints.cli import app
+    app(prog_name='snp')
 
-readline  # to stop sending not char keysrtokes as text to terminal
 
 if __name__ == '__main__':
-    app()
+    main()
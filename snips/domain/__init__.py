@@ -1,4 +1,6 @@
-from .repository import ISnippetRepository, TagMatchingMode
+from .repository import ISnippetRepository, TagMatchingMode, SortKey, paginate
 from .snippet import Snippet, SnippetDto
 from .validators import Validators
 from .themes import Theme, IThemeRepository
+from .flow import Flow, FlowStep
+from .collection import SnippetCollection
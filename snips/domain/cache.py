@@ -0,0 +1,48 @@
+import abc
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+
+def cache_key(command: str, cwd: str) -> str:
+    """Key of command output: the same command may print different output in other directory"""
+    return hashlib.sha256(f'{cwd}\0{command}'.encode()).hexdigest()
+
+
+@dataclass
+class CachedOutput:
+    stdout: str
+    stderr: str
+    returncode: int = 0
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    size: int
+    hits: int
+    misses: int
+
+
+class IOutputCache:
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[CachedOutput]:
+        """
+        :param key:
+        :return: output stored under key, None when missing or expired; counted as hit or miss
+        """
+        ...
+
+    @abc.abstractmethod
+    def put(self, key: str, output: CachedOutput, ttl: float) -> None:
+        """Stores output for ttl seconds, evicting least recently used entries over size limit"""
+        ...
+
+    @abc.abstractmethod
+    def stats(self) -> CacheStats: ...
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Removes all entries and resets counters"""
+        ...
@@ -0,0 +1,126 @@
+import heapq
+import sys
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from snips.domain.repository import SortKey
+from snips.domain.snippet import Snippet
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# stands for missing timestamp in timestamp columns
+_NO_TIME = -(1 << 63)
+
+
+def _dump_time(value: Optional[datetime]) -> int:
+    return (value - _EPOCH) // _MICROSECOND if value is not None else _NO_TIME
+
+
+def _load_time(value: int) -> Optional[datetime]:
+    return _EPOCH + value * _MICROSECOND if value != _NO_TIME else None
+
+
+class SnippetCollection:
+    """
+    Snippets stored by columns: text fields in lists of interned strings, timestamps in integer arrays
+    and tags as ids of interned tag names, in one flat array with offsets. Sorting and paging run over
+    columns; `Snippet` objects are materialized only for accessed rows.
+    """
+
+    def __init__(self, snippets: Iterable[Snippet] = ()):
+        self._aliases: List[str] = []
+        self._snippets: List[str] = []
+        self._descs: List[Optional[str]] = []
+        self._defaults: List[Optional[dict]] = []
+        self._arguments: List[Optional[tuple]] = []
+        self._cache_ttls: List[Optional[int]] = []
+        self._created = array('q')
+        self._updated = array('q')
+        # tags of row i are tag ids _tag_ids[_tag_offsets[i]:_tag_offsets[i + 1]], None marks no tags
+        self._tag_ids = array('I')
+        self._tag_offsets = array('I', [0])
+        self._has_tags = array('b')
+        self._tag_names: List[str] = []
+        self._tag_index: Dict[str, int] = {}
+        for snp in snippets:
+            self.append(snp)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def __getitem__(self, index: int) -> Snippet:
+        return Snippet(
+            alias=self._aliases[index],
+            snippet=self._snippets[index],
+            desc=self._descs[index],
+            tags=self._tags(index),
+            defaults=dict(self._defaults[index]) if self._defaults[index] is not None else None,
+            created_at=_load_time(self._created[index]),
+            updated_at=_load_time(self._updated[index]),
+            arguments=list(self._arguments[index]) if self._arguments[index] is not None else None,
+            cache_ttl=self._cache_ttls[index]
+        )
+
+    def __iter__(self) -> Iterator[Snippet]:
+        return (self[index] for index in range(len(self)))
+
+    def append(self, snp: Snippet) -> None:
+        self._aliases.append(sys.intern(snp.alias))
+        self._snippets.append(snp.snippet)
+        self._descs.append(snp.desc)
+        self._defaults.append(snp.defaults)
+        self._arguments.append(tuple(snp.arguments) if snp.arguments is not None else None)
+        self._cache_ttls.append(snp.cache_ttl)
+        self._created.append(_dump_time(snp.created_at))
+        self._updated.append(_dump_time(snp.updated_at))
+        self._has_tags.append(snp.tags is not None)
+        self._tag_ids.extend(self._tag_id(tag) for tag in snp.tags or ())
+        self._tag_offsets.append(len(self._tag_ids))
+
+    def page(self, offset: int = 0, limit: Optional[int] = None, sort: Optional[SortKey] = None,
+             reverse: bool = False, scores: Dict[str, float] = None) -> Iterator[Snippet]:
+        """
+        Same selection as `paginate`, sorting row numbers by columns and materializing only the page
+        :param offset: number of snippets to skip
+        :param limit: maximum number of returned snippets, all when None
+        :param sort:
+        :param reverse: sort descending
+        :param scores: frecency scores by alias, used when sorting by frecency
+        :return:
+        """
+        stop = offset + limit if limit is not None else None
+        indices: Iterable[int] = range(len(self))
+        if sort is not None:
+            key = self._sort_key(sort, reverse, scores)
+            if stop is None:
+                indices = sorted(indices, key=key, reverse=reverse)
+            else:
+                indices = (heapq.nlargest if reverse else heapq.nsmallest)(stop, indices, key=key)
+        return (self[index] for index in islice(indices, offset, stop))
+
+    def _sort_key(self, sort: SortKey, reverse: bool, scores: Optional[Dict[str, float]]) -> Callable[[int], Any]:
+        if sort == SortKey.frecency:
+            scores = scores or {}
+            return lambda index: -scores.get(self._aliases[index], 0.0)
+        if sort == SortKey.alias:
+            return self._aliases.__getitem__
+        column = self._created if sort == SortKey.created else self._updated
+        # missing timestamps go last in both directions, as in `paginate`
+        if reverse:
+            return lambda index: (column[index] != _NO_TIME, column[index])
+        return lambda index: (column[index] == _NO_TIME, column[index])
+
+    def _tag_id(self, tag: str) -> int:
+        tag_id = self._tag_index.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_index[tag] = len(self._tag_names)
+            self._tag_names.append(sys.intern(tag))
+        return tag_id
+
+    def _tags(self, index: int) -> Optional[List[str]]:
+        if not self._has_tags[index]:
+            return None
+        ids = self._tag_ids[self._tag_offsets[index]:self._tag_offsets[index + 1]]
+        return [self._tag_names[tag_id] for tag_id in ids]
@@ -1,8 +1,15 @@
+from typing import List
+
+
 class SnippetNotFound(Exception):
     @classmethod
     def with_message(cls, id: str):
         return cls(f"Snippet with following id: '{id}' not found!")
 
+    @classmethod
+    def with_suggestions(cls, id: str, suggestions: List[str]):
+        return cls(f"Snippet with following id: '{id}' not found! Did you mean: {', '.join(suggestions)}?")
+
 
 class AliasAlreadyExists(Exception):
 
@@ -11,6 +18,24 @@ class AliasAlreadyExists(Exception):
         return cls(f"Snippet with alias: {alias} already exists!")
 
 
+class ConcurrentModification(Exception):
+    @classmethod
+    def with_message(cls, alias: str):
+        return cls(f"Snippet with alias: {alias} was modified by someone else in the meantime!")
+
+
+class IncludeCycle(Exception):
+    @classmethod
+    def with_message(cls, path: List[str]):
+        return cls(f"Snippets include each other: {' -> '.join(path)}!")
+
+
+class InvalidFlow(Exception):
+    @classmethod
+    def with_message(cls, reason: str, line_no: int = None):
+        return cls(f"Invalid flow, line {line_no}: {reason}" if line_no else f"Invalid flow: {reason}")
+
+
 class AliasInvalidCharacter(Exception):
     @classmethod
     def with_message(cls, alias: str):
@@ -0,0 +1,86 @@
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import List, Dict, Set
+
+import snips.domain.exceptions as ex
+
+# reference to output of other step in argument value: @{step}
+OUTPUT_REFERENCE = re.compile(r'@\{(\w[\w-]*)\}')
+_AFTER = 'after'
+
+
+@dataclass
+class FlowStep:
+    name: str
+    alias: str
+    arguments: Dict[str, str] = field(default_factory=dict)
+    after: List[str] = field(default_factory=list)
+
+    @property
+    def dependencies(self) -> Set[str]:
+        """Steps ordered before this one explicitly, or whose output is used in arguments"""
+        referenced = {name for value in self.arguments.values() for name in OUTPUT_REFERENCE.findall(value)}
+        return set(self.after) | referenced
+
+    def resolve_arguments(self, outputs: Dict[str, str]) -> Dict[str, str]:
+        """Arguments with output references replaced by outputs of finished steps"""
+        return {key: OUTPUT_REFERENCE.sub(lambda match: outputs[match.group(1)], value)
+                for key, value in self.arguments.items()}
+
+
+@dataclass
+class Flow:
+    """
+    Workflow stored as regular snippet, one step per line:
+
+        name: alias [argument=value ...] [after=step1,step2]
+
+    Argument values can use output of other step with @{step}. Steps may depend only on steps
+    declared above them, so every flow is acyclic; steps without dependency between them run concurrently.
+    Blank lines and lines starting with '#' are skipped.
+    """
+    steps: List[FlowStep]
+
+    @classmethod
+    def parse(cls, content: str) -> 'Flow':
+        steps = []
+        names = set()
+        for line_no, line in enumerate(content.splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            step = _parse_step(line_no, line)
+            if step.name in names:
+                raise ex.InvalidFlow.with_message(f"step '{step.name}' is already defined", line_no)
+            unknown = step.dependencies - names
+            if unknown:
+                raise ex.InvalidFlow.with_message(
+                    f"step '{step.name}' depends on steps not defined above it: {', '.join(sorted(unknown))}", line_no
+                )
+            names.add(step.name)
+            steps.append(step)
+        if not steps:
+            raise ex.InvalidFlow.with_message("flow has no steps")
+        return cls(steps)
+
+
+def _parse_step(line_no: int, line: str) -> FlowStep:
+    name, separator, definition = line.partition(':')
+    try:
+        tokens = shlex.split(definition)
+    except ValueError as e:
+        raise ex.InvalidFlow.with_message(str(e), line_no)
+    if not separator or not name.strip() or not tokens:
+        raise ex.InvalidFlow.with_message("expected 'name: alias [argument=value ...] [after=step,...]'", line_no)
+
+    step = FlowStep(name.strip(), tokens[0])
+    for token in tokens[1:]:
+        key, separator, value = token.partition('=')
+        if not separator:
+            raise ex.InvalidFlow.with_message(f"expected argument=value, got '{token}'", line_no)
+        if key == _AFTER:
+            step.after = [dependency.strip() for dependency in value.split(',') if dependency.strip()]
+        else:
+            step.arguments[key] = value
+    return step
@@ -0,0 +1,107 @@
+import abc
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# score of a use halves every week
+FRECENCY_HALF_LIFE = 7 * 24 * 3600
+
+
+class HistoryAction(str, Enum):
+    """
+    Enum representing commands recorded in history
+    """
+    run = 'run'
+    get = 'get'
+    # run answered from output cache, command did not execute
+    cached = 'cached'
+
+
+@dataclass(slots=True)
+class HistoryEntry:
+    timestamp: float
+    alias: str
+    action: HistoryAction
+    duration: float = 0.0
+    returncode: int = 0
+
+
+@dataclass
+class AliasStats:
+    alias: str
+    runs: int
+    gets: int
+    failures: int
+    cached: int = 0
+    # durations of executed runs in seconds, None when snippet was never executed
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of ascending values"""
+    return ordered[max(math.ceil(q / 100 * len(ordered)), 1) - 1]
+
+
+def summarize(entries: Iterable[HistoryEntry]) -> List[AliasStats]:
+    """Usage statistics per alias, most used first; replays from output cache do not count into durations"""
+    durations: Dict[str, List[float]] = defaultdict(list)
+    gets: Dict[str, int] = defaultdict(int)
+    cached: Dict[str, int] = defaultdict(int)
+    failures: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        if entry.action == HistoryAction.run:
+            durations[entry.alias].append(entry.duration)
+            failures[entry.alias] += entry.returncode != 0
+        elif entry.action == HistoryAction.cached:
+            cached[entry.alias] += 1
+        else:
+            gets[entry.alias] += 1
+
+    result = []
+    for alias in durations.keys() | gets.keys() | cached.keys():
+        ordered = sorted(durations[alias])
+        stats = AliasStats(alias, len(ordered), gets[alias], failures[alias], cached[alias])
+        if ordered:
+            stats.p50, stats.p95, stats.p99 = (percentile(ordered, q) for q in (50, 95, 99))
+        result.append(stats)
+    return sorted(result, key=lambda stats: (-(stats.runs + stats.cached + stats.gets), stats.alias))
+
+
+def decay(score: float, since: float, now: float) -> float:
+    """Score of uses up to `since`, as it weighs at `now`"""
+    return score * 0.5 ** ((now - since) / FRECENCY_HALF_LIFE)
+
+
+def bump(scores: Dict[str, Tuple[float, float]], entries: Iterable[HistoryEntry]) -> None:
+    """
+    Adds uses to frecency scores kept as alias -> (score, time of last update), so that
+    ranking never has to replay the history
+    """
+    for entry in entries:
+        score, since = scores.get(entry.alias, (0.0, entry.timestamp))
+        scores[entry.alias] = (decay(score, since, entry.timestamp) + 1, entry.timestamp)
+
+
+class IHistory:
+
+    @abc.abstractmethod
+    def append(self, entries: Iterable[HistoryEntry]) -> None:
+        """Records entries and updates frecency scores of their aliases"""
+        ...
+
+    @abc.abstractmethod
+    def iter_entries(self) -> Iterator[HistoryEntry]:
+        """Yields recorded entries, oldest first"""
+        ...
+
+    @abc.abstractmethod
+    def frecency(self, now: float = None) -> Dict[str, float]:
+        """
+        :param now: time scores are decayed to, current time by default
+        :return: alias -> frecency score; aliases never used are missing
+        """
+        ...
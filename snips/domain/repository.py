@@ -1,6 +1,9 @@
 import abc
+import heapq
+from contextlib import nullcontext
 from enum import Enum
-from typing import List
+from itertools import islice
+from typing import List, Iterable, ContextManager, Iterator, Optional, Dict
 
 from snips.domain.snippet import Snippet
 
@@ -13,6 +16,59 @@ class TagMatchingMode(str, Enum):
     all = 'all'
 
 
+class SortKey(str, Enum):
+    """
+    Enum representing attributes snippets can be sorted by
+    """
+    alias = 'alias'
+    created = 'created'
+    updated = 'updated'
+    frecency = 'frecency'
+
+
+_SORT_ATTRIBUTES = {
+    SortKey.alias: 'alias',
+    SortKey.created: 'created_at',
+    SortKey.updated: 'updated_at',
+}
+
+
+def paginate(snippets: Iterable[Snippet], offset: int = 0, limit: Optional[int] = None,
+             sort: Optional[SortKey] = None, reverse: bool = False,
+             scores: Dict[str, float] = None) -> Iterator[Snippet]:
+    """
+    Selects page of snippets. Without sorting, iteration stops as soon as the page is filled;
+    with sorting and limit, only `offset + limit` snippets are kept in the heap.
+    :param snippets:
+    :param offset: number of snippets to skip
+    :param limit: maximum number of returned snippets, all when None
+    :param sort:
+    :param reverse: sort descending
+    :param scores: frecency scores by alias, used when sorting by frecency
+    :return:
+    """
+    stop = offset + limit if limit is not None else None
+    if sort == SortKey.frecency:
+        scores = scores or {}
+
+        def key(snp: Snippet):
+            # most frecent first, unless reversed
+            return -scores.get(snp.alias, 0.0)
+    elif sort is not None:
+        attribute = _SORT_ATTRIBUTES[sort]
+
+        def key(snp: Snippet):
+            value = getattr(snp, attribute)
+            return (value is not None, value) if reverse else (value is None, value)
+
+    if sort is not None:
+        if stop is None:
+            snippets = sorted(snippets, key=key, reverse=reverse)
+        else:
+            snippets = (heapq.nlargest if reverse else heapq.nsmallest)(stop, snippets, key=key)
+    return islice(snippets, offset, stop)
+
+
 class ISnippetRepository:
 
     @abc.abstractmethod
@@ -28,6 +84,17 @@ class ISnippetRepository:
         """
         ...
 
+    def iter_all(self) -> Iterator[Snippet]:
+        """
+        Lazily yields all snippets, deserializing each one on demand
+        :return:
+        """
+        return iter(self.get_all())
+
+    def iter_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> Iterator[Snippet]:
+        """Lazy counterpart of get_by_tags"""
+        return iter(self.get_by_tags(tags, mode))
+
     @abc.abstractmethod
     def get_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> List[Snippet]:
         """
@@ -61,3 +128,25 @@ class ISnippetRepository:
 
     @abc.abstractmethod
     def remove_all(self) -> None: ...
+
+    def save_many(self, snps: Iterable[Snippet]) -> List[Snippet]:
+        """
+        Permanent save of multiple snippets, flushed at once
+        :param snps:
+        :return: saved snippets
+        """
+        with self.batch():
+            return [self.save(snp) for snp in snps]
+
+    def delete_many(self, aliases: Iterable[str]) -> None:
+        with self.batch():
+            for alias in aliases:
+                self.delete_by_id(alias)
+
+    def batch(self) -> ContextManager:
+        """
+        Unit of work: mutations made inside `with repository.batch():` are buffered
+        and persisted once when the block exits. Nested batches join the outermost one.
+        :return:
+        """
+        return nullcontext()
@@ -0,0 +1,121 @@
+import abc
+import re
+from typing import List, Iterable, Tuple, Set
+
+from snips.domain.snippet import Snippet, ArgumentTagProcessor
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# field boosts, applied by repeating field tokens in indexed document
+_ALIAS_WEIGHT = 3
+_TAGS_WEIGHT = 2
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def snippet_terms(snp: Snippet) -> List[str]:
+    """Terms of snippet document: alias, tags, description and snippet body without argument tags"""
+    terms = tokenize(snp.alias) * _ALIAS_WEIGHT
+    terms += tokenize(' '.join(snp.tags or [])) * _TAGS_WEIGHT
+    terms += tokenize(snp.desc)
+    terms += tokenize(ArgumentTagProcessor.clean_string(snp.snippet))
+    return terms
+
+
+def trigrams(alias: str) -> Set[str]:
+    """Character trigrams of alias, padded so that beginning and end of alias weigh more"""
+    padded = f'  {alias.lower()} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance: insertions, deletions, substitutions and adjacent transpositions"""
+    previous_previous, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        previous_previous, previous = previous, current
+    return previous[len(b)]
+
+
+class ISearchIndex:
+
+    @abc.abstractmethod
+    def index(self, snp: Snippet) -> None:
+        """Adds snippet to index, replacing previously indexed version"""
+        ...
+
+    def index_many(self, snps: Iterable[Snippet]) -> None:
+        for snp in snps:
+            self.index(snp)
+
+    @abc.abstractmethod
+    def remove(self, alias: str) -> None: ...
+
+    @abc.abstractmethod
+    def clear(self) -> None: ...
+
+    @abc.abstractmethod
+    def is_empty(self) -> bool: ...
+
+    @abc.abstractmethod
+    def is_built(self) -> bool:
+        """Whether index holds whole library; snippets indexed one by one do not make it built"""
+        ...
+
+    @abc.abstractmethod
+    def mark_built(self) -> None:
+        """Records that index was built from whole library, until it is cleared"""
+        ...
+
+    @abc.abstractmethod
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        :param query:
+        :param limit:
+        :return: aliases with their relevance score, best match first
+        """
+        ...
+
+
+class IAliasIndex:
+
+    @abc.abstractmethod
+    def add_many(self, aliases: Iterable[str]) -> None: ...
+
+    def add(self, alias: str) -> None:
+        self.add_many([alias])
+
+    @abc.abstractmethod
+    def remove(self, alias: str) -> None: ...
+
+    @abc.abstractmethod
+    def clear(self) -> None: ...
+
+    @abc.abstractmethod
+    def is_empty(self) -> bool: ...
+
+    @abc.abstractmethod
+    def is_built(self) -> bool:
+        """Whether index holds all aliases of library; aliases added one by one do not make it built"""
+        ...
+
+    @abc.abstractmethod
+    def mark_built(self) -> None:
+        """Records that index was built from whole library, until it is cleared"""
+        ...
+
+    @abc.abstractmethod
+    def suggest(self, alias: str, limit: int = 5) -> List[Tuple[str, int]]:
+        """
+        :param alias: mistyped alias
+        :param limit:
+        :return: similar aliases with their edit distance, closest first
+        """
+        ...
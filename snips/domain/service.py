@@ -1,21 +1,199 @@
 import abc
+from dataclasses import replace
+from enum import Enum
+from typing import Iterable, List, Optional, Dict, Set, Tuple
 
 from snips.domain import ISnippetRepository, SnippetDto, Snippet
+from snips.domain.search import ISearchIndex, IAliasIndex
+from snips.domain.snippet import IncludeTagProcessor
 import snips.domain.exceptions as ex
 
 
+class ConflictPolicy(str, Enum):
+    """
+    Enum representing possible strategies for aliases that already exist
+    """
+    skip = 'skip'
+    overwrite = 'overwrite'
+    fail = 'fail'
+
+
 class SnippetService:
+    # maximum edit distance of alias picked automatically instead of mistyped one
+    AUTOCORRECT_DISTANCE = 2
 
-    def __init__(self, repository: ISnippetRepository):
+    def __init__(self, repository: ISnippetRepository, search_index: Optional[ISearchIndex] = None,
+                 alias_index: Optional[IAliasIndex] = None):
         self.repository = repository
+        self.search_index = search_index
+        self.alias_index = alias_index
 
     def create(self, request: SnippetDto, overwrite=False) -> Snippet:
         if overwrite is False:
             if self.repository.exists(request.alias):
                 raise ex.AliasAlreadyExists.with_message(request.alias)
-        return self.repository.save(request.to_entity())
+        snippet = self.repository.save(self._with_arguments(request.to_entity()))
+        self._index([snippet])
+        return snippet
+
+    def create_many(self, requests: Iterable[SnippetDto],
+                    on_conflict: ConflictPolicy = ConflictPolicy.fail) -> List[Snippet]:
+        """
+        Creates all snippets with single repository flush; aliases are checked in one pass before any write
+        :param requests:
+        :param on_conflict: what to do with aliases that already exist or repeat within requests
+        :return: created snippets
+        """
+        requests = list(requests)
+        if on_conflict != ConflictPolicy.overwrite:
+            seen = set()
+            conflicts = []
+            accepted = []
+            for request in requests:
+                if request.alias in seen or self.repository.exists(request.alias):
+                    conflicts.append(request.alias)
+                else:
+                    accepted.append(request)
+                seen.add(request.alias)
+            if conflicts and on_conflict == ConflictPolicy.fail:
+                raise ex.AliasAlreadyExists.with_message(', '.join(conflicts))
+            requests = accepted
+        snippets = self.repository.save_many(self._with_arguments(request.to_entity()) for request in requests)
+        self._index(snippets)
+        return snippets
 
     def update(self, request: SnippetDto, alias: str = None) -> Snippet:
         snippet = self.repository.get_by_id(alias or request.alias)
+        previous_alias = snippet.alias
         request.update_entity(snippet)
-        return self.repository.save(snippet)
+        snippet = self.repository.save(self._with_arguments(snippet))
+        if previous_alias != snippet.alias:
+            self._unindex(previous_alias)
+        self._index([snippet])
+        return snippet
+
+    def delete_by_id(self, alias: str) -> None:
+        self.repository.delete_by_id(alias)
+        self._unindex(alias)
+
+    def resolve(self, alias: str, autocorrect: bool = False) -> Snippet:
+        """
+        Returns snippet by alias; when alias does not exist, looks up similar aliases.
+        :param alias:
+        :param autocorrect: return snippet of the closest alias, if it is the single confident match
+        :raises SnippetNotFound: with suggested aliases, if there are any
+        """
+        try:
+            return self.repository.get_by_id(alias)
+        except ex.SnippetNotFound as e:
+            if self.alias_index is None:
+                raise e
+            if not self.alias_index.is_built():
+                self.reindex()
+            suggestions = [(s, distance) for s, distance in self.alias_index.suggest(alias) if self._exists(s)]
+            if not suggestions:
+                raise e
+
+            closest = [s for s, distance in suggestions if distance == suggestions[0][1]]
+            if autocorrect and len(closest) == 1 and suggestions[0][1] <= self.AUTOCORRECT_DISTANCE:
+                return self.repository.get_by_id(closest[0])
+            raise ex.SnippetNotFound.with_suggestions(alias, [s for s, _ in suggestions])
+
+    def expand(self, snippet: Snippet) -> Snippet:
+        """
+        Returns copy of snippet with include tags replaced by included snippets, expanded recursively.
+        Each included snippet is loaded and expanded once, however many snippets include it;
+        its defaults apply unless the including snippet overrides them.
+        :raises IncludeCycle: when snippets include each other
+        :raises SnippetNotFound: when included snippet does not exist
+        """
+        if IncludeTagProcessor.OPENING_TAG not in snippet.snippet:
+            return snippet
+        body, defaults = self._expand(snippet, {}, [snippet.alias])
+        return replace(snippet, snippet=body, defaults=defaults or None, arguments=None)
+
+    def missing_arguments(self, snippet: Snippet) -> Set[str]:
+        """
+        Arguments without default value, including these of included snippets, which `get` and `run` ask for.
+        Snippet whose includes cannot be expanded is judged by its own arguments.
+        """
+        if IncludeTagProcessor.OPENING_TAG in snippet.snippet:
+            try:
+                snippet = self.expand(snippet)
+            except (ex.SnippetNotFound, ex.IncludeCycle):
+                pass
+        return snippet.get_missing_default_arguments()
+
+    def _expand(self, snippet: Snippet, expanded: Dict[str, Tuple[str, dict]], path: List[str]) -> Tuple[str, dict]:
+        template = IncludeTagProcessor.compile(snippet.snippet)
+        bodies = {}
+        defaults = {}
+        for alias in template.names:
+            if alias in path:
+                raise ex.IncludeCycle.with_message(path[path.index(alias):] + [alias])
+            if alias not in expanded:
+                expanded[alias] = self._expand(self.repository.get_by_id(alias), expanded, path + [alias])
+            bodies[alias], included_defaults = expanded[alias]
+            defaults.update(included_defaults)
+        defaults.update(snippet.defaults or {})
+        return template.render(bodies), defaults
+
+    def search(self, query: str, limit: int = 10) -> List[Snippet]:
+        """
+        Full text search, best match first. Index is built from repository on first use,
+        snippets indexed on create or update before that do not count as built index.
+        :param query:
+        :param limit:
+        :return:
+        """
+        if self.search_index is None:
+            return []
+        if not self.search_index.is_built():
+            self.reindex()
+
+        result = []
+        for alias, _ in self.search_index.search(query, limit):
+            try:
+                result.append(self.repository.get_by_id(alias))
+            except ex.SnippetNotFound:
+                # removed bypassing the service, drop stale entry
+                self._unindex(alias)
+        return result
+
+    def reindex(self) -> None:
+        """Rebuilds search and alias indexes from all snippets in repository"""
+        if self.search_index:
+            self.search_index.clear()
+        if self.alias_index:
+            self.alias_index.clear()
+        self._index(self.repository.iter_all())
+        if self.search_index:
+            self.search_index.mark_built()
+        if self.alias_index:
+            self.alias_index.mark_built()
+
+    @staticmethod
+    def _with_arguments(snippet: Snippet) -> Snippet:
+        """Stores arguments with the record, so reads do not parse snippet again"""
+        snippet.arguments = list(snippet.template.names)
+        return snippet
+
+    def _index(self, snippets: Iterable[Snippet]) -> None:
+        snippets = list(snippets)
+        if self.search_index:
+            self.search_index.index_many(snippets)
+        if self.alias_index:
+            self.alias_index.add_many(snp.alias for snp in snippets)
+
+    def _exists(self, alias: str) -> bool:
+        """Checks alias kept in indexes, dropping it when snippet was removed bypassing the service"""
+        if self.repository.exists(alias):
+            return True
+        self._unindex(alias)
+        return False
+
+    def _unindex(self, alias: str) -> None:
+        if self.search_index:
+            self.search_index.remove(alias)
+        if self.alias_index:
+            self.alias_index.remove(alias)
@@ -1,11 +1,47 @@
 import re
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Collection, Set, Optional
+from functools import lru_cache
+from typing import List, Collection, Set, Optional, Tuple, Mapping, Any, Sequence
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ValidationError, validator
 
-from snips.domain.validators import Validators
+from snips.domain.validators import Validators, WHITE_CHAR_PATTERN, NON_WHITE_CHAR_PATTERN
+
+
+class SnippetTemplate:
+    """
+    Snippet parsed into literal text and argument segments, where argument `arguments[i]`
+    lies between `literals[i]` and `literals[i + 1]`.
+    Rendering only joins segments, so literal text - braces included - is never interpreted.
+    """
+    __slots__ = ('literals', 'arguments')
+
+    def __init__(self, literals: Tuple[str, ...], arguments: Tuple[str, ...]):
+        assert len(literals) == len(arguments) + 1
+        self.literals = literals
+        self.arguments = arguments
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Distinct argument names in order of first occurrence"""
+        return tuple(dict.fromkeys(self.arguments))
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """
+        :param values: argument values
+        :raises KeyError: when value of any argument is missing
+        """
+        parts = [self.literals[0]]
+        for argument, literal in zip(self.arguments, self.literals[1:]):
+            parts.append(str(values[argument]))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def source(self, interpolation=False) -> str:
+        """Snippet with argument tags replaced by bare argument names, or by `{name}` placeholders"""
+        pattern = '{{{}}}' if interpolation else '{}'
+        return self.render({argument: pattern.format(argument) for argument in self.arguments})
 
 
 class ISnippetVarsProcessor:
@@ -14,7 +50,18 @@ class ISnippetVarsProcessor:
     OPENING_TAG_PATTERN: str
     CLOSING_TAG_PATTERN: str
     TAG_PATTERN: str
-    REMOVAL_TAG_PATTERN: str
+    # TAG_PATTERN capturing argument name
+    ARGUMENT_PATTERN: re.Pattern
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def compile(cls, string: str) -> SnippetTemplate:
+        """
+        Parses string in single pass; templates are memoized by content,
+        so each distinct snippet is parsed once per process
+        """
+        parts = cls.ARGUMENT_PATTERN.split(string)
+        return SnippetTemplate(tuple(parts[0::2]), tuple(parts[1::2]))
 
     @classmethod
     def clean_string(cls, string: str, interpolation=False) -> str:
@@ -24,36 +71,33 @@ class ISnippetVarsProcessor:
         :param interpolation: wheter to replace identified vars with python interpolation placeholder
         :return: string without vars tags
         """
-        dirty_arguments = re.findall(cls.TAG_PATTERN, string)
-
-        for arg in dirty_arguments:
-            clean_arg = cls._clean(arg, interpolation)
-            string = string.replace(arg, clean_arg)
-        return string
-
-    @classmethod
-    def _clean(cls, string: str, interpolation=False) -> str:
-        clean_arg = re.sub(cls.REMOVAL_TAG_PATTERN, '', string)
-        if interpolation:
-            clean_arg = '{' + clean_arg + '}'
-        return string.replace(string, clean_arg)
+        return cls.compile(string).source(interpolation)
 
     @classmethod
     def find_and_clean(cls, string: str) -> set:
-        dirty_arguments = re.findall(cls.TAG_PATTERN, string)
-        return  {cls._clean(s) for s in dirty_arguments}
+        return set(cls.compile(string).arguments)
 
 
 class ArgumentTagProcessor(ISnippetVarsProcessor):
     OPENING_TAG = '<@arg>'
     CLOSING_TAG = '</@arg>'
     OPENING_TAG_PATTERN = OPENING_TAG
-    CLOSING_TAG_PATTERN = '<\/@arg>'
-    TAG_PATTERN = f'{OPENING_TAG_PATTERN}\s*\w+\s*{CLOSING_TAG_PATTERN}'  # '\{\s*\w+\s*}'
-    REMOVAL_TAG_PATTERN = f'{OPENING_TAG_PATTERN}|{CLOSING_TAG_PATTERN}|\s+'
+    CLOSING_TAG_PATTERN = '</@arg>'
+    TAG_PATTERN = rf'{OPENING_TAG_PATTERN}\s*\w+\s*{CLOSING_TAG_PATTERN}'
+    ARGUMENT_PATTERN = re.compile(rf'{OPENING_TAG_PATTERN}\s*(\w+)\s*{CLOSING_TAG_PATTERN}')
+
+
+class IncludeTagProcessor(ISnippetVarsProcessor):
+    """Include tags hold alias of other snippet, whose content is put in place of the tag"""
+    OPENING_TAG = '<@include>'
+    CLOSING_TAG = '</@include>'
+    OPENING_TAG_PATTERN = OPENING_TAG
+    CLOSING_TAG_PATTERN = '</@include>'
+    TAG_PATTERN = rf'{OPENING_TAG_PATTERN}\s*[^\s<]+\s*{CLOSING_TAG_PATTERN}'
+    ARGUMENT_PATTERN = re.compile(rf'{OPENING_TAG_PATTERN}\s*([^\s<]+)\s*{CLOSING_TAG_PATTERN}')
 
 
-@dataclass
+@dataclass(slots=True)
 class Snippet:
     alias: str
     snippet: str
@@ -62,12 +106,22 @@ class Snippet:
     defaults: dict = None
     created_at: datetime = None
     updated_at: datetime = None
+    # argument names in order of appearance, stored at save time; None for records saved before
+    arguments: List[str] = None
+    # seconds output of `run` is reused for; None when snippet is not cached
+    cache_ttl: int = None
 
     def dict(self):
         return asdict(self)
 
+    @property
+    def template(self) -> SnippetTemplate:
+        return ArgumentTagProcessor.compile(self.snippet)
+
     def get_arguments(self) -> set[str]:
-        return ArgumentTagProcessor.find_and_clean(self.snippet)
+        if self.arguments is not None:
+            return set(self.arguments)
+        return set(self.template.arguments)
 
     def get_missing_default_arguments(self, external_arguments: Collection[str] = None) -> Set[str]:
         if external_arguments is None:
@@ -81,9 +135,7 @@ class Snippet:
             external_args = dict()
 
         defaults = self.defaults or dict()
-        snippet = ArgumentTagProcessor.clean_string(self.snippet, interpolation=True)
-
-        return snippet.format(**{**defaults, **external_args})
+        return self.template.render({**defaults, **external_args})
 
 
 class SnippetDto(BaseModel):
@@ -92,9 +144,11 @@ class SnippetDto(BaseModel):
     desc: Optional[str]
     tags: List[str] = None
     defaults: dict = None
+    cache_ttl: Optional[int] = None
 
     _alias_cannot_have_white_chars = validator('alias')(Validators.alias_cannot_have_white_chars)
     _snippet_cannot_be_empty = validator('snippet')(Validators.snippet_cannot_be_empty)
+    _cache_ttl_cannot_be_negative = validator('cache_ttl')(Validators.cache_ttl_cannot_be_negative)
 
     def __init__(self, **data):
         if data.get('tags'):
@@ -102,13 +156,42 @@ class SnippetDto(BaseModel):
 
         super(SnippetDto, self).__init__(**data)
 
+    @classmethod
+    def validate_many(cls, records: Sequence[Mapping[str, Any]]) -> Tuple[List['SnippetDto'], List[Tuple[int, str]]]:
+        """
+        Validates batch of raw records with the rules of the model. Records already holding values
+        of field types are checked directly and built without validation; the others - needing coercion
+        or breaking a rule - are passed to the model, so results and error messages match `SnippetDto(**record)`.
+        :param records:
+        :return: valid dtos and (index of record, error message) pairs
+        """
+        values = [_well_formed(record) for record in records]
+        # aliases never contain NUL, so single scan over joined aliases clears the whole batch
+        aliases = '\0'.join(value['alias'] for value in values if value is not None)
+        if WHITE_CHAR_PATTERN.search(aliases):
+            values = [None if value is None or WHITE_CHAR_PATTERN.search(value['alias']) else value
+                      for value in values]
+
+        dtos = []
+        errors = []
+        for index, (record, value) in enumerate(zip(records, values)):
+            if value is not None:
+                dtos.append(cls.construct(**value))
+                continue
+            try:
+                dtos.append(cls(**record))
+            except (ValueError, TypeError, ValidationError) as e:
+                errors.append((index, str(e)))
+        return dtos, errors
+
     def to_entity(self) -> Snippet:
         return Snippet(
             self.alias,
             self.snippet,
             self.desc,
             self.tags,
-            self.defaults
+            self.defaults,
+            cache_ttl=self.cache_ttl
         )
 
     def update_entity(self, e: Snippet):
@@ -117,3 +200,27 @@ class SnippetDto(BaseModel):
         e.desc = self.desc
         e.tags = self.tags
         e.defaults = self.defaults
+        e.cache_ttl = self.cache_ttl
+
+
+def _well_formed(record: Mapping[str, Any]) -> Optional[dict]:
+    """Field values of record passing SnippetDto rules as they are, None when model has to validate it"""
+    alias = record.get('alias')
+    snippet = record.get('snippet')
+    desc = record.get('desc')
+    tags = record.get('tags')
+    defaults = record.get('defaults')
+    cache_ttl = record.get('cache_ttl')
+    if type(alias) is not str or type(snippet) is not str or not NON_WHITE_CHAR_PATTERN.search(snippet):
+        return None
+    if desc is not None and type(desc) is not str:
+        return None
+    if tags is not None:
+        if type(tags) is not list or any(type(tag) is not str for tag in tags):
+            return None
+        tags = Validators.trim_tags(tags)
+    if defaults is not None and type(defaults) is not dict:
+        return None
+    if cache_ttl is not None and (type(cache_ttl) is not int or cache_ttl < 0):
+        return None
+    return dict(alias=alias, snippet=snippet, desc=desc, tags=tags, defaults=defaults, cache_ttl=cache_ttl)
@@ -1,21 +1,30 @@
 import re
 from typing import List
 
+WHITE_CHAR_PATTERN = re.compile(r'\s')
+NON_WHITE_CHAR_PATTERN = re.compile(r'\S')
+
 
 class Validators:
 
     @staticmethod
     def alias_cannot_have_white_chars(alias: str):
-        if re.search('\s+', alias):
+        if WHITE_CHAR_PATTERN.search(alias):
             raise ValueError("Aliases cannot have white chars!")
         return alias
 
     @staticmethod
     def snippet_cannot_be_empty(snippet: str):
-        if not snippet.strip():
+        if not NON_WHITE_CHAR_PATTERN.search(snippet):
             raise ValueError("Snippet cannot be empty")
         return snippet
 
+    @staticmethod
+    def cache_ttl_cannot_be_negative(cache_ttl: int):
+        if cache_ttl is not None and cache_ttl < 0:
+            raise ValueError("Cache TTL cannot be negative")
+        return cache_ttl
+
     @staticmethod
     def trim_tags(tags: List[str]):
 
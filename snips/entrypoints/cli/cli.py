@@ -1,16 +1,22 @@
+import json
 import os
+import time
 # import readline
 from typing import List
 from dotenv import dotenv_values, set_key
 from rich import print
 from snips.infrastructure.console_logger import ConsoleLoggerProviderEnum
-import pyperclip
 import typer
 from rich import print as rich_print
 import snips.settings as settings
 import snips.domain as dm
+import snips.domain.exceptions as ex
+from snips.domain.history import HistoryEntry, HistoryAction, summarize
+from snips.domain.service import ConflictPolicy
+from snips.entrypoints import daemon
 from .utils import bootstrap, dto_from_prompt, prepare_command, read_file, parse_dict, prepare_command_with_args, \
-    parse_tags
+    parse_tags, open_stream, chunked, read_jsonl, validate_records, argument_rows, prepare_commands, \
+    ask_missing_arguments
 
 # readline
 
@@ -27,6 +33,9 @@ class LongArgs:
     tags = '--tags'
     defaults = '--defaults'
     file = '--file'
+    rows = '--rows'
+    matrix = '--matrix'
+    cache_ttl = '--cache-ttl'
 
 
 class ShortArgs:
@@ -36,48 +45,97 @@ class ShortArgs:
     tags = '-t'
     defaults = '-df'
     file = '-f'
+    matrix = '-m'
+
+
+_CACHE_TTL_HELP = "Reuse output of successful `run` for this many seconds, 0 turns caching off"
+_ROWS_HELP = "Render snippet for every row of arguments from CSV file with header, or JSON lines file"
+_MATRIX_HELP = "Render snippet for every combination of argument values, e.g. namespace=dev,prod. Can be repeated"
+
+
+def resolve(alias: str, autocorrect: bool = False) -> dm.Snippet:
+    """Returns snippet by alias, notifies on stderr when mistyped alias was corrected"""
+    snippet = app.service.resolve(alias, autocorrect)
+    if snippet.alias != alias:
+        typer.echo(f"Snippet '{alias}' not found, using '{snippet.alias}'", err=True)
+    return snippet
 
 
 # QUERIES
 @app.command()
 def show(alias: str):
     """Show snippet data"""
-    result = app.repository.get_by_id(alias)
+    result = resolve(alias, autocorrect=True)
     app.console_logger.log_snippets(result)
 
 
 @app.command()
 def ls(tags: List[str] = typer.Option(None, '--tags', '-t', help="List snippet by tags"),
        tags_mode: dm.TagMatchingMode = typer.Option(dm.TagMatchingMode.any, '--tags-mode', '-tm',
-                                                    help="Tags matching mode")
+                                                    help="Tags matching mode"),
+       limit: int = typer.Option(None, '--limit', '-l', min=0, help="Maximum number of listed snippets"),
+       offset: int = typer.Option(0, '--offset', '-o', min=0, help="Number of snippets to skip"),
+       sort: dm.SortKey = typer.Option(None, '--sort', '-s', help="Sort snippets by attribute"),
+       reverse: bool = typer.Option(False, '--reverse', '-r', help="Sort in descending order"),
+       needs_args: bool = typer.Option(False, '--needs-args',
+                                       help="List only snippets with arguments that have no default value, "
+                                            "included snippets' arguments too"),
+       wide: bool = typer.Option(False, '--wide', '-w', help="Show long snippets in full instead of cutting them")
        ):
     """List all available snippets"""
     if tags:
-        result = app.repository.get_by_tags(tags, tags_mode)
+        result = app.repository.iter_by_tags(tags, tags_mode)
+    else:
+        result = app.repository.iter_all()
+    if needs_args:
+        result = (snp for snp in result if app.service.missing_arguments(snp))
+    scores = app.ioc.history.frecency() if sort == dm.SortKey.frecency else None
+    if sort is not None and limit is None:
+        # whole library is sorted, kept by columns instead of as snippet objects
+        page = dm.SnippetCollection(result).page(offset, limit, sort, reverse, scores)
     else:
-        result = app.repository.get_all()
-    app.console_logger.log_snippets(*result)
+        # stops reading when the page is filled, or keeps only the best `offset + limit` snippets
+        page = dm.paginate(result, offset, limit, sort, reverse, scores)
+    app.console_logger.stream_snippets(page, wide)
 
 
 @app.command()
 def get(alias: str,
         raw: bool = typer.Option(False, '--raw', '-r',
                                  help="Flag whether to use interpolate snippet with defaults or prompt"),
-        defaults: bool = typer.Option(True, help="Whether to auo parse command with default arguments")
+        defaults: bool = typer.Option(True, help="Whether to auo parse command with default arguments"),
+        rows: str = typer.Option(None, LongArgs.rows, help=_ROWS_HELP),
+        matrix: List[str] = typer.Option(None, LongArgs.matrix, ShortArgs.matrix, help=_MATRIX_HELP)
         ):
     """Copy snippet value into clipboard"""
-    snippet = app.repository.get_by_id(alias)
+    snippet = app.service.expand(resolve(alias, autocorrect=True))
 
     cmd = snippet.snippet
-    if snippet.get_arguments() and not raw:
+    batch = argument_rows(rows, matrix)
+    if batch is not None:
+        cmd = '\n'.join(prepare_commands(snippet, batch))
+    elif snippet.get_arguments() and not raw:
         if defaults:
             cmd = prepare_command(snippet)
         else:
             cmd = prepare_command_with_args(snippet)
 
+    import pyperclip
+
     pyperclip.copy(cmd)
     print('Copied:')
     app.console_logger.print(f"{cmd}")
+    app.ioc.history.append([HistoryEntry(time.time(), snippet.alias, HistoryAction.get)])
+
+
+@app.command()
+def search(terms: List[str] = typer.Argument(..., help="Words to look for in alias, snippet, description and tags"),
+           limit: int = typer.Option(10, '--limit', '-l', min=1, help="Maximum number of results"),
+           reindex: bool = typer.Option(False, '--reindex', help="Rebuild search index before searching")):
+    """Search snippets by text, best match first"""
+    if reindex:
+        app.service.reindex()
+    app.console_logger.log_snippets(*app.service.search(' '.join(terms), limit))
 
 
 # /QUERIES
@@ -86,7 +144,7 @@ def get(alias: str,
 @app.command("rm")
 def delete(alias: str):
     """Remove snippet """
-    app.repository.delete_by_id(alias)
+    app.service.delete_by_id(alias)
     rich_print(f"[blue]{alias}[/blue] deleted")
 
 
@@ -97,7 +155,8 @@ def add(
         s: str = typer.Option(None, LongArgs.snippet, ShortArgs.snippet, help="set snippet"),
         desc: str = typer.Option(None, LongArgs.desc, ShortArgs.desc, help="set description"),
         tags: List[str] = typer.Option([], LongArgs.tags, ShortArgs.tags, help="set tags"),
-        defaults: str = typer.Option(None, LongArgs.defaults, ShortArgs.defaults, help="Set default arguments")
+        defaults: str = typer.Option(None, LongArgs.defaults, ShortArgs.defaults, help="Set default arguments"),
+        cache_ttl: int = typer.Option(None, LongArgs.cache_ttl, min=0, help=_CACHE_TTL_HELP)
 ):
     """Create new snippet"""
     snippet_content = None
@@ -107,13 +166,14 @@ def add(
         app.console_logger.print('File content: \n')
         app.console_logger.print(snippet_content)
 
-    if any((a, s, desc, tags, defaults)):
+    if any((a, s, desc, tags, defaults, cache_ttl is not None)):
         dto = dm.SnippetDto(
             alias=a,
             snippet=s or snippet_content,
             desc=desc,
             tags=parse_tags(tags) if tags else None,
-            defaults=parse_dict(defaults) if defaults else None
+            defaults=parse_dict(defaults) if defaults else None,
+            cache_ttl=cache_ttl or None
         )
     else:
         dto = dto_from_prompt(snippet_content)
@@ -127,18 +187,21 @@ def edit(alias: str,
          s: str = typer.Option(None, LongArgs.snippet, ShortArgs.snippet, help="set snippet"),
          desc: str = typer.Option(None, LongArgs.desc, ShortArgs.desc, help="set description"),
          tags: List[str] = typer.Option([], LongArgs.tags, ShortArgs.tags, help="set tags"),
-         defaults: str = typer.Option(None, LongArgs.defaults, ShortArgs.defaults, help="Set default arguments")
+         defaults: str = typer.Option(None, LongArgs.defaults, ShortArgs.defaults, help="Set default arguments"),
+         cache_ttl: int = typer.Option(None, LongArgs.cache_ttl, min=0, help=_CACHE_TTL_HELP)
          ):
     """Update existing snippet"""
-    snippet = app.repository.get_by_id(alias)
+    snippet = resolve(alias)
 
-    if any((a, s, desc, tags, defaults)):
+    if any((a, s, desc, tags, defaults, cache_ttl is not None)):
         dto = dm.SnippetDto(
             alias=a or snippet.alias,
             snippet=s or snippet.snippet,
             desc=desc or snippet.desc,
             tags=tags or snippet.tags,
-            defaults=parse_dict(defaults) if defaults else snippet.defaults
+            defaults=parse_dict(defaults) if defaults else snippet.defaults,
+            # 0 turns caching off
+            cache_ttl=(cache_ttl or None) if cache_ttl is not None else snippet.cache_ttl
         )
     else:
         dto = dto_from_prompt(snippet)
@@ -148,15 +211,162 @@ def edit(alias: str,
 
 
 @app.command()
-def run(alias: str,
+def run(aliases: List[str] = typer.Argument(..., help="Aliases of snippets to execute", metavar='ALIAS...'),
         args: str = typer.Option(None, '--args', '-a',
                                  help="Provide arguments for snippet execution. This will override default arguments"),
         pa: str = typer.Option("", '--post-args', '-pa',
-                               help="Additional arguments that will be appended to the end of a snippet")):
+                               help="Additional arguments that will be appended to the end of a snippet"),
+        rows: str = typer.Option(None, LongArgs.rows, help=_ROWS_HELP),
+        matrix: List[str] = typer.Option(None, LongArgs.matrix, ShortArgs.matrix, help=_MATRIX_HELP),
+        parallel: int = typer.Option(1, '--parallel', '-p', min=1, help="Maximum number of commands run at once"),
+        timeout: float = typer.Option(None, '--timeout', min=0, help="Kill command running longer, in seconds"),
+        no_cache: bool = typer.Option(False, '--no-cache', help="Run snippets even when their output is cached"),
+        refresh: bool = typer.Option(False, '--refresh', help="Run cached snippets and store their new output")):
     """Execute snippet in your OS"""
-    snippet = app.repository.get_by_id(alias)
-    cmd = prepare_command(snippet, parse_dict(args))
-    os.system(cmd + " " + pa)
+    from snips.infrastructure.runner import Runner, Job, exit_status
+
+    batch = argument_rows(rows, matrix)
+    jobs = []
+    job_aliases = []
+    for alias in aliases:
+        snippet = app.service.expand(resolve(alias))
+        if batch is None:
+            commands = [prepare_command(snippet, parse_dict(args))]
+        else:
+            commands = prepare_commands(snippet, batch, parse_dict(args))
+        for number, cmd in enumerate(commands, start=1):
+            jobs.append(Job(alias if len(commands) == 1 else f'{alias}#{number}', cmd + " " + pa,
+                            cache_ttl=snippet.cache_ttl))
+            job_aliases.append(snippet.alias)
+
+    cache = None if no_cache or not any(job.cache_ttl for job in jobs) else app.ioc.output_cache
+    results = Runner(parallel, timeout, cache=cache, refresh=refresh).run(jobs)
+    finished = time.time()
+    app.ioc.history.append(
+        HistoryEntry(finished, alias, HistoryAction.cached if result.cached else HistoryAction.run,
+                     result.duration, result.returncode)
+        for alias, result in zip(job_aliases, results)
+    )
+    code = exit_status(results)
+    if code:
+        raise typer.Exit(code)
+
+
+@app.command()
+def flow(alias: str = typer.Argument(..., help="Alias of snippet holding the flow"),
+         parallel: int = typer.Option(4, '--parallel', '-p', min=1, help="Maximum number of steps run at once"),
+         timeout: float = typer.Option(None, '--timeout', min=0, help="Kill step running longer, in seconds")):
+    """Run flow: snippet listing steps `name: alias [argument=value ...] [after=step,...]`"""
+    from snips.infrastructure.runner import Runner, exit_status
+
+    workflow = dm.Flow.parse(resolve(alias).snippet)
+    snippets = {}
+    arguments = {}
+    for step in workflow.steps:
+        snippets[step.name] = app.service.expand(resolve(step.alias))
+        # arguments set in the flow may reference outputs of other steps, known only when the step starts
+        arguments[step.name] = ask_missing_arguments(snippets[step.name], known=step.arguments.keys())
+
+    def render(step: dm.FlowStep, outputs: dict) -> str:
+        return snippets[step.name].parse_command({**arguments[step.name], **step.resolve_arguments(outputs)})
+
+    code = exit_status(Runner(parallel, timeout).run_flow(workflow, render))
+    if code:
+        raise typer.Exit(code)
+
+
+@app.command()
+def export(file: str = typer.Option(None, LongArgs.file, ShortArgs.file, help="Write into file instead of stdout")):
+    """Export snippets as JSON lines"""
+    with open_stream(file, 'w') as out:
+        for snippet in app.repository.iter_all():
+            out.write(json.dumps(snippet.dict(), default=str, ensure_ascii=False) + '\n')
+
+
+@app.command('import')
+def import_(file: str = typer.Argument('-', help="JSON lines file to read, '-' reads stdin"),
+            on_conflict: ConflictPolicy = typer.Option(
+                ConflictPolicy.fail, '--on-conflict', '-c',
+                help="What to do when alias already exists; 'fail' stops at the batch holding the conflict, "
+                     "batches written before it stay imported"),
+            batch_size: int = typer.Option(500, '--batch-size', help="Number of records written at once")):
+    """Import snippets from JSON lines"""
+    imported = 0
+    invalid = 0
+    with open_stream(file, 'r') as f:
+        for chunk in chunked(read_jsonl(f), batch_size):
+            dtos, errors = validate_records(chunk)
+            for line_no, error in errors:
+                typer.echo(f"line {line_no}: {error}", err=True)
+            invalid += len(errors)
+            try:
+                imported += len(app.service.create_many(dtos, on_conflict))
+            except ex.AliasAlreadyExists as e:
+                typer.echo(str(e), err=True)
+                app.console_logger.print(f'Imported {imported} snippets')
+                raise typer.Exit(1)
+
+    app.console_logger.print(f'Imported {imported} snippets')
+    if invalid:
+        raise typer.Exit(1)
+
+
+@app.command('daemon')
+def daemon_(stop: bool = typer.Option(False, '--stop', help="Stop running daemon")):
+    """Keep snips loaded in background, so following commands start instantly"""
+    if stop:
+        if not daemon.stop():
+            typer.echo('snips daemon is not running', err=True)
+            raise typer.Exit(1)
+        return
+    server = daemon.SnipsDaemon(app)
+    typer.echo(f'snips daemon listening on {server.path}', err=True)
+    server.serve()
+
+
+@app.command()
+def stats(aliases: List[str] = typer.Argument(None, help="Show only given snippets", metavar='[ALIAS]...')):
+    """Show how often snippets are used and how long their runs take"""
+    rows = [s for s in summarize(app.ioc.history.iter_entries()) if not aliases or s.alias in aliases]
+    if not rows:
+        typer.echo('No history recorded yet')
+        return
+
+    def seconds(value):
+        return f'{value:.3f}s' if value is not None else '-'
+
+    table = [('alias', 'runs', 'cached', 'gets', 'failed', 'p50', 'p95', 'p99')]
+    table += [(s.alias, str(s.runs), str(s.cached), str(s.gets), str(s.failures),
+               seconds(s.p50), seconds(s.p95), seconds(s.p99)) for s in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        typer.echo('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+# OUTPUT CACHE
+
+
+cache_app = typer.Typer()
+app.add_typer(cache_app, name='cache', help="Manage cached output of snippets")
+
+
+@cache_app.command('stats')
+def cache_stats():
+    """Show number and size of cached outputs, cache hits and misses"""
+    stats = app.ioc.output_cache.stats()
+    lookups = stats.hits + stats.misses
+    typer.echo(f"entries: {stats.entries}")
+    typer.echo(f"size: {stats.size} B")
+    typer.echo(f"hits: {stats.hits}")
+    typer.echo(f"misses: {stats.misses}")
+    if lookups:
+        typer.echo(f"hit ratio: {stats.hits / lookups:.0%}")
+
+
+@cache_app.command('clear')
+def cache_clear():
+    """Remove all cached outputs and reset counters"""
+    app.ioc.output_cache.clear()
 
 
 # CONFIGURATION MANAGEMENT
@@ -168,6 +378,13 @@ config_app.add_typer(set_app)
 app.add_typer(config_app, name='config', help="Manage configuration")
 
 
+@config_app.command()
+def init():
+    """Create configuration file, or add variables missing in existing one"""
+    settings.ensure_configuration()
+    print(settings.CONFIG_PATH)
+
+
 @config_app.command()
 def show():
     """returns current configuration"""
@@ -178,7 +395,8 @@ def show():
 @set_app.command("env")
 def set_variable(var: settings.ConfigEnum, value: str):
     """Set configuration variable py providing name and value"""
-    set_key(settings.CONFIG_PATH, var, value)
+    settings.ensure_configuration()
+    set_key(settings.CONFIG_PATH, var.value, value)
 
 
 @set_app.command()
@@ -186,7 +404,8 @@ def db_uri(uri: str):
     """Change your db uri.
     If DB_PROVIDER is set to 'json', this must be path to .json file
     """
-    set_key(settings.CONFIG_PATH, settings.ConfigEnum.DB_URI, uri)
+    settings.ensure_configuration()
+    set_key(settings.CONFIG_PATH, settings.ConfigEnum.DB_URI.value, uri)
 
 
 @set_app.command()
@@ -194,7 +413,30 @@ def format(format: ConsoleLoggerProviderEnum):
     """
     Change your display format
     """
-    set_key(settings.CONFIG_PATH, settings.ConfigEnum.FORMAT, format)
+    settings.ensure_configuration()
+    set_key(settings.CONFIG_PATH, settings.ConfigEnum.FORMAT.value, format.value)
+
+
+@config_app.command()
+def convert_binary(target: str):
+    """Convert your json database into binary snippet store.
+    To use it, set DB_PROVIDER to 'binary' and DB_URI to the target path
+    """
+    from snips.infrastructure.repository import binary_repository
+
+    count = binary_repository.convert_from_tinydb(settings.CONFIG.DB_URI, os.path.abspath(target))
+    print(f'{count} snippets converted into {target}')
+
+
+@config_app.command()
+def convert_jsonl(target: str):
+    """Convert your json database into append-only log database.
+    To use it, set DB_PROVIDER to 'jsonl' and DB_URI to the target path
+    """
+    from snips.infrastructure.repository import tinydb_repository
+
+    count = tinydb_repository.convert_to_log(settings.CONFIG.DB_URI, os.path.abspath(target))
+    print(f'{count} snippets converted into {target}')
 
 
 @config_app.command()
@@ -1,12 +1,16 @@
-from typing import List, Any, Collection
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice, product
+from typing import List, Any, Collection, Iterable, Iterator, Tuple, TextIO, Optional
 
 import typer
-from rich.prompt import Prompt
 
 from snips import domain as dm
 from snips.domain.service import SnippetService
 from snips.infrastructure import IConsoleLogger
-from snips.ioc import get_ioc
+from snips.ioc import get_ioc, IocContainer
 
 # import readline
 _EMOJI = ":question:"
@@ -14,18 +18,38 @@ _TAG_SEPARATOR = ' '
 
 
 class Snips(typer.Typer):
-    repository: dm.ISnippetRepository
-    console_logger: IConsoleLogger
-    service: SnippetService
+    """Application exposing services of IoC container, which is created on first access"""
+    _ioc: IocContainer = None
+
+    @property
+    def ioc(self) -> IocContainer:
+        if self._ioc is None:
+            self._ioc = get_ioc()
+        return self._ioc
+
+    @ioc.setter
+    def ioc(self, ioc: IocContainer) -> None:
+        self._ioc = ioc
+
+    @property
+    def repository(self) -> dm.ISnippetRepository:
+        return self.ioc.repository
+
+    @property
+    def console_logger(self) -> IConsoleLogger:
+        return self.ioc.console_logger
+
+    @console_logger.setter
+    def console_logger(self, console_logger: IConsoleLogger) -> None:
+        self.ioc.console_logger = console_logger
+
+    @property
+    def service(self) -> SnippetService:
+        return self.ioc.service
 
 
 def bootstrap() -> Snips:
-    ioc = get_ioc()
-    cli = Snips()
-    cli.repository = ioc.repository
-    cli.console_logger = ioc.console_logger
-    cli.service = ioc.service
-    return cli
+    return Snips()
 
 
 def parse_tags(tags: str | Collection) -> List[str]:
@@ -66,6 +90,8 @@ def dto_from_prompt(df: dm.Snippet = None, snippet: str = None) -> dm.SnippetDto
     :param snippet:
     :return:
     """
+    from rich.prompt import Prompt
+
     alias = Prompt.ask(f"{_EMOJI} Alias", default=df.alias if df else None)
     dm.Validators.alias_cannot_have_white_chars(alias)
     print()
@@ -88,14 +114,16 @@ def dto_from_prompt(df: dm.Snippet = None, snippet: str = None) -> dm.SnippetDto
         snippet=snippet,
         desc=description,
         tags=parse_tags(input_tags),
-        defaults=parse_dict(defaults)
+        defaults=parse_dict(defaults),
+        cache_ttl=df.cache_ttl if df else None
     )
 
 
 def prepare_command_with_args(snp: dm.Snippet) -> str:
-    arguments = snp.get_arguments()
+    from rich.prompt import Prompt
+
     args = dict()
-    for arg in arguments:
+    for arg in snp.template.names:
         args[arg] = Prompt.ask(f"{_EMOJI} {arg}")
     return snp.parse_command(args)
 
@@ -108,19 +136,133 @@ def prepare_command(snp: dm.Snippet, provided_arguments: dict = None) -> str:
     :param provided_arguments:
     :return:
     """
-    if not provided_arguments:
-        provided_arguments = dict()
+    return snp.parse_command(ask_missing_arguments(snp, provided_arguments))
 
-    args = {**provided_arguments}
 
-    missing_args = snp.get_missing_default_arguments(provided_arguments.keys())
+def ask_missing_arguments(snp: dm.Snippet, provided_arguments: dict = None, known: Iterable[str] = ()) -> dict:
+    """
+    Prompts for snippet arguments which have neither default nor provided value
+    :param snp:
+    :param provided_arguments:
+    :param known: names of arguments whose values are supplied later
+    :return: provided arguments extended with prompted ones
+    """
+    args = dict(provided_arguments or {})
+    missing_args = snp.get_missing_default_arguments(args.keys() | set(known))
     if missing_args:
+        from rich.prompt import Prompt
+
         print("Provide missing snippet arguments:")
-        for arg in missing_args:
+        # asked in order of appearance in snippet
+        for arg in (arg for arg in snp.template.names if arg in missing_args):
             args[arg] = Prompt.ask(f"{_EMOJI} {arg}")
-    return snp.parse_command(args)
+    return args
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    """
+    Reads argument rows: CSV file with header row, or JSON lines with single object per line;
+    '-' reads JSON lines from stdin
+    """
+    with open_stream(path, 'r') as f:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in read_jsonl(f):
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"line {line_no}: row must be a json object")
+            yield row
+
+
+def expand_matrix(entries: List[str]) -> List[dict]:
+    """
+    Cartesian product of argument values, each entry in format: key=value1,value2
+    """
+    keys = []
+    values = []
+    for entry in entries:
+        key, _, options = entry.partition('=')
+        keys.append(key.strip())
+        values.append(options.split(','))
+    return [dict(zip(keys, combination)) for combination in product(*values)]
+
+
+def argument_rows(rows: Optional[str], matrix: Optional[List[str]]) -> Optional[List[dict]]:
+    """Argument sets of batch mode: every row combined with every matrix combination, None without batch"""
+    if not rows and not matrix:
+        return None
+    row_sets = list(read_rows(rows)) if rows else [{}]
+    matrix_sets = expand_matrix(matrix) if matrix else [{}]
+    return [{**row, **combination} for row in row_sets for combination in matrix_sets]
+
+
+def prepare_commands(snp: dm.Snippet, rows: List[dict], provided_arguments: dict = None) -> List[str]:
+    """
+    Renders snippet once per argument row. Arguments missing in defaults, provided arguments
+    and any of the rows are asked once and shared by all rows.
+    :param snp:
+    :param rows: argument rows, override provided arguments
+    :param provided_arguments:
+    :return:
+    """
+    in_every_row = set.intersection(*(set(row) for row in rows)) if rows else set()
+    common = ask_missing_arguments(snp, provided_arguments, in_every_row)
+
+    defaults = snp.defaults or dict()
+    return [snp.template.render({**defaults, **common, **row}) for row in rows]
 
 
 def read_file(path: str, encoding: str) -> str:
     with open(path, encoding=encoding) as f:
         return f.read()
+
+
+@contextmanager
+def open_stream(path: str, mode: str) -> Iterator[TextIO]:
+    """Opens file for given path, where '-' or None stands for stdin/stdout"""
+    if path in (None, '-'):
+        yield sys.stdin if 'r' in mode else sys.stdout
+        return
+    with open(path, mode, encoding='utf-8') as f:
+        yield f
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Yields non-blank lines with their line numbers, without holding the file in memory"""
+    for line_no, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def validate_records(records: Iterable[Tuple[int, str]]) -> Tuple[List[dm.SnippetDto], List[Tuple[int, str]]]:
+    """
+    Validates batch of json lines against SnippetDto rules
+    :param records: line number and raw json line pairs
+    :return: valid dtos and (line number, error message) pairs
+    """
+    parsed = []
+    line_numbers = []
+    errors = []
+    for line_no, line in records:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+            continue
+        if not isinstance(record, dict):
+            errors.append((line_no, "Record must be a json object"))
+            continue
+        parsed.append(record)
+        line_numbers.append(line_no)
+
+    dtos, invalid = dm.SnippetDto.validate_many(parsed)
+    errors.extend((line_numbers[index], error) for index, error in invalid)
+    errors.sort()
+    return dtos, errors
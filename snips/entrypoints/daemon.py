@@ -0,0 +1,278 @@
+"""
+Resident snips process serving CLI commands over a Unix socket.
+
+Client side of this module is imported before anything else on every `snp` call,
+so it must depend on the standard library only; the CLI is imported by the daemon itself.
+
+Protocol: client sends single json line with its argv, working directory, environment and terminal,
+daemon answers with single json line holding captured output and exit code,
+or `{"fallback": true}` when the command has to be executed by the client itself.
+Output is captured whole, so commands producing long output are handed back as well:
+listing that would be paged or outgrows `OUTPUT_LIMIT` streams from the client as usual.
+"""
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from typing import List, Optional, Iterator, Tuple
+
+# non-interactive commands that neither read stdin, nor interact with client's terminal, clipboard or processes;
+# export is left out, its output grows with the library and is streamed by the client
+FORWARDED_COMMANDS = {'show', 'ls', 'search', 'tags', 'rm'}
+# commands without side effects, client can run them again when their output is too long for the daemon
+_READ_ONLY_COMMANDS = {'show', 'ls', 'search', 'tags'}
+# characters of output captured by the daemon
+OUTPUT_LIMIT = 1 << 20
+
+
+def socket_path() -> str:
+    """Socket location, SNIPS_SOCKET or daemon.sock in configuration directory (resolved as in `settings`)"""
+    if os.environ.get('SNIPS_SOCKET'):
+        return os.environ['SNIPS_SOCKET']
+    if os.environ.get('CONFIG_HOME'):
+        config_home = os.path.join(os.path.dirname(os.path.dirname(__file__)), os.environ['CONFIG_HOME'])
+    else:
+        config_home = os.path.join(os.environ['HOME'], '.snips')
+    return os.path.join(config_home, 'daemon.sock')
+
+
+def _send(sock: socket.socket, message: dict) -> None:
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def _receive(sock: socket.socket) -> dict:
+    with sock.makefile('rb') as f:
+        line = f.readline()
+    if not line:
+        raise ConnectionError('Connection closed by snips daemon')
+    return json.loads(line)
+
+
+def forward(argv: List[str], path: str = None) -> Optional[int]:
+    """
+    Executes command by running daemon
+    :param argv: command line arguments, without program name
+    :param path: socket path, defaults to `socket_path()`
+    :return: exit code, or None when command must be executed in-process
+    """
+    if not argv or argv[0] not in FORWARDED_COMMANDS:
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path or socket_path())
+        except OSError:
+            return None
+        _send(sock, {
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'environ': dict(os.environ),
+            'tty': sys.stdout.isatty(),
+            'columns': shutil.get_terminal_size().columns,
+            'lines': shutil.get_terminal_size().lines,
+        })
+        response = _receive(sock)
+    finally:
+        sock.close()
+
+    if response.get('fallback'):
+        return None
+    sys.stdout.write(response['stdout'])
+    sys.stdout.flush()
+    sys.stderr.write(response['stderr'])
+    return response['code']
+
+
+def stop(path: str = None) -> bool:
+    """Asks running daemon to exit, returns False when there is none"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path or socket_path())
+        except OSError:
+            return False
+        _send(sock, {'stop': True})
+        _receive(sock)
+    return True
+
+
+class SnipsDaemon:
+    """
+    Keeps CLI application with its IoC container loaded and executes forwarded commands one at a time.
+    Container is built again whenever configuration, database or themes file changes on disk.
+    """
+
+    def __init__(self, cli, path: str = None):
+        import snips.settings as settings
+
+        self._cli = cli
+        self._settings = settings
+        self.path = path or socket_path()
+        self.running = False
+        self._signature = None
+        self._theme = None
+
+    def serve(self) -> None:
+        if os.path.exists(self.path):
+            if _is_listening(self.path):
+                raise RuntimeError(f'snips daemon is already listening on {self.path}')
+            os.remove(self.path)
+
+        import socketserver
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if line:
+                    response = daemon.execute(json.loads(line))
+                    self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+        umask = os.umask(0o077)
+        try:
+            server = socketserver.UnixStreamServer(self.path, Handler)
+        finally:
+            os.umask(umask)
+        self.running = True
+        try:
+            with server:
+                while self.running:
+                    server.handle_request()
+        finally:
+            os.remove(self.path)
+
+    def execute(self, request: dict) -> dict:
+        if request.get('stop'):
+            self.running = False
+            return {}
+        argv = request['argv']
+        if not argv or argv[0] not in FORWARDED_COMMANDS or not self._has_same_configuration(request['environ']):
+            return {'fallback': True}
+
+        self._refresh()
+        stdout, stderr = self._output(request), io.StringIO()
+        try:
+            with _client_terminal(request), redirect_stdout(stdout), redirect_stderr(stderr):
+                self._cli.console_logger = self._console_logger()
+                code = self._invoke(argv)
+        except _OutputLimitExceeded:
+            return {'fallback': True}
+        return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'code': code}
+
+    @staticmethod
+    def _output(request: dict) -> io.StringIO:
+        """Captured stdout, limited for commands the client can run again instead"""
+        if request['argv'][0] not in _READ_ONLY_COMMANDS:
+            return io.StringIO()
+        # listing taller than client's terminal is paged, pager has to run in the client
+        paged = request['argv'][0] == 'ls' and request['tty'] and request.get('lines')
+        return _LimitedOutput(OUTPUT_LIMIT, request['lines'] if paged else None)
+
+    def _has_same_configuration(self, environ: dict) -> bool:
+        """
+        Configuration variables of client have to match these the daemon was started with;
+        variable set on one side only is a mismatch, empty one counts as not set, as in `settings`
+        """
+        keys = self._settings.ConfigEnum.list() + ['CONFIG_HOME']
+        return all((environ.get(key) or None) == (os.environ.get(key) or None) for key in keys)
+
+    def _refresh(self) -> None:
+        signature = tuple(_signature(path) for path in (
+            self._settings.CONFIG_PATH, self._settings.CONFIG.DB_URI, self._settings.THEMES_URI
+        ))
+        if signature == self._signature:
+            return
+        from snips.ioc import get_ioc
+
+        self._cli.ioc = get_ioc()
+        self._theme = self._cli.ioc.theme_repository.get_by_id(self._settings.CONFIG.THEME)
+        self._signature = signature
+
+    def _console_logger(self):
+        """Logger is created per request, so output is formatted for terminal of the client"""
+        from snips.infrastructure.console_logger import ConsoleLoggerFactory
+
+        return ConsoleLoggerFactory.create(self._settings.CONFIG.FORMAT, self._theme)
+
+    def _invoke(self, argv: List[str]) -> int:
+        try:
+            self._cli(args=argv, prog_name='snp')
+        except _OutputLimitExceeded:
+            raise
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+        except Exception as e:
+            print(f'{type(e).__name__}: {e}', file=sys.stderr)
+            return 1
+        return 0
+
+
+class _OutputLimitExceeded(Exception):
+    pass
+
+
+class _LimitedOutput(io.StringIO):
+    """Captured output interrupting the command once it is longer than `chars` or taller than `lines`"""
+
+    def __init__(self, chars: int, lines: Optional[int] = None):
+        super(_LimitedOutput, self).__init__()
+        self.chars = chars
+        self.lines = lines
+        self._line_count = 0
+
+    def write(self, text: str) -> int:
+        written = super(_LimitedOutput, self).write(text)
+        self._line_count += text.count('\n')
+        if self.tell() > self.chars or (self.lines is not None and self._line_count >= self.lines):
+            raise _OutputLimitExceeded()
+        return written
+
+
+def _signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _is_listening(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+@contextmanager
+def _client_terminal(request: dict) -> Iterator[None]:
+    """Runs in client's working directory, with output formatted for client's terminal"""
+    import rich
+
+    cwd = os.getcwd()
+    environ = {key: os.environ.get(key) for key in ('COLUMNS', 'FORCE_COLOR')}
+    os.chdir(request['cwd'])
+    os.environ['COLUMNS'] = str(request['columns'])
+    if request['tty']:
+        os.environ['FORCE_COLOR'] = '1'
+    else:
+        os.environ.pop('FORCE_COLOR', None)
+    rich.reconfigure()
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+        for key, value in environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        rich.reconfigure()
@@ -1,2 +1,12 @@
-from .repository import tinydb_repository
-from .console_logger import *
\ No newline at end of file
+import importlib
+
+from .console_logger import *
+
+# repository implementations pull in their storage libraries, so they are imported on first use
+_REPOSITORY_MODULES = ('tinydb_repository', 'sqlite_repository', 'storages', 'binary_repository')
+
+
+def __getattr__(name: str):
+    if name in _REPOSITORY_MODULES:
+        return importlib.import_module(f'.repository.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
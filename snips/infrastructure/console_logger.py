@@ -1,12 +1,14 @@
 import abc
 import json
+import os
+import subprocess
+import sys
+from contextlib import contextmanager
 from enum import Enum
-from typing import List, Optional, Any
-import yaml
+from itertools import chain, islice
+from typing import List, Optional, Any, Iterable, Iterator, Tuple
 
 from rich import print as rich_print, print_json
-from rich.console import Console
-from rich.table import Table
 
 import snips.domain as dm
 from snips.domain.themes.themes import Theme
@@ -22,6 +24,14 @@ class IConsoleLogger:
             self._log_snippet(snp)
         print('')
 
+    def stream_snippets(self, snps: Iterable[dm.Snippet], wide: bool = False) -> None:
+        """
+        Logs snippets as they are produced, for long listings
+        :param snps:
+        :param wide: show long values in full instead of fitting them to terminal width
+        """
+        self.log_snippets(*snps)
+
     def print(self, o: Any):
         print(o)
 
@@ -53,6 +63,8 @@ class YamlConsoleLogger(IConsoleLogger):
         rich_print(o)
 
     def _log_snippet(self, snp: dm.Snippet) -> None:
+        import yaml
+
         rich_print('\n' + yaml.dump(snp.dict(), allow_unicode=True, sort_keys=False))
 
 
@@ -75,12 +87,20 @@ class PrettyConsoleLogger(IConsoleLogger):
 
 class TableConsoleLogger(IConsoleLogger):
     _FIELD_ORDER = ['alias', 'snippet', 'defaults', 'tags', 'desc']
+    # columns sharing width left by the others
+    _FLEXIBLE = ('snippet', 'desc')
+    # rows rendered at once when streaming, column widths are measured on the first chunk
+    _CHUNK_SIZE = 200
 
     def __init__(self, theme: Theme):
         super(TableConsoleLogger, self).__init__(theme)
+        from rich.console import Console
+
         self._console = Console()
 
     def _log_snippet(self, *snps: dm.Snippet) -> None:
+        from rich.table import Table
+
         table = Table(
             *[f"[{self._theme.header}]{f}[/{self._theme.header}]" for f in self._FIELD_ORDER], box=None
         )
@@ -99,6 +119,136 @@ class TableConsoleLogger(IConsoleLogger):
     def log_snippets(self, *snps: dm.Snippet) -> None:
         self._log_snippet(*snps)
 
+    def stream_snippets(self, snps: Iterable[dm.Snippet], wide: bool = False) -> None:
+        from rich.table import Table
+
+        # output read by other programs or stored in file is never cut, there is no terminal width to fit;
+        # console knows terminal of daemon's client too, from forwarded FORCE_COLOR and COLUMNS
+        wide = wide or not self._console.is_terminal
+        snps = iter(snps)
+        first = list(islice(snps, self._CHUNK_SIZE))
+        widths = self._column_widths(first, wide)
+        chunks = chain([first], iter(lambda: list(islice(snps, self._CHUNK_SIZE)), []))
+        # wide rows are not cut to terminal width; values longer than in the first chunk are folded
+        overflow = 'fold' if wide else 'ellipsis'
+        width = sum(widths) + 2 * len(widths) if wide else self._console.width
+        with self._paged(width) as console:
+            for number, chunk in enumerate(chunks):
+                table = Table(box=None, show_header=number == 0)
+                for field, column_width in zip(self._FIELD_ORDER, widths):
+                    table.add_column(f"[{self._theme.header}]{field}[/{self._theme.header}]", width=column_width,
+                                     no_wrap=not wide, overflow=overflow)
+                for snp in chunk:
+                    table.add_row(*self._pretty_format(snp, self._theme))
+                console.print(table, crop=not wide)
+                if console.file.closed:
+                    # pager was quit, nobody reads the rest
+                    break
+
+    def _column_widths(self, snps: List[dm.Snippet], wide: bool) -> List[int]:
+        """Widths fitting values of given snippets, flexible columns shrunk to terminal width unless wide"""
+        columns = list(zip(*map(self._plain_values, snps))) or [()] * len(self._FIELD_ORDER)
+        widths = [max([len(field)] + [len(value) for value in values])
+                  for field, values in zip(self._FIELD_ORDER, columns)]
+        if wide:
+            return widths
+        # box-less table pads every column with one space on each side
+        available = self._console.width - 2 * len(widths)
+        flexible = [self._FIELD_ORDER.index(field) for field in self._FLEXIBLE]
+        fixed = [i for i in range(len(widths)) if i not in flexible]
+        for i in fixed:
+            widths[i] = min(widths[i], max(available // len(widths), len(self._FIELD_ORDER[i])))
+        rest = max(available - sum(widths[i] for i in fixed), 2 * 8)
+        snippet, desc = flexible
+        if widths[snippet] + widths[desc] > rest:
+            widths[desc] = min(widths[desc], max(rest * 2 // 5, rest - widths[snippet]))
+            widths[snippet] = rest - widths[desc]
+        return widths
+
+    @staticmethod
+    def _plain_values(snp: dm.Snippet) -> Tuple[str, ...]:
+        return snp.alias, snp.snippet, str(snp.defaults), ' '.join(snp.tags or []) + ' ', str(snp.desc)
+
+    @contextmanager
+    def _paged(self, width: int) -> Iterator['Console']:
+        """
+        Console of given width writing to terminal; when output outgrows the screen, it goes through pager.
+        Output not going to terminal is never paged, neither is terminal output captured by daemon,
+        pager can run only in process owning the terminal.
+        """
+        from rich.console import Console
+
+        if not self._console.is_terminal or not sys.stdout.isatty():
+            yield Console(width=width, force_terminal=self._console.is_terminal,
+                          color_system=self._console.color_system)
+            return
+
+        output = _PagerOutput(self._console.height)
+        try:
+            yield Console(file=output, width=width, color_system=self._console.color_system, force_terminal=True)
+        finally:
+            output.close()
+
+
+class _PagerOutput:
+    """
+    File buffering written text until it exceeds `height` lines, then starting pager and passing
+    everything to it; shorter output is written to stdout on close
+    """
+
+    def __init__(self, height: int):
+        self.height = height
+        self.closed = False
+        self._buffer: List[str] = []
+        self._lines = 0
+        self._pager: Optional[subprocess.Popen] = None
+
+    def write(self, text: str) -> int:
+        written = len(text)
+        if self.closed:
+            return written
+        if self._pager is None:
+            self._buffer.append(text)
+            self._lines += text.count('\n')
+            if self._lines < self.height:
+                return written
+            self._start_pager()
+            text = ''.join(self._buffer)
+            self._buffer = []
+        try:
+            self._pager.stdin.write(text)
+        except BrokenPipeError:
+            self.closed = True
+        return written
+
+    def flush(self) -> None:
+        if self._pager is not None and not self.closed:
+            try:
+                self._pager.stdin.flush()
+            except BrokenPipeError:
+                self.closed = True
+
+    def isatty(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        if self._pager is None:
+            sys.stdout.write(''.join(self._buffer))
+            sys.stdout.flush()
+        else:
+            try:
+                self._pager.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._pager.wait()
+        self.closed = True
+
+    def _start_pager(self) -> None:
+        # same defaults as git: quit when output fits screen, keep colors, leave output on screen
+        env = {'LESS': 'FRX', **os.environ}
+        self._pager = subprocess.Popen(os.environ.get('PAGER') or 'less', shell=True, stdin=subprocess.PIPE,
+                                       text=True, env=env)
+
 
 class ConsoleLoggerProviderEnum(str, Enum):
     POOR = 'poor'
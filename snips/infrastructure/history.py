@@ -0,0 +1,100 @@
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from snips.domain.history import IHistory, HistoryEntry, HistoryAction, bump, decay
+from snips.infrastructure.repository.locking import FileLock
+
+# magic, timestamp, duration, exit code, action, length of alias; followed by utf-8 alias and crc32
+# of everything but magic. 0xff never occurs in utf-8, magic and checksum let reader find next record
+# after one cut off by crash
+_MAGIC = b'\xff\xa7'
+_HEADER = struct.Struct('<2sdfiBH')
+_CHECKSUM = struct.Struct('<I')
+_ACTIONS = list(HistoryAction)
+
+
+def _encode(entry: HistoryEntry) -> bytes:
+    alias = entry.alias.encode('utf-8')
+    record = _HEADER.pack(_MAGIC, entry.timestamp, entry.duration, entry.returncode,
+                          _ACTIONS.index(entry.action), len(alias)) + alias
+    return record + _CHECKSUM.pack(zlib.crc32(record[len(_MAGIC):]))
+
+
+def _decode(data: bytes, offset: int) -> Optional[Tuple[HistoryEntry, int]]:
+    """Entry of record starting at offset and offset of the following record, None when there is no valid record"""
+    if offset + _HEADER.size + _CHECKSUM.size > len(data):
+        return None
+    magic, timestamp, duration, returncode, action, length = _HEADER.unpack_from(data, offset)
+    end = offset + _HEADER.size + length
+    if magic != _MAGIC or end + _CHECKSUM.size > len(data) or action >= len(_ACTIONS):
+        return None
+    if zlib.crc32(data[offset + len(_MAGIC):end]) != _CHECKSUM.unpack_from(data, end)[0]:
+        return None
+    alias = data[offset + _HEADER.size:end].decode('utf-8')
+    return HistoryEntry(timestamp, alias, _ACTIONS[action], duration, returncode), end + _CHECKSUM.size
+
+
+class BinaryHistory(IHistory):
+    """
+    History kept as append-only log of framed records: fixed-size header, alias and checksum.
+    Appends are written under lock, so concurrent commands do not interleave records; a record cut off
+    by crash is skipped and reading resumes at the next valid record. Frecency scores are maintained
+    in a JSON sidecar updated with each append, so ranking reads only the score table.
+    """
+
+    def __init__(self, path: str, scores_path: str):
+        self.path = path
+        self.scores_path = scores_path
+        self._lock = FileLock(scores_path)
+
+    def append(self, entries: Iterable[HistoryEntry]) -> None:
+        entries = list(entries)
+        if not entries:
+            return
+        data = memoryview(b''.join(_encode(entry) for entry in entries))
+        with self._lock.exclusive():
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+
+            scores = self._read_scores()
+            bump(scores, entries)
+            tmp_path = self.scores_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(scores, f)
+            os.replace(tmp_path, self.scores_path)
+
+    def iter_entries(self) -> Iterator[HistoryEntry]:
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        offset = data.find(_MAGIC)
+        while offset != -1:
+            decoded = _decode(data, offset)
+            if decoded is None:
+                offset = data.find(_MAGIC, offset + 1)
+                continue
+            entry, offset = decoded
+            yield entry
+
+    def frecency(self, now: float = None) -> Dict[str, float]:
+        now = now or time.time()
+        with self._lock.shared():
+            scores = self._read_scores()
+        return {alias: decay(score, since, now) for alias, (score, since) in scores.items()}
+
+    def _read_scores(self) -> Dict[str, Tuple[float, float]]:
+        try:
+            with open(self.scores_path) as f:
+                return {alias: tuple(value) for alias, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
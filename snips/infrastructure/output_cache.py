@@ -0,0 +1,102 @@
+import sqlite3
+import time
+from typing import Optional
+
+from snips.domain.cache import IOutputCache, CachedOutput, CacheStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    key TEXT PRIMARY KEY,
+    stdout TEXT NOT NULL,
+    stderr TEXT NOT NULL,
+    returncode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_outputs_accessed_at ON outputs(accessed_at);
+
+CREATE TABLE IF NOT EXISTS counters (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (id, size, hits, misses) VALUES (0, 0, 0, 0);
+"""
+
+# default limit of stored output, in bytes
+MAX_SIZE = 64 << 20
+
+
+class SqliteOutputCache(IOutputCache):
+    """
+    Command outputs kept on disk with expiration time. Total size is maintained incrementally
+    and entries are ordered by last access under index, so eviction reads only evicted entries.
+    """
+
+    def __init__(self, path: str, max_size: int = MAX_SIZE):
+        self.max_size = max_size
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[CachedOutput]:
+        now = time.time()
+        with self.connection:
+            row = self.connection.execute(
+                'SELECT stdout, stderr, returncode, expires_at FROM outputs WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[3] <= now:
+                if row is not None:
+                    self._delete(key)
+                self.connection.execute('UPDATE counters SET misses = misses + 1 WHERE id = 0')
+                return None
+            self.connection.execute('UPDATE outputs SET accessed_at = ? WHERE key = ?', (now, key))
+            self.connection.execute('UPDATE counters SET hits = hits + 1 WHERE id = 0')
+        return CachedOutput(row[0], row[1], row[2])
+
+    def put(self, key: str, output: CachedOutput, ttl: float) -> None:
+        size = len(output.stdout.encode()) + len(output.stderr.encode())
+        if size > self.max_size:
+            return
+        now = time.time()
+        with self.connection:
+            self._delete(key)
+            self.connection.execute(
+                'INSERT INTO outputs (key, stdout, stderr, returncode, size, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, output.stdout, output.stderr, output.returncode, size, now + ttl, now)
+            )
+            self.connection.execute('UPDATE counters SET size = size + ? WHERE id = 0', (size,))
+            self._evict()
+
+    def stats(self) -> CacheStats:
+        entries = self.connection.execute('SELECT COUNT(*) FROM outputs').fetchone()[0]
+        size, hits, misses = self.connection.execute('SELECT size, hits, misses FROM counters').fetchone()
+        return CacheStats(entries, size, hits, misses)
+
+    def clear(self) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM outputs')
+            self.connection.execute('UPDATE counters SET size = 0, hits = 0, misses = 0 WHERE id = 0')
+
+    def _delete(self, key: str) -> None:
+        row = self.connection.execute('SELECT size FROM outputs WHERE key = ?', (key,)).fetchone()
+        if row:
+            self.connection.execute('DELETE FROM outputs WHERE key = ?', (key,))
+            self.connection.execute('UPDATE counters SET size = size - ? WHERE id = 0', (row[0],))
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until stored output fits into size limit"""
+        excess = self.connection.execute('SELECT size FROM counters').fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+        evicted = 0
+        keys = []
+        for key, size in self.connection.execute('SELECT key, size FROM outputs ORDER BY accessed_at'):
+            keys.append(key)
+            evicted += size
+            if evicted >= excess:
+                break
+        self.connection.executemany('DELETE FROM outputs WHERE key = ?', ((key,) for key in keys))
+        self.connection.execute('UPDATE counters SET size = size - ? WHERE id = 0', (evicted,))
@@ -0,0 +1,270 @@
+import json
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Dict, Iterator, Iterable, Tuple
+
+from snips.domain import ISnippetRepository, Snippet, TagMatchingMode
+import snips.domain.exceptions as ex
+from snips.infrastructure.repository.locking import FileLock
+
+# File layout:
+#   header:  magic | version | count | index offset
+#   records: u32 length prefixed, compact json encoded snippets, in insertion order
+#   index:   `count` fixed size entries sorted by alias: alias offset | alias length | record offset
+#   aliases: utf-8 encoded aliases referenced by index entries
+MAGIC = b'SNPB'
+VERSION = 1
+_HEADER = struct.Struct('<4sHIQ')
+_LENGTH = struct.Struct('<I')
+_ENTRY = struct.Struct('<QIQ')
+
+_DATE_FIELDS = ('created_at', 'updated_at')
+
+
+def _encode(snp: Snippet) -> bytes:
+    di = snp.dict()
+    for field in _DATE_FIELDS:
+        di[field] = di[field].isoformat() if di[field] else None
+    return json.dumps(di, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _decode(payload: bytes) -> Snippet:
+    di = json.loads(payload)
+    for field in _DATE_FIELDS:
+        di[field] = datetime.fromisoformat(di[field]) if di.get(field) else None
+    return Snippet(**di)
+
+
+def write_store(path: str, records: Iterable[Tuple[str, bytes]]) -> None:
+    """
+    Writes binary store atomically
+    :param path:
+    :param records: (alias, encoded snippet) pairs in insertion order
+    """
+    records = list(records)
+    body = bytearray()
+    offsets = {}
+    for alias, payload in records:
+        offsets[alias] = _HEADER.size + len(body)
+        body += _LENGTH.pack(len(payload)) + payload
+
+    index_offset = _HEADER.size + len(body)
+    aliases = sorted(offsets.keys(), key=lambda a: a.encode('utf-8'))
+    alias_offset = index_offset + _ENTRY.size * len(aliases)
+    index = bytearray()
+    alias_region = bytearray()
+    for alias in aliases:
+        encoded = alias.encode('utf-8')
+        index += _ENTRY.pack(alias_offset + len(alias_region), len(encoded), offsets[alias])
+        alias_region += encoded
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(aliases), index_offset))
+        f.write(body)
+        f.write(index)
+        f.write(alias_region)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def convert_from_tinydb(json_path: str, path: str) -> int:
+    """
+    Converts existing TinyDB json database into binary store, preserving timestamps
+    :return: number of converted snippets
+    """
+    from snips.infrastructure.repository.tinydb_repository import TinyDbSnippetRepository
+
+    snippets = TinyDbSnippetRepository(json_path).get_all()
+    write_store(path, ((snp.alias, _encode(snp)) for snp in snippets))
+    return len(snippets)
+
+
+class BinarySnippetRepository(ISnippetRepository):
+    """
+    Read optimized implementation of ISnippetRepository over memory-mapped binary store.
+    Lookup by alias is a binary search over the offset table and decodes only the matching record.
+    Every flush rewrites the file by copying undecoded records, so batch mutations with `batch()`.
+    Files are replaced atomically under exclusive lock; reads map the file again once it was replaced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            write_store(path, [])
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._index_offset = 0
+        # pending mutations: alias -> encoded snippet, None for deletion
+        self._pending: Dict[str, Optional[bytes]] = {}
+        self._in_batch = False
+        self._lock = FileLock(path)
+        self._open()
+
+    def get_all(self) -> List[Snippet]:
+        return list(self.iter_all())
+
+    def iter_all(self) -> Iterator[Snippet]:
+        for _, payload in self._records():
+            yield _decode(payload)
+
+    def get_by_id(self, alias: str) -> Snippet:
+        payload = self._get_payload(alias)
+        if payload is None:
+            raise ex.SnippetNotFound.with_message(alias)
+        return _decode(payload)
+
+    def get_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> List[Snippet]:
+        return list(self.iter_by_tags(tags, mode))
+
+    def iter_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> Iterator[Snippet]:
+        assert mode in TagMatchingMode.__members__.values()
+        match = any if mode == TagMatchingMode.any else all
+        for snp in self.iter_all():
+            if snp.tags and match(tag in snp.tags for tag in tags):
+                yield snp
+
+    def save(self, snp: Snippet) -> Snippet:
+        with self._writing():
+            existing = self._get_payload(snp.alias)
+            existing = _decode(existing) if existing is not None else None
+            if existing and snp.updated_at is not None and existing.updated_at != snp.updated_at:
+                raise ex.ConcurrentModification.with_message(snp.alias)
+
+            current_time = datetime.now()
+            snp.updated_at = current_time
+            snp.created_at = existing.created_at if existing else current_time
+            self._pending[snp.alias] = _encode(snp)
+            self._flush_unless_batch()
+            return self.get_by_id(snp.alias)
+
+    def delete_by_id(self, alias: str) -> None:
+        with self._writing():
+            if self.exists(alias):
+                self._pending[alias] = None
+                self._flush_unless_batch()
+
+    def exists(self, alias: str) -> bool:
+        return self._get_payload(alias) is not None
+
+    def remove_all(self) -> None:
+        with self._writing():
+            for alias, _ in self._records():
+                self._pending[alias] = None
+            self._flush_unless_batch()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        if self._in_batch:
+            yield
+            return
+
+        with self._writing():
+            self._in_batch = True
+            try:
+                yield
+            except BaseException:
+                self._pending.clear()
+                raise
+            else:
+                self._flush()
+            finally:
+                self._in_batch = False
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _open(self) -> None:
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, self._index_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a snips binary store")
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Exclusive lock; file replaced by another process meanwhile is mapped again before any change"""
+        with self._lock.exclusive():
+            if not self._in_batch:
+                self._refresh()
+            yield
+
+    def _refresh(self) -> None:
+        if os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino:
+            self.close()
+            self._open()
+
+    def _flush_unless_batch(self) -> None:
+        if not self._in_batch:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        records = [(alias, self._pending.pop(alias, payload)) for alias, payload in self._stored_records()]
+        records += list(self._pending.items())
+        self._pending.clear()
+
+        self.close()
+        write_store(self.path, ((alias, payload) for alias, payload in records if payload is not None))
+        self._open()
+
+    def _records(self) -> Iterator[Tuple[str, bytes]]:
+        """Stored records overlaid with pending mutations"""
+        if not self._pending:
+            self._refresh()
+        for alias, payload in self._stored_records():
+            payload = self._pending.get(alias, payload)
+            if payload is not None:
+                yield alias, payload
+        for alias, payload in self._pending.items():
+            if payload is not None and self._find(alias) is None:
+                yield alias, payload
+
+    def _stored_records(self) -> Iterator[Tuple[str, bytes]]:
+        """Undecoded records in insertion order, aliases are read from the index"""
+        entries = []
+        for position in range(self._count):
+            alias_offset, alias_length, record_offset = _ENTRY.unpack_from(
+                self._map, self._index_offset + position * _ENTRY.size
+            )
+            entries.append((record_offset, self._map[alias_offset:alias_offset + alias_length].decode('utf-8')))
+        for record_offset, alias in sorted(entries):
+            yield alias, self._read_record(record_offset)
+
+    def _get_payload(self, alias: str) -> Optional[bytes]:
+        if not self._pending:
+            self._refresh()
+        if alias in self._pending:
+            return self._pending[alias]
+        offset = self._find(alias)
+        return self._read_record(offset) if offset is not None else None
+
+    def _read_record(self, offset: int) -> bytes:
+        (length,) = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        return self._map[start:start + length]
+
+    def _find(self, alias: str) -> Optional[int]:
+        """Binary search over index entries sorted by alias, returns record offset"""
+        key = alias.encode('utf-8')
+        low, high = 0, self._count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            alias_offset, alias_length, record_offset = _ENTRY.unpack_from(
+                self._map, self._index_offset + middle * _ENTRY.size
+            )
+            current = self._map[alias_offset:alias_offset + alias_length]
+            if current == key:
+                return record_offset
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
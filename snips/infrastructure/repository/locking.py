@@ -0,0 +1,59 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - platforms without flock fall back to no locking
+    fcntl = None
+
+
+class FileLock:
+    """
+    Reader/writer lock shared between processes, backed by flock on a sidecar `<path>.lock` file.
+    Many processes can hold it shared at once, exclusive holder excludes everyone else.
+    Locks are reentrant within the instance: nested acquisitions join the held lock, nested exclusive
+    acquisition upgrades shared one until it exits.
+    """
+
+    def __init__(self, path: str):
+        self.path = path + '.lock'
+        self._fd: Optional[int] = None
+        self._mode: Optional[int] = None
+        self._depth = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._acquire(fcntl.LOCK_SH if fcntl else None):
+            yield
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._acquire(fcntl.LOCK_EX if fcntl else None):
+            yield
+
+    @contextmanager
+    def _acquire(self, mode: Optional[int]) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+
+        previous = self._mode
+        if self._depth == 0:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if previous is None or (previous == fcntl.LOCK_SH and mode == fcntl.LOCK_EX):
+            fcntl.flock(self._fd, mode)
+            self._mode = mode
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+                self._mode = None
+            elif self._mode != previous:
+                fcntl.flock(self._fd, previous)
+                self._mode = previous
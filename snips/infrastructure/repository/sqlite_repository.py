@@ -0,0 +1,210 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Iterator
+
+from snips.domain import ISnippetRepository, Snippet, TagMatchingMode
+import snips.domain.exceptions as ex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,
+    alias TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    description TEXT,
+    defaults TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    arguments TEXT,
+    cache_ttl INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_snippets_alias ON snippets(alias);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_tags_name ON tags(name);
+
+CREATE TABLE IF NOT EXISTS snippet_tags (
+    snippet_id INTEGER NOT NULL REFERENCES snippets(id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (snippet_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS ix_snippet_tags_tag ON snippet_tags(tag_id, snippet_id);
+"""
+
+# columns added after first release: name -> definition, added to existing databases on open
+_MIGRATIONS = {
+    'arguments': 'TEXT',
+    'cache_ttl': 'INTEGER',
+}
+
+# tags are aggregated per row, so a single statement hydrates whole snippets
+_SELECT = """
+SELECT s.alias, s.snippet, s.description, s.defaults, s.created_at, s.updated_at, s.arguments, s.cache_ttl,
+       (SELECT json_group_array(name) FROM (
+            SELECT t.name FROM snippet_tags st JOIN tags t ON t.id = st.tag_id
+            WHERE st.snippet_id = s.id ORDER BY st.position
+       )) AS tags
+FROM snippets s
+"""
+
+
+def _dump_datetime(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _load_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def deserialize(row: sqlite3.Row) -> Snippet:
+    return Snippet(
+        alias=row['alias'],
+        snippet=row['snippet'],
+        desc=row['description'],
+        tags=json.loads(row['tags']) or None,
+        defaults=json.loads(row['defaults']) if row['defaults'] else None,
+        created_at=_load_datetime(row['created_at']),
+        updated_at=_load_datetime(row['updated_at']),
+        arguments=json.loads(row['arguments']) if row['arguments'] is not None else None,
+        cache_ttl=row['cache_ttl']
+    )
+
+
+class SqliteSnippetRepository(ISnippetRepository):
+    """Implementation of ISnippetRepository backed by sqlite3.
+    Aliases are kept under unique index and tags are normalized into separate table,
+    so lookups by alias or tag do not scan whole library.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(_SCHEMA)
+        self._migrate()
+        self._in_batch = False
+
+    def get_all(self) -> List[Snippet]:
+        return list(self.iter_all())
+
+    def iter_all(self) -> Iterator[Snippet]:
+        for row in self.connection.execute(_SELECT + 'ORDER BY s.id'):
+            yield deserialize(row)
+
+    def save(self, snp: Snippet) -> Snippet:
+        expected_version = _dump_datetime(snp.updated_at)
+        current_time = datetime.now()
+        snp.updated_at = current_time
+
+        with self._transaction():
+            snippet_id = self._get_rowid(snp.alias)
+            values = (snp.snippet, snp.desc, json.dumps(snp.defaults) if snp.defaults is not None else None,
+                      _dump_datetime(current_time), json.dumps(snp.arguments) if snp.arguments is not None else None,
+                      snp.cache_ttl)
+            if snippet_id is None:
+                snp.created_at = current_time
+                snippet_id = self.connection.execute(
+                    'INSERT INTO snippets '
+                    '(snippet, description, defaults, updated_at, arguments, cache_ttl, alias, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (*values, snp.alias, _dump_datetime(current_time))
+                ).lastrowid
+            else:
+                # optimistic check: snippet read before must not be modified by anyone else since then
+                updated = self.connection.execute(
+                    'UPDATE snippets SET snippet = ?, description = ?, defaults = ?, updated_at = ?, arguments = ?, cache_ttl = ? '
+                    'WHERE id = ? AND (? IS NULL OR updated_at = ?)',
+                    (*values, snippet_id, expected_version, expected_version)
+                )
+                if not updated.rowcount:
+                    raise ex.ConcurrentModification.with_message(snp.alias)
+            self._save_tags(snippet_id, snp.tags or [])
+
+        return self.get_by_id(snp.alias)
+
+    def get_by_id(self, alias: str) -> Snippet:
+        result = self.connection.execute(_SELECT + 'WHERE s.alias = ?', (alias,)).fetchone()
+        if result:
+            return deserialize(result)
+        raise ex.SnippetNotFound.with_message(alias)
+
+    def get_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> List[Snippet]:
+        return list(self.iter_by_tags(tags, mode))
+
+    def iter_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> Iterator[Snippet]:
+        assert mode in TagMatchingMode.__members__.values()
+
+        tags = list(set(tags))
+        placeholders = ', '.join('?' for _ in tags)
+        matching = f"""
+            SELECT st.snippet_id FROM snippet_tags st JOIN tags t ON t.id = st.tag_id
+            WHERE t.name IN ({placeholders})
+            GROUP BY st.snippet_id
+        """
+        params = list(tags)
+        if mode == TagMatchingMode.all:
+            matching += 'HAVING COUNT(*) = ?'
+            params.append(len(tags))
+
+        for row in self.connection.execute(_SELECT + f'WHERE s.id IN ({matching}) ORDER BY s.id', params):
+            yield deserialize(row)
+
+    def delete_by_id(self, alias: str) -> None:
+        with self._transaction():
+            self.connection.execute('DELETE FROM snippets WHERE alias = ?', (alias,))
+
+    def exists(self, alias: str) -> bool:
+        return self._get_rowid(alias) is not None
+
+    def remove_all(self) -> None:
+        with self._transaction():
+            self.connection.execute('DELETE FROM snippets')
+            self.connection.execute('DELETE FROM tags')
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        if self._in_batch:
+            yield
+            return
+
+        self._in_batch = True
+        try:
+            with self.connection:
+                yield
+        finally:
+            self._in_batch = False
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Commits on exit, unless it runs inside a batch, which commits once for all statements"""
+        if self._in_batch:
+            yield
+            return
+        with self.connection:
+            yield
+
+    def _migrate(self) -> None:
+        columns = {row['name'] for row in self.connection.execute('PRAGMA table_info(snippets)')}
+        with self.connection:
+            for column, definition in _MIGRATIONS.items():
+                if column not in columns:
+                    self.connection.execute(f'ALTER TABLE snippets ADD COLUMN {column} {definition}')
+
+    def _get_rowid(self, alias: str) -> Optional[int]:
+        result = self.connection.execute('SELECT id FROM snippets WHERE alias = ?', (alias,)).fetchone()
+        return result[0] if result else None
+
+    def _save_tags(self, snippet_id: int, tags: List[str]) -> None:
+        self.connection.execute('DELETE FROM snippet_tags WHERE snippet_id = ?', (snippet_id,))
+        for position, tag in enumerate(tags):
+            self.connection.execute('INSERT OR IGNORE INTO tags (name) VALUES (?)', (tag,))
+            self.connection.execute(
+                'INSERT OR IGNORE INTO snippet_tags (snippet_id, tag_id, position) '
+                'SELECT ?, id, ? FROM tags WHERE name = ?',
+                (snippet_id, position, tag)
+            )
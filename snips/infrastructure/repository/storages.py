@@ -0,0 +1,224 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Dict, List
+
+from tinydb.middlewares import Middleware
+from tinydb.storages import Storage, touch
+
+
+class DeferredWriteMiddleware(Middleware):
+    """
+    Middleware that can hold written data in memory instead of passing it to the storage.
+    While `deferred` is set, reads are served from pending data, so TinyDB sees its own writes,
+    and the wrapped storage is written only once on `flush`.
+    """
+
+    def __init__(self, storage_cls):
+        super(DeferredWriteMiddleware, self).__init__(storage_cls)
+        self.deferred = False
+        self._pending: Optional[dict] = None
+
+    def read(self):
+        if self._pending is not None:
+            return self._pending
+        return self.storage.read()
+
+    def write(self, data):
+        if self.deferred:
+            self._pending = data
+        else:
+            self.storage.write(data)
+
+    def flush(self) -> None:
+        if self._pending is not None:
+            self.storage.write(self._pending)
+            self._pending = None
+
+    def discard(self) -> None:
+        self._pending = None
+
+    def close(self):
+        self.flush()
+        self.storage.close()
+
+
+class AtomicJSONStorage(Storage):
+    """
+    JSON storage that never exposes half-written file: data is written into temporary file
+    in the same directory, synced and renamed over the database file.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super(AtomicJSONStorage, self).__init__()
+        self.path = path
+        self.kwargs = kwargs
+        touch(path, create_dirs=False)
+
+    def read(self) -> Optional[dict]:
+        with open(self.path, encoding='utf-8') as f:
+            content = f.read()
+        return json.loads(content) if content else None
+
+    def write(self, data: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path), dir=os.path.dirname(self.path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, **self.kwargs)
+                f.flush()
+                os.fsync(f.fileno())
+            shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def close(self) -> None:
+        pass
+
+
+# every record is serialized with "op" as its first key
+_RECORD_START = b'{"op": '
+
+
+class LogStorage(Storage):
+    """
+    Append-only TinyDB storage. Every write is diffed against the last known state and only
+    changed documents are appended to the file as JSON lines, so write cost is proportional
+    to the change, not to the database size. State is rebuilt by replaying the log and kept
+    in memory; records appended by other processes are replayed from the last known offset.
+    Once dead records outweigh `compaction_threshold` the log is compacted into a single snapshot.
+
+    Record types:
+        {"op": "snapshot", "data": {table: {doc_id: doc}}}
+        {"op": "put", "table": table, "id": doc_id, "doc": doc}
+        {"op": "del", "table": table, "id": doc_id}
+        {"op": "drop", "table": table}
+
+    Plain TinyDB json database is refused instead of being mistaken for torn log and truncated,
+    `tinydb_repository.convert_to_log` converts it.
+    """
+
+    def __init__(self, path: str, compaction_threshold: float = 0.5, compaction_min_records: int = 64):
+        super(LogStorage, self).__init__()
+        self.path = path
+        self.compaction_threshold = compaction_threshold
+        self.compaction_min_records = compaction_min_records
+        self._state: Dict[str, Dict[str, dict]] = {}
+        self._records = 0
+        self._offset = 0
+        self._inode = None
+        touch(path, create_dirs=False)
+
+    def read(self) -> Optional[dict]:
+        self._sync()
+        if not self._records:
+            return None
+        # TinyDB and serialization middleware modify read data in place, state must stay untouched for diffing
+        return _copy(self._state)
+
+    def write(self, data: dict) -> None:
+        self._sync()
+        records = self._diff(data)
+        if not records:
+            return
+
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(json.dumps(record).encode('utf-8') + b'\n' for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+            self._offset = f.tell()
+        for record in records:
+            self._apply(record)
+
+        if self._should_compact():
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrites the log as single snapshot of live documents"""
+        self._offset = write_snapshot(self.path, self._state)
+        self._inode = os.stat(self.path).st_ino
+        self._records = self._live_records()
+
+    def close(self) -> None:
+        pass
+
+    def _sync(self) -> None:
+        """Replays records not seen yet; the whole log when file was replaced by compaction"""
+        stat = os.stat(self.path)
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._state, self._records, self._offset = {}, 0, 0
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, 'rb+') as f:
+            f.seek(self._offset)
+            for line in f:
+                if self._offset == 0 and not line.startswith(_RECORD_START):
+                    raise ValueError(f"{self.path} is not a log database, convert it with "
+                                     f"`snp config convert-jsonl` or set DB_PROVIDER to 'json'")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn append from interrupted write, everything before it is consistent
+                    f.truncate(self._offset)
+                    break
+                self._apply(record)
+                self._offset += len(line)
+
+    def _apply(self, record: dict) -> None:
+        op = record['op']
+        if op == 'snapshot':
+            self._state = record['data']
+            self._records = self._live_records()
+            return
+
+        if op == 'put':
+            self._state.setdefault(record['table'], {})[record['id']] = record['doc']
+        elif op == 'del':
+            self._state.get(record['table'], {}).pop(record['id'], None)
+        elif op == 'drop':
+            self._state.pop(record['table'], None)
+        self._records += 1
+
+    def _diff(self, data: dict) -> List[dict]:
+        records = []
+        for table in self._state.keys() - data.keys():
+            records.append({'op': 'drop', 'table': table})
+        for table, docs in data.items():
+            current = self._state.get(table, {})
+            for doc_id, doc in docs.items():
+                if current.get(doc_id) != doc:
+                    records.append({'op': 'put', 'table': table, 'id': doc_id, 'doc': doc})
+            for doc_id in current.keys() - docs.keys():
+                records.append({'op': 'del', 'table': table, 'id': doc_id})
+        return records
+
+    def _live_records(self) -> int:
+        return sum(len(docs) for docs in self._state.values())
+
+    def _should_compact(self) -> bool:
+        if self._records < self.compaction_min_records:
+            return False
+        return (self._records - self._live_records()) / self._records > self.compaction_threshold
+
+
+def write_snapshot(path: str, data: Dict[str, Dict[str, dict]]) -> int:
+    """
+    Atomically replaces file at `path` with log holding single snapshot of `data`
+    :return: size of written log
+    """
+    tmp_path = path + '.compact'
+    with open(tmp_path, 'wb') as f:
+        f.write(json.dumps({'op': 'snapshot', 'data': data}).encode('utf-8') + b'\n')
+        f.flush()
+        os.fsync(f.fileno())
+        offset = f.tell()
+    os.replace(tmp_path, path)
+    return offset
+
+
+def _copy(data: Dict[str, Dict[str, dict]]) -> Dict[str, Dict[str, dict]]:
+    return {table: {doc_id: dict(doc) for doc_id, doc in docs.items()} for table, docs in data.items()}
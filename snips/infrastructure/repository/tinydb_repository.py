@@ -1,15 +1,18 @@
-from typing import List, Any
+import os
+from contextlib import contextmanager
+from typing import List, Any, Dict, Set, Optional, Iterator
 from datetime import datetime
 from snips import settings as settings
 from snips.domain import ISnippetRepository, Snippet, TagMatchingMode, IThemeRepository, Theme
 import snips.domain.exceptions as ex
-from tinydb import TinyDB, Query, JSONStorage
+from tinydb import TinyDB, Query
 import json
 from snips.domain.exceptions import ThemeNotFound
 from snips.domain.themes.themes import DEFAULT_THEME
-from snips.settings import CONFIG
 from tinydb_serialization import SerializationMiddleware
 from tinydb_serialization.serializers import DateTimeSerializer
+from snips.infrastructure.repository.locking import FileLock
+from snips.infrastructure.repository.storages import DeferredWriteMiddleware, AtomicJSONStorage, write_snapshot
 
 
 def deserialize(di: dict) -> Snippet:
@@ -22,61 +25,210 @@ def deserialize_many(dis: List[dict]) -> List[Snippet]:
     return [deserialize(di) for di in dis if di is not None]
 
 
-serialization = SerializationMiddleware(JSONStorage)
-serialization.register_serializer(DateTimeSerializer(), 'TinyDate')
+def serialization(storage=AtomicJSONStorage) -> SerializationMiddleware:
+    """Middleware instance binds to single storage, so each TinyDB handle needs its own"""
+    middleware = SerializationMiddleware(storage)
+    middleware.register_serializer(DateTimeSerializer(), 'TinyDate')
+    return middleware
 
 
-class TinyDbSnippetRepository(ISnippetRepository):
-    """Implementation of ISnippetRepository for TinyDB lib"""
+def convert_to_log(json_path: str, path: str) -> int:
+    """
+    Converts existing TinyDB json database into append-only log read by LogStorage, documents are copied as they are
+    :return: number of converted snippets
+    """
+    data = AtomicJSONStorage(json_path).read() or {}
+    write_snapshot(path, data)
+    return len(data.get("Snippets", {}))
+
 
-    def __init__(self, path: str  = CONFIG.DB_URI):
-        self.db = TinyDB(path, storage=serialization)
+class TinyDbSnippetRepository(ISnippetRepository):
+    """Implementation of ISnippetRepository for TinyDB lib.
+    Database file is guarded by shared lock for reads and exclusive lock for writes, so it can be used
+    by many processes at once; in-memory indexes are rebuilt whenever another process changed the file.
+    """
+
+    def __init__(self, path: str = None, storage=AtomicJSONStorage):
+        path = path or settings.CONFIG.DB_URI
+        self.path = path
+        self._storage = DeferredWriteMiddleware(serialization(storage))
+        self._lock = FileLock(path)
+        self.db = TinyDB(path, storage=self._storage)
         self.table = self.db.table("Snippets")
         self._query = Query()
+        # alias -> doc_id, lets lookups access documents directly instead of evaluating queries
+        self._doc_ids: Dict[str, int] = {}
+        # tag -> aliases inverted index, alias -> tags is kept to update it incrementally
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._alias_tags: Dict[str, Set[str]] = {}
+        self._signature = None
+        with self._reading():
+            pass
 
     def get_all(self) -> List[Snippet]:
-        return deserialize_many(self.table.all())
+        return list(self.iter_all())
 
-    def save(self, snp: Snippet) -> Snippet:
-        current_time = datetime.now()
-        snp.updated_at = current_time
-        if not self.exists(snp.alias):
-            snp.created_at = current_time
+    def iter_all(self) -> Iterator[Snippet]:
+        with self._reading():
+            documents = self.table.all()
+        for doc in documents:
+            yield deserialize(doc)
 
-        doc_id = self.table.upsert(snp.dict(), self._query.alias == snp.alias)[0]
-        return deserialize(self.table.get(doc_id=doc_id))
+    def save(self, snp: Snippet) -> Snippet:
+        with self._writing():
+            doc_id = self._doc_ids.get(snp.alias)
+            if doc_id is not None and snp.updated_at is not None:
+                # optimistic check: snippet read before must not be modified by anyone else since then
+                if self.table.get(doc_id=doc_id).get('updated_at') != snp.updated_at:
+                    raise ex.ConcurrentModification.with_message(snp.alias)
+
+            current_time = datetime.now()
+            snp.updated_at = current_time
+            if doc_id is None:
+                snp.created_at = current_time
+                doc_id = self.table.insert(snp.dict())
+            else:
+                self.table.update(snp.dict(), doc_ids=[doc_id])
+            self._index(snp.alias, doc_id, snp.tags)
+            return deserialize(self.table.get(doc_id=doc_id))
 
     def get_by_id(self, alias: str) -> Snippet:
-        result = self.table.get(self._query.alias == alias)
+        with self._reading():
+            doc_id = self._doc_ids.get(alias)
+            result = self.table.get(doc_id=doc_id) if doc_id is not None else None
         if result:
             return deserialize(result)
         raise ex.SnippetNotFound.with_message(alias)
 
     def get_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> List[Snippet]:
+        return list(self.iter_by_tags(tags, mode))
+
+    def iter_by_tags(self, tags: List[str], mode: TagMatchingMode = TagMatchingMode.any) -> Iterator[Snippet]:
         assert mode in TagMatchingMode.__members__.values()
 
-        if mode == TagMatchingMode.any:
-            return deserialize_many(self.table.search(self._query.tags.any(tags)))
-        return deserialize_many(self.table.search(self._query.tags.all(tags)))
+        with self._reading():
+            postings = [self._tag_index.get(tag, set()) for tag in set(tags)]
+            if not postings:
+                return
+
+            if mode == TagMatchingMode.any:
+                aliases = set().union(*postings)
+            else:
+                postings.sort(key=len)
+                aliases = set(postings[0])
+                for posting in postings[1:]:
+                    if not aliases:
+                        break
+                    aliases &= posting
+
+            if not aliases:
+                return
+            documents = self.table.get(doc_ids=[self._doc_ids[alias] for alias in aliases])
+        for doc in documents:
+            yield deserialize(doc)
 
     def delete_by_id(self, alias: str) -> None:
-        self.table.remove(self._query.alias == alias)
+        with self._writing():
+            doc_id = self._doc_ids.get(alias)
+            if doc_id is not None:
+                self.table.remove(doc_ids=[doc_id])
+                self._unindex(alias)
 
     def exists(self, alias: str) -> bool:
-        return bool(self.table.get(self._query.alias == alias))
+        with self._reading():
+            return alias in self._doc_ids
 
     def remove_all(self) -> None:
-        self.db.drop_table('Snippets')
+        with self._writing():
+            self.db.drop_table('Snippets')
+            self._doc_ids.clear()
+            self._tag_index.clear()
+            self._alias_tags.clear()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        if self._storage.deferred:
+            yield
+            return
+
+        with self._writing():
+            self._storage.deferred = True
+            try:
+                yield
+            except BaseException:
+                self._storage.discard()
+                self._reindex()
+                raise
+            else:
+                self._storage.flush()
+            finally:
+                self._storage.deferred = False
+
+    @contextmanager
+    def _reading(self) -> Iterator[None]:
+        with self._lock.shared():
+            self._refresh()
+            yield
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._lock.exclusive():
+            self._refresh()
+            try:
+                yield
+            finally:
+                self._signature = self._file_signature()
+
+    def _refresh(self) -> None:
+        """Rebuilds indexes when database file was changed by another process"""
+        signature = self._file_signature()
+        if signature != self._signature:
+            # fresh table handle, cached next document id may be outdated as well
+            self.table = self.db.table_class(self.db.storage, 'Snippets')
+            self._reindex()
+            self._signature = signature
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _reindex(self) -> None:
+        self._doc_ids.clear()
+        self._tag_index.clear()
+        self._alias_tags.clear()
+        for doc in self.table:
+            self._index(doc['alias'], doc.doc_id, doc.get('tags'))
+
+    def _index(self, alias: str, doc_id: int, tags: Optional[List[str]]) -> None:
+        self._unindex(alias)
+        self._doc_ids[alias] = doc_id
+        self._alias_tags[alias] = set(tags or [])
+        for tag in self._alias_tags[alias]:
+            self._tag_index.setdefault(tag, set()).add(alias)
+
+    def _unindex(self, alias: str) -> None:
+        self._doc_ids.pop(alias, None)
+        for tag in self._alias_tags.pop(alias, ()):
+            posting = self._tag_index[tag]
+            posting.discard(alias)
+            if not posting:
+                del self._tag_index[tag]
 
 
 class TinyDbThemeRepository(IThemeRepository):
 
     def __init__(self, path: str = settings.THEMES_URI):
-        self.db = TinyDB(path)
-        self.table = self.db.table('themes')
-
+        self.path = path
+        self._table = None
         self._query = Query()
 
+    @property
+    def table(self):
+        """Themes file is opened on first lookup, default theme does not need it"""
+        if self._table is None:
+            self._table = TinyDB(self.path).table('themes')
+        return self._table
+
     def get_by_id(self, id: str):
         if id == 'default':
             return DEFAULT_THEME
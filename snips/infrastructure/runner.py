@@ -0,0 +1,281 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TextIO
+
+from snips.domain import Flow, FlowStep
+from snips.domain.cache import IOutputCache, CachedOutput, cache_key
+
+# exit status of commands killed after timeout, same as coreutils `timeout`
+TIMEOUT_EXIT_CODE = 124
+# longest output line of streamed job
+_LINE_LIMIT = 1 << 20
+# seconds interrupted job has to exit before its process group is killed
+_INTERRUPT_GRACE = 2
+
+
+@dataclass
+class Job:
+    name: str
+    command: str
+    # keep stdout of the job in its result, besides streaming it
+    capture: bool = False
+    # seconds successful output is replayed from cache instead of running the command again
+    cache_ttl: Optional[float] = None
+
+
+@dataclass
+class JobResult:
+    job: Job
+    returncode: int
+    timed_out: bool = False
+    output: str = ''
+    errors: str = ''
+    # not started, because some of its dependencies failed
+    skipped: bool = False
+    # replayed from output cache
+    cached: bool = False
+    # seconds the command ran, not counting wait for free slot
+    duration: float = 0.0
+
+
+def exit_status(results: List[JobResult]) -> int:
+    """Aggregate exit status: the first non-zero status in job order, 0 when all jobs succeeded"""
+    return next((result.returncode for result in results if result.returncode), 0)
+
+
+def _returncode(returncode: int) -> int:
+    """Commands terminated by signal are reported as shells do, 128 + signal number"""
+    return 128 - returncode if returncode < 0 else returncode
+
+
+def _kill_group(pid: int, sig: int = signal.SIGKILL) -> None:
+    """Signals process group led by command started in own session"""
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+async def _gather(coroutines: Iterable[Awaitable[JobResult]]) -> List[JobResult]:
+    """
+    Like `asyncio.gather`, but cancelled gather waits for all jobs; plain gather finishes with the first
+    cancelled job and `asyncio.run` would cancel the others again while they are cleaning up
+    """
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+class Runner:
+    """
+    Executes shell commands. Single job inherits terminal, so interactive commands work as usual;
+    many jobs run at most `parallel` at once, their output is streamed line by line with `[name]` prefix.
+    Jobs with `cache_ttl` are looked up in `cache` first; `refresh` runs them anyway and stores new output.
+    """
+
+    def __init__(self, parallel: int = 1, timeout: Optional[float] = None,
+                 stdout: TextIO = None, stderr: TextIO = None,
+                 cache: IOutputCache = None, refresh: bool = False):
+        self.parallel = parallel
+        self.timeout = timeout
+        self.stdout = stdout or sys.stdout
+        self.stderr = stderr or sys.stderr
+        self.cache = cache
+        self.refresh = refresh
+
+    def run(self, jobs: List[Job]) -> List[JobResult]:
+        if len(jobs) == 1:
+            started = time.monotonic()
+            result = self._run_attached(jobs[0])
+            result.duration = time.monotonic() - started
+            return [result]
+        return asyncio.run(self._run_all(jobs))
+
+    def _run_attached(self, job: Job) -> JobResult:
+        key = self._cache_key(job)
+        if key is not None:
+            return self._lookup(job, key, prefix='') or self._run_captured(job, key)
+
+        # with timeout, command gets own session, so that killing it takes down the whole process group;
+        # without it, command stays in terminal's foreground group and gets Ctrl-C directly
+        process = subprocess.Popen(job.command, shell=True, start_new_session=self.timeout is not None)
+        try:
+            return JobResult(job, _returncode(process.wait(self.timeout)))
+        except subprocess.TimeoutExpired:
+            _kill_group(process.pid)
+            process.wait()
+            self._report_timeout(job)
+            return JobResult(job, TIMEOUT_EXIT_CODE, timed_out=True)
+        except KeyboardInterrupt:
+            if self.timeout is not None:
+                _kill_group(process.pid, signal.SIGINT)
+            process.wait()
+            raise
+
+    def _run_captured(self, job: Job, key: str) -> JobResult:
+        """Runs cacheable job with its output captured, so that it can be stored"""
+        process = subprocess.Popen(job.command, shell=True, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        try:
+            stdout, stderr = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            # children of the shell hold the pipes open, whole process group has to go
+            _kill_group(process.pid)
+            process.communicate()
+            self._report_timeout(job)
+            return JobResult(job, TIMEOUT_EXIT_CODE, timed_out=True)
+        except KeyboardInterrupt:
+            # own session does not get terminal's Ctrl-C, it is passed on as in parallel jobs
+            _kill_group(process.pid, signal.SIGINT)
+            try:
+                process.communicate(timeout=_INTERRUPT_GRACE)
+            except subprocess.TimeoutExpired:
+                pass
+            _kill_group(process.pid)
+            process.communicate()
+            raise
+        result = JobResult(job, _returncode(process.returncode),
+                           output=stdout.decode(errors='replace'), errors=stderr.decode(errors='replace'))
+        self._replay(CachedOutput(result.output, result.errors), prefix='')
+        self._store(key, result)
+        return result
+
+    async def _run_all(self, jobs: List[Job]) -> List[JobResult]:
+        semaphore = asyncio.Semaphore(self.parallel)
+        width = max(len(job.name) for job in jobs)
+        return await _gather(self._run_job(job, semaphore, width) for job in jobs)
+
+    def run_flow(self, flow: Flow, render: Callable[[FlowStep, Dict[str, str]], str]) -> List[JobResult]:
+        """
+        Runs flow steps as soon as all their dependencies succeeded, at most `parallel` at once.
+        Steps depending on failed step are skipped.
+
+        :param flow: flow to run
+        :param render: builds command of step from outputs of finished steps, keyed by step name
+        :return: results in order of flow steps
+        """
+        return asyncio.run(self._run_flow(flow, render))
+
+    async def _run_flow(self, flow: Flow, render: Callable[[FlowStep, Dict[str, str]], str]) -> List[JobResult]:
+        semaphore = asyncio.Semaphore(self.parallel)
+        width = max(len(step.name) for step in flow.steps)
+        finished = {step.name: asyncio.Event() for step in flow.steps}
+        results: Dict[str, JobResult] = {}
+        outputs: Dict[str, str] = {}
+
+        async def run_step(step: FlowStep) -> JobResult:
+            dependencies = sorted(step.dependencies)
+            for dependency in dependencies:
+                await finished[dependency].wait()
+            failed = [dependency for dependency in dependencies if results[dependency].returncode]
+            if failed:
+                self.stderr.write(f'[{step.name}] skipped, failed: {", ".join(failed)}\n')
+                self.stderr.flush()
+                result = JobResult(Job(step.name, ''), 1, skipped=True)
+            else:
+                job = Job(step.name, render(step, outputs), capture=True)
+                result = await self._run_job(job, semaphore, width)
+                outputs[step.name] = result.output.rstrip('\n')
+            results[step.name] = result
+            finished[step.name].set()
+            return result
+
+        return await _gather(run_step(step) for step in flow.steps)
+
+    async def _run_job(self, job: Job, semaphore: asyncio.Semaphore, width: int) -> JobResult:
+        prefix = f'[{job.name}]'.ljust(width + 2) + ' '
+        key = self._cache_key(job)
+        cached = self._lookup(job, key, prefix) if key is not None else None
+        if cached is not None:
+            return cached
+
+        async with semaphore:
+            started = time.monotonic()
+            # own session, so timeout kills whole process group, not only the shell
+            process = await asyncio.create_subprocess_shell(
+                job.command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                start_new_session=True, limit=_LINE_LIMIT
+            )
+            captured = [] if job.capture or key is not None else None
+            errors = [] if key is not None else None
+            try:
+                await asyncio.wait_for(asyncio.gather(
+                    self._stream(process.stdout, self.stdout, prefix, captured),
+                    self._stream(process.stderr, self.stderr, prefix, errors),
+                    process.wait()
+                ), self.timeout)
+            except asyncio.TimeoutError:
+                _kill_group(process.pid)
+                await process.wait()
+                self._report_timeout(job)
+                return JobResult(job, TIMEOUT_EXIT_CODE, timed_out=True, duration=time.monotonic() - started)
+            except (asyncio.CancelledError, KeyboardInterrupt):
+                # own session does not get terminal's Ctrl-C, interrupted run must not leave the job behind
+                await self._interrupt(process)
+                raise
+            result = JobResult(job, _returncode(process.returncode), output=''.join(captured or ()),
+                               errors=''.join(errors or ()), duration=time.monotonic() - started)
+            if key is not None:
+                self._store(key, result)
+            return result
+
+    @staticmethod
+    async def _interrupt(process: asyncio.subprocess.Process) -> None:
+        """
+        Interrupts process group of job as Ctrl-C would; whatever is left after grace period is killed,
+        e.g. background commands of the shell, which ignore SIGINT
+        """
+        _kill_group(process.pid, signal.SIGINT)
+        # streaming was cancelled, pipes are drained so that they are closed before the loop
+        drained = asyncio.ensure_future(process.communicate())
+        await asyncio.wait({drained}, timeout=_INTERRUPT_GRACE)
+        _kill_group(process.pid)
+        await drained
+
+    @staticmethod
+    async def _stream(reader: asyncio.StreamReader, out: TextIO, prefix: str, captured: List[str] = None) -> None:
+        async for line in reader:
+            text = line.decode(errors='replace')
+            if captured is not None:
+                captured.append(text)
+            out.write(prefix + text.rstrip('\n') + '\n')
+            out.flush()
+
+    def _cache_key(self, job: Job) -> Optional[str]:
+        """Cache key of job, None when its output is not cached"""
+        if self.cache is None or not job.cache_ttl:
+            return None
+        return cache_key(job.command, os.getcwd())
+
+    def _lookup(self, job: Job, key: str, prefix: str) -> Optional[JobResult]:
+        """Replays cached output of job, None on cache miss"""
+        if self.refresh:
+            return None
+        output = self.cache.get(key)
+        if output is None:
+            return None
+        self._replay(output, prefix)
+        return JobResult(job, output.returncode, output=output.stdout, errors=output.stderr, cached=True)
+
+    def _replay(self, output: CachedOutput, prefix: str) -> None:
+        for text, out in ((output.stdout, self.stdout), (output.stderr, self.stderr)):
+            if prefix:
+                text = ''.join(prefix + line + '\n' for line in text.splitlines())
+            out.write(text)
+            out.flush()
+
+    def _store(self, key: str, result: JobResult) -> None:
+        # failures may be transient, only successful output is replayed
+        if result.returncode == 0:
+            self.cache.put(key, CachedOutput(result.output, result.errors), result.job.cache_ttl)
+
+    def _report_timeout(self, job: Job) -> None:
+        self.stderr.write(f'[{job.name}] killed after {self.timeout}s timeout\n')
+        self.stderr.flush()
@@ -0,0 +1,205 @@
+import math
+import sqlite3
+from collections import Counter
+from typing import List, Tuple, Iterable
+
+from snips.domain import Snippet
+from snips.domain.search import ISearchIndex, snippet_terms, tokenize, IAliasIndex, trigrams, edit_distance
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    alias TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, alias)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_postings_alias ON postings(alias);
+
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    documents INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, documents, total_length) VALUES (0, 0, 0);
+
+-- indexes built from whole library, partially filled index is rebuilt on first use
+CREATE TABLE IF NOT EXISTS builds (
+    name TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS aliases (
+    alias TEXT PRIMARY KEY,
+    grams INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS trigrams (
+    gram TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    PRIMARY KEY (gram, alias)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_trigrams_alias ON trigrams(alias);
+"""
+
+
+class SqliteSearchIndex(ISearchIndex):
+    """
+    Persistent inverted index ranking snippets with BM25.
+    Postings are keyed by term, so query reads only postings of its terms; collection statistics
+    are maintained incrementally, so neither indexing nor querying scans the whole library.
+    """
+    K1 = 1.2
+    B = 0.75
+    NAME = 'search'
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript(_SCHEMA)
+
+    def index(self, snp: Snippet) -> None:
+        self.index_many([snp])
+
+    def index_many(self, snps: Iterable[Snippet]) -> None:
+        with self.connection:
+            for snp in snps:
+                self._remove(snp.alias)
+                terms = Counter(snippet_terms(snp))
+                length = sum(terms.values())
+                self.connection.execute('INSERT INTO documents (alias, length) VALUES (?, ?)', (snp.alias, length))
+                self.connection.executemany('INSERT INTO postings (term, alias, tf) VALUES (?, ?, ?)',
+                                            [(term, snp.alias, tf) for term, tf in terms.items()])
+                self._update_stats(1, length)
+
+    def remove(self, alias: str) -> None:
+        with self.connection:
+            self._remove(alias)
+
+    def clear(self) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM postings')
+            self.connection.execute('DELETE FROM documents')
+            self.connection.execute('UPDATE stats SET documents = 0, total_length = 0')
+            self.connection.execute('DELETE FROM builds WHERE name = ?', (self.NAME,))
+
+    def is_empty(self) -> bool:
+        return self.connection.execute('SELECT documents FROM stats').fetchone()[0] == 0
+
+    def is_built(self) -> bool:
+        return _is_built(self.connection, self.NAME)
+
+    def mark_built(self) -> None:
+        _mark_built(self.connection, self.NAME)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        documents, total_length = self.connection.execute('SELECT documents, total_length FROM stats').fetchone()
+        if not documents:
+            return []
+        average_length = total_length / documents
+
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.connection.execute(
+                'SELECT p.alias, p.tf, d.length FROM postings p JOIN documents d ON d.alias = p.alias '
+                'WHERE p.term = ?', (term,)
+            ).fetchall()
+            if not postings:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for alias, tf, length in postings:
+                norm = self.K1 * (1 - self.B + self.B * length / average_length)
+                scores[alias] += idf * tf * (self.K1 + 1) / (tf + norm)
+        return scores.most_common(limit)
+
+    def _remove(self, alias: str) -> None:
+        row = self.connection.execute('SELECT length FROM documents WHERE alias = ?', (alias,)).fetchone()
+        if row is None:
+            return
+        self.connection.execute('DELETE FROM postings WHERE alias = ?', (alias,))
+        self.connection.execute('DELETE FROM documents WHERE alias = ?', (alias,))
+        self._update_stats(-1, -row[0])
+
+    def _update_stats(self, documents: int, length: int) -> None:
+        self.connection.execute('UPDATE stats SET documents = documents + ?, total_length = total_length + ?',
+                                (documents, length))
+
+
+class SqliteAliasIndex(IAliasIndex):
+    """
+    Persistent trigram index over aliases. Candidates are aliases sharing most trigrams with the query,
+    ranked by Jaccard similarity; edit distance is computed only for those few candidates.
+    """
+    CANDIDATES = 20
+    NAME = 'aliases'
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript(_SCHEMA)
+
+    def add_many(self, aliases: Iterable[str]) -> None:
+        with self.connection:
+            for alias in aliases:
+                self._remove(alias)
+                grams = trigrams(alias)
+                self.connection.execute('INSERT INTO aliases (alias, grams) VALUES (?, ?)', (alias, len(grams)))
+                self.connection.executemany('INSERT INTO trigrams (gram, alias) VALUES (?, ?)',
+                                            [(gram, alias) for gram in grams])
+
+    def remove(self, alias: str) -> None:
+        with self.connection:
+            self._remove(alias)
+
+    def clear(self) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM trigrams')
+            self.connection.execute('DELETE FROM aliases')
+            self.connection.execute('DELETE FROM builds WHERE name = ?', (self.NAME,))
+
+    def is_empty(self) -> bool:
+        return self.connection.execute('SELECT 1 FROM aliases LIMIT 1').fetchone() is None
+
+    def is_built(self) -> bool:
+        return _is_built(self.connection, self.NAME)
+
+    def mark_built(self) -> None:
+        _mark_built(self.connection, self.NAME)
+
+    def suggest(self, alias: str, limit: int = 5) -> List[Tuple[str, int]]:
+        grams = trigrams(alias)
+        placeholders = ', '.join('?' for _ in grams)
+        candidates = self.connection.execute(
+            f"""
+            SELECT t.alias, COUNT(*) * 1.0 / (a.grams + ? - COUNT(*)) AS similarity
+            FROM trigrams t JOIN aliases a ON a.alias = t.alias
+            WHERE t.gram IN ({placeholders})
+            GROUP BY t.alias
+            ORDER BY similarity DESC
+            LIMIT ?
+            """,
+            (len(grams), *grams, self.CANDIDATES)
+        ).fetchall()
+
+        max_distance = max(1, len(alias) // 3)
+        suggestions = []
+        for candidate, similarity in candidates:
+            distance = edit_distance(alias, candidate)
+            if distance <= max_distance:
+                suggestions.append((candidate, distance, -similarity))
+        suggestions.sort(key=lambda s: (s[1], s[2]))
+        return [(candidate, distance) for candidate, distance, _ in suggestions[:limit]]
+
+    def _remove(self, alias: str) -> None:
+        self.connection.execute('DELETE FROM trigrams WHERE alias = ?', (alias,))
+        self.connection.execute('DELETE FROM aliases WHERE alias = ?', (alias,))
+
+
+def _is_built(connection: sqlite3.Connection, name: str) -> bool:
+    return connection.execute('SELECT 1 FROM builds WHERE name = ?', (name,)).fetchone() is not None
+
+
+def _mark_built(connection: sqlite3.Connection, name: str) -> None:
+    with connection:
+        connection.execute('INSERT OR IGNORE INTO builds (name) VALUES (?)', (name,))
@@ -1,41 +1,99 @@
-from dataclasses import dataclass
+import os
 from enum import Enum
+from functools import cached_property
+from typing import TYPE_CHECKING
 
-from snips.domain import IThemeRepository
-from snips.infrastructure.repository.tinydb_repository import TinyDbThemeRepository
 import snips.settings as settings
-import snips.infrastructure as infra
-
-from snips.domain import ISnippetRepository
+from snips.domain import ISnippetRepository, IThemeRepository
+from snips.domain.cache import IOutputCache
+from snips.domain.history import IHistory
+from snips.domain.search import ISearchIndex, IAliasIndex
 from snips.domain.service import SnippetService
-from snips.infrastructure.console_logger import ConsoleLoggerFactory
+
+if TYPE_CHECKING:
+    from snips.infrastructure import IConsoleLogger
 
 
 class DbProvider(str, Enum):
     JSON = 'json'
+    SQLITE = 'sqlite'
+    JSONL = 'jsonl'
+    BINARY = 'binary'
 
-import os
 
-def repository_factory(provider: DbProvider = settings.CONFIG.DB_PROVIDER):
+def repository_factory(provider: DbProvider = None) -> ISnippetRepository:
+    """Builds repository of given provider, importing only its own implementation"""
+    if not os.path.exists(settings.CONFIG_PATH):
+        # first run, configuration directory holding the database does not exist yet
+        settings.ensure_configuration()
+    provider = provider or settings.CONFIG.DB_PROVIDER
+    path = os.path.abspath(settings.CONFIG.DB_URI)
     if provider == DbProvider.JSON:
-        return infra.tinydb_repository.TinyDbSnippetRepository(os.path.abspath(settings.CONFIG.DB_URI))
+        from snips.infrastructure.repository.tinydb_repository import TinyDbSnippetRepository
+        return TinyDbSnippetRepository(path)
+    if provider == DbProvider.JSONL:
+        from snips.infrastructure.repository.tinydb_repository import TinyDbSnippetRepository
+        from snips.infrastructure.repository.storages import LogStorage
+        return TinyDbSnippetRepository(path, storage=LogStorage)
+    if provider == DbProvider.SQLITE:
+        from snips.infrastructure.repository.sqlite_repository import SqliteSnippetRepository
+        return SqliteSnippetRepository(path)
+    if provider == DbProvider.BINARY:
+        from snips.infrastructure.repository.binary_repository import BinarySnippetRepository
+        return BinarySnippetRepository(path)
     raise ValueError("Unknown configuration value for: DB_PROVIDER")
 
 
-@dataclass
+def index_path(suffix: str) -> str:
+    """Path of sidecar file kept next to the database"""
+    return os.path.splitext(os.path.abspath(settings.CONFIG.DB_URI))[0] + suffix
+
+
 class IocContainer:
-    repository: ISnippetRepository
-    theme_repository: IThemeRepository
-    console_logger: infra.IConsoleLogger
-    service: SnippetService
+    """
+    Components are built on first access, so a command loads only the parts it uses;
+    each of them can be replaced by assignment.
+    """
+
+    @cached_property
+    def repository(self) -> ISnippetRepository:
+        return repository_factory()
+
+    @cached_property
+    def theme_repository(self) -> IThemeRepository:
+        from snips.infrastructure.repository.tinydb_repository import TinyDbThemeRepository
+        return TinyDbThemeRepository(settings.THEMES_URI)
+
+    @cached_property
+    def console_logger(self) -> 'IConsoleLogger':
+        from snips.infrastructure.console_logger import ConsoleLoggerFactory
+        return ConsoleLoggerFactory.create(settings.CONFIG.FORMAT,
+                                           self.theme_repository.get_by_id(settings.CONFIG.THEME))
+
+    @cached_property
+    def search_index(self) -> ISearchIndex:
+        from snips.infrastructure.search_index import SqliteSearchIndex
+        return SqliteSearchIndex(index_path('-index.sqlite3'))
+
+    @cached_property
+    def alias_index(self) -> IAliasIndex:
+        from snips.infrastructure.search_index import SqliteAliasIndex
+        return SqliteAliasIndex(index_path('-index.sqlite3'))
+
+    @cached_property
+    def output_cache(self) -> IOutputCache:
+        from snips.infrastructure.output_cache import SqliteOutputCache
+        return SqliteOutputCache(index_path('-cache.sqlite3'))
+
+    @cached_property
+    def history(self) -> IHistory:
+        from snips.infrastructure.history import BinaryHistory
+        return BinaryHistory(index_path('-history.bin'), index_path('-frecency.json'))
+
+    @cached_property
+    def service(self) -> SnippetService:
+        return SnippetService(self.repository, self.search_index, self.alias_index)
 
 
 def get_ioc() -> IocContainer:
-    repository = repository_factory()
-    themes = TinyDbThemeRepository(settings.THEMES_URI)
-    return IocContainer(
-        repository,
-        themes,
-        ConsoleLoggerFactory.create(settings.CONFIG.FORMAT, themes.get_by_id(settings.CONFIG.THEME)),
-        SnippetService(repository),
-    )
+    return IocContainer()
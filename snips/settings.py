@@ -1,8 +1,9 @@
 import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
+from typing import Optional, Tuple
 
-from dotenv import load_dotenv, set_key, dotenv_values
+from dotenv import set_key, dotenv_values, find_dotenv
 from snips.config import load_prompt_questions
 
 
@@ -20,10 +21,19 @@ class ConfigEnum(str, Enum):
         return list(map(lambda c: c.value, cls))
 
 
-load_dotenv()
-CONFIG_HOME =  os.path.join(os.path.dirname(__file__), os.environ['CONFIG_HOME']) if os.environ.get('CONFIG_HOME') else os.path.join(os.environ['HOME'], '.snips')
+def _config_home() -> str:
+    """CONFIG_HOME from environment or project .env file, relative to the package; ~/.snips by default"""
+    config_home = os.environ.get('CONFIG_HOME') or dotenv_values(find_dotenv()).get('CONFIG_HOME')
+    if config_home:
+        return os.path.join(os.path.dirname(__file__), config_home)
+    return os.path.join(os.environ['HOME'], '.snips')
+
+
+CONFIG_HOME = _config_home()
 CONFIG_PATH = os.path.join(CONFIG_HOME, 'config.env')
 THEMES_URI = os.path.join(CONFIG_HOME, 'themes.json')
+# variables set in environment of the process override configuration file
+_ENVIRONMENT = {key: os.environ[key] for key in ConfigEnum.list() if os.environ.get(key)}
 
 
 @dataclass
@@ -37,9 +47,15 @@ class Configuration:
     THEME: str = 'default'
 
     @classmethod
-    def from_environ(cls):
-        init_di = {key: os.environ.get(key) for key in ConfigEnum.list()}
-        init_di['DB_URI'] = os.path.join(CONFIG_HOME, 'snips-db.json')
+    def load(cls, path: str):
+        """
+        Reads configuration file; variables set in environment at startup take precedence over the file,
+        missing ones fall back to defaults
+        """
+        values = dotenv_values(path) if os.path.exists(path) else {}
+        values.update(_ENVIRONMENT)
+        init_di = {f.name: values[f.name] for f in fields(cls) if values.get(f.name)}
+        init_di['DB_URI'] = os.path.join(CONFIG_HOME, init_di.get('DB_URI') or cls.DB_URI)
         return cls(**init_di)
 
     def __post_init__(self):
@@ -50,6 +66,22 @@ class Configuration:
         return asdict(self)
 
 
+_cached: Optional[Tuple[Optional[Tuple[int, int]], Configuration]] = None
+
+
+def get_config() -> Configuration:
+    """Configuration parsed once per change of the configuration file"""
+    global _cached
+    try:
+        stat = os.stat(CONFIG_PATH)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        version = None
+    if _cached is None or _cached[0] != version:
+        _cached = (version, Configuration.load(CONFIG_PATH))
+    return _cached[1]
+
+
 def init_configuration():
     if not os.path.exists(CONFIG_HOME):
         os.mkdir(CONFIG_HOME)
@@ -67,12 +99,15 @@ def sync_configuration():
             set_key(CONFIG_PATH, key, current_config[key])
 
 
-if not os.path.exists(CONFIG_PATH):
+def ensure_configuration():
+    """Creates configuration file and adds variables introduced since it was written; run before writes"""
     init_configuration()
+    sync_configuration()
 
-sync_configuration()
-load_dotenv(CONFIG_PATH)
-
-CONFIG = Configuration.from_environ()
 
-PROMPT_QUESTIONS = load_prompt_questions()
+def __getattr__(name: str):
+    if name == 'CONFIG':
+        return get_config()
+    if name == 'PROMPT_QUESTIONS':
+        return load_prompt_questions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,50 @@
+import sys
+from datetime import datetime
+
+import pytest
+
+import snips.domain as dm
+
+
+def _snippets():
+    return [
+        dm.Snippet('c', 'ls', 'list', ['bash', 'sql'], {'dir': '.'}, datetime(2022, 1, 3, 12, 0, 0, 123456),
+                   datetime(2022, 2, 1), arguments=['dir'], cache_ttl=60),
+        dm.Snippet('a', 'ps', None),
+        dm.Snippet('d', 'top', 'processes', [], {}, datetime(2022, 1, 1)),
+        dm.Snippet('b', 'df', 'disk', ['bash'], created_at=datetime(2022, 1, 2)),
+    ]
+
+
+@pytest.mark.unit
+class TestSnippetCollection:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.sut = dm.SnippetCollection(_snippets())
+
+    def test_materializes_snippets_equal_to_stored_ones(self):
+        assert len(self.sut) == 4
+        assert list(self.sut) == _snippets()
+
+    def test_tag_names_are_stored_once(self):
+        assert self.sut._tag_names == ['bash', 'sql']
+        assert self.sut[0].tags[0] is self.sut[3].tags[0]
+        assert self.sut[1].alias is sys.intern('a')
+
+    @pytest.mark.parametrize(
+        'sort, reverse, offset, limit', [
+            (None, False, 1, 2),
+            (dm.SortKey.alias, False, 0, None),
+            (dm.SortKey.alias, True, 0, 2),
+            (dm.SortKey.created, False, 0, None),
+            (dm.SortKey.created, True, 1, 2),
+            (dm.SortKey.updated, False, 0, None),
+            (dm.SortKey.frecency, False, 0, None),
+            (dm.SortKey.frecency, True, 0, 3),
+        ]
+    )
+    def test_page_selects_same_snippets_as_paginate(self, sort, reverse, offset, limit):
+        scores = {'b': 2.0, 'd': 1.0}
+        expected = list(dm.paginate(_snippets(), offset, limit, sort, reverse, scores))
+        assert list(self.sut.page(offset, limit, sort, reverse, scores)) == expected
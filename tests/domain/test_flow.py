@@ -0,0 +1,41 @@
+import pytest
+
+import snips.domain.exceptions as ex
+from snips.domain import Flow, FlowStep
+
+
+@pytest.mark.unit
+def test_parse_reads_steps_arguments_and_dependencies():
+    flow = Flow.parse('''
+        # build and deploy
+        build: make-image tag=latest
+        test: run-tests "pattern=unit and not slow" after=build
+
+        deploy: push image=@{build} after=test
+    ''')
+    assert [step.name for step in flow.steps] == ['build', 'test', 'deploy']
+    assert flow.steps[1] == FlowStep('test', 'run-tests', {'pattern': 'unit and not slow'}, ['build'])
+    assert flow.steps[2].dependencies == {'build', 'test'}
+
+
+@pytest.mark.unit
+def test_resolve_arguments_substitutes_outputs_of_referenced_steps():
+    step = FlowStep('deploy', 'push', {'image': 'registry/@{build}', 'env': 'prod'})
+    assert step.resolve_arguments({'build': 'app:1'}) == {'image': 'registry/app:1', 'env': 'prod'}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'content, message', [
+        ('', 'flow has no steps'),
+        ('build make', 'line 1'),
+        ('build: make\nbuild: make', "step 'build' is already defined"),
+        ('deploy: push after=build\nbuild: make', 'not defined above it: build'),
+        ('deploy: push image=@{deploy}', 'not defined above it: deploy'),
+        ('build: make tag', "expected argument=value, got 'tag'"),
+        ('build: make "tag=latest', 'line 1'),
+    ]
+)
+def test_parse_rejects_invalid_flow(content, message):
+    with pytest.raises(ex.InvalidFlow, match=message):
+        Flow.parse(content)
@@ -0,0 +1,33 @@
+import pytest
+
+from snips.domain.history import (HistoryEntry, HistoryAction, AliasStats, percentile, summarize, bump, decay,
+                                  FRECENCY_HALF_LIFE)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'q, expected', [(50, 5), (95, 10), (99, 10), (10, 1), (0, 1)]
+)
+def test_percentile_is_nearest_rank(q, expected):
+    assert percentile(list(range(1, 11)), q) == expected
+
+
+@pytest.mark.unit
+def test_summarize_counts_uses_and_run_durations_per_alias():
+    entries = [HistoryEntry(0, 'ls', HistoryAction.run, duration, code)
+               for duration, code in [(0.3, 0), (0.1, 0), (0.2, 2)]]
+    entries += [HistoryEntry(0, 'ls', HistoryAction.get), HistoryEntry(0, 'ps', HistoryAction.get)]
+    entries += [HistoryEntry(0, 'ls', HistoryAction.cached, 0.001), HistoryEntry(0, 'du', HistoryAction.cached)]
+    assert summarize(entries) == [
+        AliasStats('ls', runs=3, gets=1, failures=1, cached=1, p50=0.2, p95=0.3, p99=0.3),
+        AliasStats('du', runs=0, gets=0, failures=0, cached=1),
+        AliasStats('ps', runs=0, gets=1, failures=0),
+    ]
+
+
+@pytest.mark.unit
+def test_bump_decays_previous_score_before_adding_use():
+    scores = {}
+    bump(scores, [HistoryEntry(0, 'ls', HistoryAction.run), HistoryEntry(FRECENCY_HALF_LIFE, 'ls', HistoryAction.get)])
+    assert scores == {'ls': (1.5, FRECENCY_HALF_LIFE)}
+    assert decay(*scores['ls'], now=2 * FRECENCY_HALF_LIFE) == 0.75
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Iterator
+
+import pytest
+
+import snips.domain as dm
+
+
+def _snippets() -> Iterator[dm.Snippet]:
+    for alias, day in [('c', 3), ('a', None), ('d', 1), ('b', 2)]:
+        yield dm.Snippet(alias, 'cmd', 'desc', created_at=datetime(2022, 1, day) if day else None)
+
+
+@pytest.mark.unit
+class TestPaginate:
+
+    @pytest.mark.parametrize(
+        'offset, limit, expected', [
+            (0, None, ['c', 'a', 'd', 'b']),
+            (0, 2, ['c', 'a']),
+            (1, 2, ['a', 'd']),
+            (3, 5, ['b']),
+            (4, 1, []),
+        ]
+    )
+    def test_without_sort_keeps_order(self, offset, limit, expected):
+        assert [s.alias for s in dm.paginate(_snippets(), offset, limit)] == expected
+
+    def test_without_sort_stops_consuming_when_page_is_filled(self):
+        source = _snippets()
+        assert [s.alias for s in dm.paginate(source, 0, 1)] == ['c']
+        assert next(source).alias == 'a'
+
+    @pytest.mark.parametrize(
+        'sort, reverse, offset, limit, expected', [
+            (dm.SortKey.alias, False, 0, None, ['a', 'b', 'c', 'd']),
+            (dm.SortKey.alias, True, 0, 2, ['d', 'c']),
+            (dm.SortKey.alias, False, 1, 2, ['b', 'c']),
+            (dm.SortKey.created, False, 0, None, ['d', 'b', 'c', 'a']),
+            (dm.SortKey.created, True, 0, 3, ['c', 'b', 'd']),
+        ]
+    )
+    def test_with_sort(self, sort, reverse, offset, limit, expected):
+        assert [s.alias for s in dm.paginate(_snippets(), offset, limit, sort, reverse)] == expected
+
+    @pytest.mark.parametrize(
+        'reverse, limit, expected', [
+            (False, None, ['b', 'd', 'c', 'a']),
+            (False, 2, ['b', 'd']),
+            (True, 1, ['c']),
+        ]
+    )
+    def test_with_sort_by_frecency_most_frecent_first(self, reverse, limit, expected):
+        scores = {'b': 3.0, 'd': 1.5, 'a': 0.0}
+        result = dm.paginate(_snippets(), 0, limit, dm.SortKey.frecency, reverse, scores)
+        assert [s.alias for s in result] == expected
@@ -0,0 +1,36 @@
+import pytest
+
+from snips.domain import Snippet
+from snips.domain.search import tokenize, snippet_terms, trigrams, edit_distance
+
+
+@pytest.mark.unit
+def test_tokenize_lowercases_and_splits_on_non_word_chars():
+    assert tokenize('Docker-PS --all') == ['docker', 'ps', 'all']
+    assert tokenize(None) == []
+
+
+@pytest.mark.unit
+def test_snippet_terms_skip_argument_tags_and_boost_alias():
+    terms = snippet_terms(Snippet('ls', 'ls <@arg>directory</@arg>', 'list', ['bash']))
+    assert 'arg' not in terms
+    assert terms.count('ls') > terms.count('list')
+    assert {'directory', 'bash'} <= set(terms)
+
+
+@pytest.mark.unit
+def test_trigrams_are_padded_to_weigh_alias_start():
+    assert {'  d', ' do', 'doc'} <= trigrams('doc')
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'a, b, expected', [
+        ('docker-ps', 'docker-ps', 0),
+        ('dokcer-ps', 'docker-ps', 1),
+        ('docker-p', 'docker-ps', 1),
+        ('', 'git', 3),
+    ]
+)
+def test_edit_distance_counts_transposition_as_single_edit(a, b, expected):
+    assert edit_distance(a, b) == expected
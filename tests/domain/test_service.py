@@ -1,7 +1,7 @@
 import pytest
 import snips.domain.exceptions as ex
-from snips.domain import SnippetDto
-from snips.domain.service import SnippetService
+from snips.domain import SnippetDto, Snippet
+from snips.domain.service import SnippetService, ConflictPolicy
 from snips.infrastructure.repository.tinydb_repository import TinyDbSnippetRepository
 from unittest.mock import patch, MagicMock
 
@@ -38,4 +38,184 @@ class TestSnippetService:
             service.create(request, True)
 
 
+    def _requests(self, *aliases: str):
+        return [SnippetDto(alias=alias, snippet='blabla', desc='description') for alias in aliases]
+
+    def test_create_and_update_store_arguments_with_snippet(self):
+        repository = MagicMock()
+        repository.exists.return_value = False
+        repository.save.side_effect = lambda snippet: snippet
+        service = SnippetService(repository)
+
+        created = service.create(SnippetDto(alias='find', snippet="find <@arg>dir</@arg> -name '*.<@arg>ext</@arg>'"))
+        assert created.arguments == ['dir', 'ext']
+
+        repository.get_by_id.return_value = created
+        updated = service.update(SnippetDto(alias='find', snippet='find <@arg>dir</@arg>'))
+        assert updated.arguments == ['dir']
+
+    def test_create_many_should_raise_exception_listing_all_existing_aliases(self):
+        repository = MagicMock()
+        repository.exists.side_effect = lambda alias: alias in {'test1', 'test3'}
+        service = SnippetService(repository)
+
+        with pytest.raises(ex.AliasAlreadyExists) as e:
+            service.create_many(self._requests('test1', 'test2', 'test3'))
+        assert 'test1, test3' in str(e.value)
+        repository.save_many.assert_not_called()
+
+    def test_create_many_should_raise_exception_on_duplicated_alias_in_batch(self):
+        repository = MagicMock()
+        repository.exists.return_value = False
+        service = SnippetService(repository)
+
+        with pytest.raises(ex.AliasAlreadyExists):
+            service.create_many(self._requests('test1', 'test1'))
+
+    def test_create_many_with_overwrite_saves_in_single_batch(self):
+        repository = MagicMock()
+        service = SnippetService(repository)
+
+        service.create_many(self._requests('test1', 'test2'), on_conflict=ConflictPolicy.overwrite)
+        repository.exists.assert_not_called()
+        repository.save_many.assert_called_once()
+
+    def test_create_many_with_skip_saves_only_new_aliases(self):
+        repository = MagicMock()
+        repository.exists.side_effect = lambda alias: alias == 'test1'
+        repository.save_many.side_effect = list
+        service = SnippetService(repository)
+
+        result = service.create_many(self._requests('test1', 'test2', 'test2'), on_conflict=ConflictPolicy.skip)
+        assert [s.alias for s in result] == ['test2']
+
+    def test_create_and_delete_keep_search_index_in_sync(self):
+        repository = MagicMock()
+        repository.exists.return_value = False
+        repository.save.side_effect = lambda snippet: snippet
+        search_index = MagicMock()
+        service = SnippetService(repository, search_index)
+
+        created = service.create(self._requests('test1')[0])
+        search_index.index_many.assert_called_once_with([created])
+
+        service.delete_by_id('test1')
+        repository.delete_by_id.assert_called_once_with('test1')
+        search_index.remove.assert_called_once_with('test1')
+
+    def test_update_with_changed_alias_removes_previous_alias_from_index(self):
+        repository = MagicMock()
+        repository.get_by_id.return_value = self._requests('test1')[0].to_entity()
+        repository.save.side_effect = lambda snippet: snippet
+        search_index = MagicMock()
+        service = SnippetService(repository, search_index)
+
+        service.update(self._requests('test2')[0], alias='test1')
+        search_index.remove.assert_called_once_with('test1')
+        assert search_index.index_many.call_args[0][0][0].alias == 'test2'
+
+    def test_search_builds_index_and_skips_stale_aliases(self):
+        def get_by_id(alias):
+            if alias != 'test1':
+                raise ex.SnippetNotFound.with_message(alias)
+            return 'snippet'
+
+        repository = MagicMock()
+        repository.get_by_id.side_effect = get_by_id
+        repository.exists.side_effect = lambda alias: alias in {'docker-ps', 'docker-rm'}
+        search_index = MagicMock()
+        search_index.is_built.return_value = False
+        search_index.search.return_value = [('test2', 2.0), ('test1', 1.0)]
+        service = SnippetService(repository, search_index)
+
+        assert service.search('query') == ['snippet']
+        search_index.index_many.assert_called_once()
+        search_index.mark_built.assert_called_once()
+        search_index.remove.assert_called_once_with('test2')
+
+    def _service_with_suggestions(self, *suggestions):
+        def get_by_id(alias):
+            if alias not in {'docker-ps', 'docker-rm'}:
+                raise ex.SnippetNotFound.with_message(alias)
+            return self._requests(alias)[0].to_entity()
+
+        repository = MagicMock()
+        repository.get_by_id.side_effect = get_by_id
+        repository.exists.side_effect = lambda alias: alias in {'docker-ps', 'docker-rm'}
+        alias_index = MagicMock()
+        alias_index.is_built.return_value = True
+        alias_index.suggest.return_value = list(suggestions)
+        return SnippetService(repository, alias_index=alias_index)
+
+    def test_resolve_with_autocorrect_picks_single_closest_alias(self):
+        service = self._service_with_suggestions(('docker-ps', 1), ('docker-rm', 2))
+        assert service.resolve('dokcer-ps', autocorrect=True).alias == 'docker-ps'
+
+    @pytest.mark.parametrize(
+        'autocorrect, suggestions', [
+            (False, [('docker-ps', 1)]),
+            (True, [('docker-ps', 1), ('docker-rm', 1)]),
+        ]
+    )
+    def test_resolve_raises_with_suggestions_when_match_is_not_confident(self, autocorrect, suggestions):
+        service = self._service_with_suggestions(*suggestions)
+        with pytest.raises(ex.SnippetNotFound) as e:
+            service.resolve('docker-xx', autocorrect=autocorrect)
+        assert 'Did you mean: docker-ps' in str(e.value)
+
+    def test_resolve_skips_suggestions_removed_bypassing_service(self):
+        service = self._service_with_suggestions(('docker-xs', 1), ('docker-ps', 2))
+        assert service.resolve('docker-xx', autocorrect=True).alias == 'docker-ps'
+        service.alias_index.remove.assert_called_once_with('docker-xs')
+
+    def test_resolve_builds_index_holding_only_aliases_added_one_by_one(self):
+        service = self._service_with_suggestions(('docker-ps', 1))
+        service.alias_index.is_built.return_value = False
+        service.repository.iter_all.return_value = self._requests('docker-ps', 'docker-rm')
+
+        with pytest.raises(ex.SnippetNotFound):
+            service.resolve('dokcer-ps')
+        assert [alias for alias in service.alias_index.add_many.call_args[0][0]] == ['docker-ps', 'docker-rm']
+        service.alias_index.mark_built.assert_called_once()
+
+    def _service_with_snippets(self, *snippets: Snippet) -> SnippetService:
+        by_alias = {snp.alias: snp for snp in snippets}
+        repository = MagicMock()
+        repository.get_by_id.side_effect = lambda alias: by_alias[alias]
+        return SnippetService(repository)
+
+    def test_expand_replaces_includes_once_per_alias_and_merges_defaults(self):
+        service = self._service_with_snippets(
+            Snippet('auth', '--token <@arg>token</@arg>', '', defaults={'token': 'abc', 'ns': 'dev'}),
+            Snippet('get', 'kubectl get <@include>auth</@include>', ''),
+            Snippet('logs', 'kubectl logs <@include>auth</@include>', ''),
+        )
+        result = service.expand(Snippet(
+            'both', '<@include>get</@include> && <@include>logs</@include> -n <@arg>ns</@arg>', '',
+            defaults={'ns': 'prod'}
+        ))
+        assert result.snippet == 'kubectl get --token <@arg>token</@arg> && kubectl logs --token <@arg>token</@arg>' \
+                                 ' -n <@arg>ns</@arg>'
+        assert result.defaults == {'token': 'abc', 'ns': 'prod'}
+        assert result.parse_command() == 'kubectl get --token abc && kubectl logs --token abc -n prod'
+        assert [c.args[0] for c in service.repository.get_by_id.call_args_list] == ['get', 'auth', 'logs']
+
+    def test_missing_arguments_include_arguments_of_included_snippets(self):
+        service = self._service_with_snippets(
+            Snippet('auth', '--token <@arg>token</@arg> --ns <@arg>ns</@arg>', '', defaults={'ns': 'default'}),
+            Snippet('pods', 'kubectl get pods <@include>auth</@include>', ''),
+            Snippet('cycle', 'kubectl <@include>cycle</@include> <@arg>verb</@arg>', ''),
+        )
+        assert service.missing_arguments(service.repository.get_by_id('pods')) == {'token'}
+        assert service.missing_arguments(service.repository.get_by_id('cycle')) == {'verb'}
+
+    def test_expand_raises_on_include_cycle(self):
+        service = self._service_with_snippets(
+            Snippet('a', 'x <@include>b</@include>', ''),
+            Snippet('b', 'y <@include>a</@include>', ''),
+        )
+        with pytest.raises(ex.IncludeCycle) as e:
+            service.expand(Snippet('a', 'x <@include>b</@include>', ''))
+        assert 'a -> b -> a' in str(e.value)
+
     def test_update(self): ...
\ No newline at end of file
@@ -24,6 +24,13 @@ class TestArgumentTagProcessor:
         print(result)
         assert result == "find {dir} -name '*.{ext}'"
 
+    def test_compile_splits_snippet_into_segments_once(self):
+        template = self.sut.compile("find <@arg>dir</@arg> -name '*.<@ARG>x</@arg>' <@arg> dir </@arg>")
+        assert template.literals == ('find ', " -name '*.<@ARG>x</@arg>' ", '')
+        assert template.arguments == ('dir', 'dir')
+        assert template.names == ('dir',)
+        assert self.sut.compile("find <@arg>dir</@arg> -name '*.<@ARG>x</@arg>' <@arg> dir </@arg>") is template
+
 
 @pytest.mark.unit
 class TestSnippet:
@@ -87,6 +94,16 @@ class TestSnippet:
         snippet.defaults = None
         with pytest.raises(KeyError):
             snippet.parse_command(dict(filename='external-value'))
+
+    def test_get_arguments_prefers_stored_arguments(self):
+        snippet = self._example()
+        snippet.arguments = ['filename']
+        assert snippet.get_arguments() == {'filename'}
+
+    def test_parse_command_keeps_literal_braces(self):
+        snippet = dm.Snippet('awk', "awk '{print $<@arg>column</@arg>}' | jq '{a: .b}'", 'print column')
+        assert snippet.parse_command(dict(column=2)) == "awk '{print $2}' | jq '{a: .b}'"
+
     def test_all_argumenents_have_defaults(self):
         snippet = self._example()
 
@@ -129,3 +146,39 @@ class TestCreateSnippetDto:
             tags=['python   ', ' bash', '', '']
         )
         assert set(request.tags) == {'python', 'bash'}
+
+
+@pytest.mark.unit
+class TestValidateManySnippetDto:
+    _RECORDS = [
+        {'alias': 'a', 'snippet': 'ls', 'desc': None, 'tags': ['python   ', ' bash', ''], 'created_at': 'x'},
+        {'alias': 'alias with white char', 'snippet': 'ls'},
+        {'alias': 'b', 'snippet': ' '},
+        {'alias': 'c', 'snippet': 'ls', 'defaults': {'dir': '.'}, 'cache_ttl': 60},
+        {'alias': 5, 'snippet': 'ls', 'tags': ('sql',)},
+        {'alias': 'd', 'snippet': 'ls', 'cache_ttl': -1},
+        {'snippet': 'ls'},
+    ]
+
+    def test_matches_model_validation(self):
+        dtos, errors = dm.SnippetDto.validate_many(self._RECORDS)
+
+        expected_dtos, expected_errors = [], []
+        for index, record in enumerate(self._RECORDS):
+            try:
+                expected_dtos.append(dm.SnippetDto(**record))
+            except ValidationError as e:
+                expected_errors.append((index, str(e)))
+        assert [dto.dict() for dto in dtos] == [dto.dict() for dto in expected_dtos]
+        assert errors == expected_errors
+        assert [index for index, _ in errors] == [1, 2, 5, 6]
+
+    def test_well_formed_records_skip_model_validation(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError('model validated')
+
+        monkeypatch.setattr(dm.SnippetDto, '__init__', fail)
+        dtos, errors = dm.SnippetDto.validate_many([self._RECORDS[0], self._RECORDS[3]])
+        assert errors == []
+        assert dtos[0].tags == ['python', 'bash']
+        assert dtos[1].to_entity().cache_ttl == 60
@@ -7,6 +7,7 @@ from typer.testing import CliRunner
 from snips.entrypoints.cli.cli import app, LongArgs, ShortArgs
 import pytest
 import snips.domain as dm
+import snips.domain.exceptions as ex
 import snips.settings as settings
 import pyperclip
 import ast
@@ -105,6 +106,25 @@ class TestCli:
         expected = self.snippet1.dict()
         assert _clear_dates(response) == _clear_dates(expected)
 
+    def test_cli_show_should_autocorrect_mistyped_alias(self):
+        result = runner.invoke(app, ['show', 'tset1'])
+        assert result.exit_code == 0
+        assert "using 'test1'" in result.stderr
+        assert json.loads(result.stdout)['alias'] == 'test1'
+
+    def test_cli_run_should_suggest_similar_aliases_for_mistyped_alias(self):
+        result = runner.invoke(app, ['run', 'tset1'])
+        assert isinstance(result.exception, ex.SnippetNotFound)
+        assert 'Did you mean: test1' in str(result.exception)
+
+    def test_cli_run_should_suggest_aliases_of_whole_library_after_snippet_was_added(self):
+        app.ioc.alias_index.clear()
+        app.repository.save(dm.SnippetDto(alias='docker-ps', snippet='docker ps', desc='').to_entity())
+        app.service.create(dm.SnippetDto(alias='git-log', snippet='git log', desc=''))
+
+        result = runner.invoke(app, ['run', 'dokcer-ps'])
+        assert 'Did you mean: docker-ps' in str(result.exception)
+
     def test_cli_ls_should_print_all_snippets(self):
         result = runner.invoke(app, ['ls'])
         assert result.exit_code == 0
@@ -118,6 +138,107 @@ class TestCli:
         response = json.loads(_format_to_valid_collection(result.stdout))
         assert _clear_dates(*response) == _clear_dates(self.snippet2.dict())
 
+    @pytest.mark.parametrize(
+        'options, expected', [
+            (['--limit', '1'], ['test1']),
+            (['--offset', '1'], ['test2']),
+            (['--sort', 'alias', '--reverse'], ['test2', 'test1']),
+            (['--sort', 'alias', '--reverse', '--limit', '1', '--offset', '1'], ['test1']),
+        ]
+    )
+    def test_cli_ls_with_pagination(self, options, expected):
+        result = runner.invoke(app, ['ls', *options])
+        assert result.exit_code == 0
+        response = json.loads(_format_to_valid_collection(result.stdout))
+        assert [r['alias'] for r in response] == expected
+
+    def test_cli_ls_needs_args_should_skip_snippets_with_all_defaults(self):
+        result = runner.invoke(app, ['ls', '--needs-args'])
+        assert result.exit_code == 0
+        response = json.loads(_format_to_valid_collection(result.stdout))
+        assert [r['alias'] for r in response] == ['test2']
+
+    def test_cli_ls_needs_args_should_check_arguments_of_included_snippets(self):
+        app.service.create(dm.SnippetDto(alias='test3', snippet='cd <@include>test2</@include>'))
+        app.service.create(dm.SnippetDto(alias='test4', snippet='cd <@include>test1</@include>'))
+        result = runner.invoke(app, ['ls', '--needs-args'])
+        response = json.loads(_format_to_valid_collection(result.stdout))
+        assert [r['alias'] for r in response] == ['test2', 'test3']
+
+    def test_cli_run_with_matrix_should_fail_when_any_command_fails(self):
+        result = runner.invoke(app, ['run', 'test2', '--matrix', 'directory=/,/nonexistent-directory'])
+        assert result.exit_code != 0
+
+    def test_cli_run_should_return_exit_status_of_failed_snippet(self):
+        app.service.create(dm.SnippetDto(alias='test3', snippet='true'))
+        app.service.create(dm.SnippetDto(alias='test4', snippet='exit 3'))
+        result = runner.invoke(app, ['run', 'test3', 'test4', '--parallel', '2'])
+        assert result.exit_code == 3
+
+    def test_cli_run_should_expand_included_snippets(self):
+        app.service.create(dm.SnippetDto(alias='test3', snippet='exit <@arg>code</@arg>', defaults={'code': '4'}))
+        app.service.create(dm.SnippetDto(alias='test4', snippet='true && <@include>test3</@include>'))
+        result = runner.invoke(app, ['run', 'test4'])
+        assert result.exit_code == 4
+
+    def test_cli_flow_should_pass_step_output_and_fail_with_failed_step(self):
+        app.service.create(dm.SnippetDto(alias='test3', snippet='echo <@arg>code</@arg>'))
+        app.service.create(dm.SnippetDto(alias='test4', snippet='exit <@arg>code</@arg>'))
+        app.service.create(dm.SnippetDto(alias='deploy', snippet='first: test3 code=5\nsecond: test4 code=@{first}'))
+        result = runner.invoke(app, ['flow', 'deploy'])
+        assert result.exit_code == 5
+        assert '[first]  5' in result.stdout
+
+    def test_cli_run_should_replay_cached_output_until_refreshed(self, tmp_path):
+        from snips.infrastructure.history import BinaryHistory
+
+        app.ioc.history = BinaryHistory(str(tmp_path / 'history.bin'), str(tmp_path / 'frecency.json'))
+        log = tmp_path / 'log'
+        runner.invoke(app, ['add', '-a', 'test3', '-s', f'echo run >> {log}', '--cache-ttl', '60'])
+        app.ioc.output_cache.clear()
+        for argv in (['run', 'test3'], ['run', 'test3'], ['run', 'test3', '--refresh'], ['run', 'test3', '--no-cache']):
+            assert runner.invoke(app, argv).exit_code == 0
+        assert log.read_text() == 'run\n' * 3
+
+        result = runner.invoke(app, ['cache', 'stats'])
+        assert 'hits: 1' in result.stdout and 'misses: 1' in result.stdout
+        # replayed output is not a run of the command
+        assert runner.invoke(app, ['stats', 'test3']).stdout.splitlines()[1].split()[:3] == ['test3', '3', '1']
+
+    def test_cli_stats_should_show_recorded_runs_and_ls_sort_by_frecency(self, tmp_path):
+        from snips.infrastructure.history import BinaryHistory
+
+        app.ioc.history = BinaryHistory(str(tmp_path / 'history.bin'), str(tmp_path / 'frecency.json'))
+        app.service.create(dm.SnippetDto(alias='test3', snippet='true'))
+        for _ in range(2):
+            assert runner.invoke(app, ['run', 'test3']).exit_code == 0
+
+        result = runner.invoke(app, ['stats', 'test3'])
+        assert result.exit_code == 0
+        [header, row] = result.stdout.splitlines()
+        assert header.split() == ['alias', 'runs', 'cached', 'gets', 'failed', 'p50', 'p95', 'p99']
+        assert row.split()[:5] == ['test3', '2', '0', '0', '0']
+
+        result = runner.invoke(app, ['ls', '--sort', 'frecency', '--limit', '1'])
+        assert json.loads(result.stdout)['alias'] == 'test3'
+
+    def test_cli_search_should_print_matching_snippets(self):
+        app.service.create(dm.SnippetDto(alias='test3', snippet='docker ps', desc='list containers'))
+
+        result = runner.invoke(app, ['search', 'containers'])
+        assert result.exit_code == 0
+        response = json.loads(_format_to_valid_collection(result.stdout))
+        assert [r['alias'] for r in response] == ['test3']
+
+    def test_cli_search_should_index_whole_library_after_snippet_was_added(self):
+        app.ioc.search_index.clear()
+        app.repository.save(dm.SnippetDto(alias='test3', snippet='docker ps', desc='list containers').to_entity())
+        app.service.create(dm.SnippetDto(alias='test4', snippet='docker rm', desc='remove containers'))
+
+        result = runner.invoke(app, ['search', 'containers'])
+        response = json.loads(_format_to_valid_collection(result.stdout))
+        assert {r['alias'] for r in response} == {'test3', 'test4'}
+
     def test_cli_get_should_copy_snippet_to_clipboard_with_defaults_and(self):
         result = runner.invoke(app, ['get', 'test1'])
         print(result.stdout)
@@ -219,3 +340,59 @@ class TestCli:
     def test_run_with_provided_arg(self):
         result = runner.invoke(app, ['run', 'test1', '--args', 'directory=.'])
         assert result.exit_code == 0
+
+    def test_cli_export_should_print_snippets_as_json_lines(self):
+        result = runner.invoke(app, ['export'])
+        assert result.exit_code == 0
+        response = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [r['alias'] for r in response] == ['test1', 'test2']
+        assert response[0]['defaults'] == self.snippet1.defaults
+
+    def test_cli_import_should_restore_exported_snippets(self):
+        exported = runner.invoke(app, ['export']).stdout
+        app.repository.remove_all()
+
+        result = runner.invoke(app, ['import', '--batch-size', '1'], input=exported)
+        assert result.exit_code == 0
+        assert app.repository.get_by_id('test1').snippet == self.snippet1.snippet
+        assert app.repository.get_by_id('test2').tags == self.snippet2.tags
+
+    @pytest.mark.parametrize(
+        'policy, exit_code, expected_snippet', [
+            ('fail', 1, 'ls <@arg>directory</@arg>'),
+            ('skip', 0, 'ls <@arg>directory</@arg>'),
+            ('overwrite', 0, 'imported'),
+        ]
+    )
+    def test_cli_import_conflict_policies(self, policy, exit_code, expected_snippet):
+        records = '\n'.join([
+            json.dumps({'alias': 'test1', 'snippet': 'imported', 'desc': 'imported'}),
+            json.dumps({'alias': 'test3', 'snippet': 'imported', 'desc': 'imported'}),
+        ])
+        result = runner.invoke(app, ['import', '--on-conflict', policy], input=records)
+        assert result.exit_code == exit_code
+        assert app.repository.get_by_id('test1').snippet == expected_snippet
+        assert app.repository.exists('test3') == (policy != 'fail')
+
+    def test_cli_import_should_report_conflict_in_later_batch(self):
+        records = '\n'.join([
+            json.dumps({'alias': 'test3', 'snippet': 'imported', 'desc': 'imported'}),
+            json.dumps({'alias': 'test1', 'snippet': 'imported', 'desc': 'imported'}),
+            json.dumps({'alias': 'test4', 'snippet': 'imported', 'desc': 'imported'}),
+        ])
+        result = runner.invoke(app, ['import', '--batch-size', '1'], input=records)
+        assert result.exit_code == 1
+        assert 'Imported 1 snippets' in result.stdout
+        assert 'test1 already exists' in result.stderr
+        assert app.repository.exists('test3')
+        assert not app.repository.exists('test4')
+
+    def test_cli_import_should_skip_invalid_records_and_exit_with_error(self):
+        records = '\n'.join([
+            json.dumps({'alias': 'with white chars', 'snippet': 'x', 'desc': ''}),
+            'not json',
+            json.dumps({'alias': 'test3', 'snippet': 'imported', 'desc': 'imported'}),
+        ])
+        result = runner.invoke(app, ['import'], input=records)
+        assert result.exit_code == 1
+        assert app.repository.exists('test3')
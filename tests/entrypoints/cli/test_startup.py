@@ -0,0 +1,46 @@
+import os
+import re
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+import snips.settings as settings
+
+_IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)\s*$')
+# modules and backends loaded on demand; asserting on import set instead of timing keeps the test reliable
+# and still fails as soon as any of them is imported eagerly
+_HEAVY_MODULES = {
+    'yaml', 'tinydb', 'sqlite3', 'pyperclip', 'rich.table', 'rich.prompt', 'asyncio', 'mmap', 'socketserver',
+    'snips.infrastructure.repository.tinydb_repository', 'snips.infrastructure.repository.sqlite_repository',
+    'snips.infrastructure.repository.binary_repository', 'snips.infrastructure.search_index',
+    'snips.infrastructure.output_cache', 'snips.infrastructure.history', 'snips.infrastructure.runner',
+}
+
+
+def _imports(*argv: str) -> Dict[str, int]:
+    """Runs snp command in fresh interpreter, returns imported modules with their own import time in us"""
+    env = {key: value for key, value in os.environ.items() if key not in settings.ConfigEnum.list()}
+    env.update(SNIPS_SOCKET=os.devnull, DB_PROVIDER='json', FORMAT='json')
+    code = f'import sys; sys.argv = ["snp", *{list(argv)!r}]; from snips.app import main; main()'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = {}
+    for line in result.stderr.splitlines():
+        if match := _IMPORT_TIME.match(line):
+            imports[match.group(2)] = int(match.group(1))
+    return imports
+
+
+@pytest.mark.e2e
+@pytest.mark.parametrize(
+    'argv, allowed', [
+        (['config', 'path'], set()),
+        (['ls'], {'tinydb', 'snips.infrastructure.repository.tinydb_repository'}),
+    ]
+)
+def test_command_imports_only_what_it_uses(argv, allowed):
+    imports = _imports(*argv)
+    assert 'snips.entrypoints.cli.cli' in imports
+    assert (_HEAVY_MODULES - allowed) & imports.keys() == set()
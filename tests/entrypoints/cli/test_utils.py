@@ -75,3 +75,56 @@ def test_prepare_command_with_args():
         mocked_ask.side_effect = ['directory', 'extension']
         result  = utils.prepare_command_with_args(snp)
     assert result == "find directory -name '*.extension'"
+
+
+@pytest.mark.unit
+def test_chunked_splits_into_batches_of_given_size():
+    assert list(utils.chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.unit
+def test_read_jsonl_skips_blank_lines_and_keeps_line_numbers():
+    assert list(utils.read_jsonl(['{}\n', '\n', '{"a": 1}\n'])) == [(1, '{}\n'), (3, '{"a": 1}\n')]
+
+
+@pytest.mark.unit
+def test_validate_records_returns_dtos_and_errors_by_line():
+    dtos, errors = utils.validate_records([
+        (1, '{"alias": "a", "snippet": "ls", "desc": null, "tags": [" bash "]}'),
+        (2, '{"alias": "a b", "snippet": "ls"}'),
+        (3, '[1, 2]'),
+        (4, '{"alias": "c", '),
+    ])
+    assert [dto.alias for dto in dtos] == ['a']
+    assert dtos[0].tags == ['bash']
+    assert [line_no for line_no, _ in errors] == [2, 3, 4]
+
+
+@pytest.mark.unit
+def test_expand_matrix_builds_cartesian_product():
+    result = utils.expand_matrix(['ns=dev,prod', 'pod=a,b'])
+    assert result == [{'ns': 'dev', 'pod': 'a'}, {'ns': 'dev', 'pod': 'b'},
+                      {'ns': 'prod', 'pod': 'a'}, {'ns': 'prod', 'pod': 'b'}]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('name, content', [
+    ('rows.csv', 'dir,ext\n/tmp,py\n/home,txt\n'),
+    ('rows.jsonl', '{"dir": "/tmp", "ext": "py"}\n\n{"dir": "/home", "ext": "txt"}\n'),
+])
+def test_argument_rows_reads_csv_and_jsonl_combined_with_matrix(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    rows = utils.argument_rows(str(path), ['depth=1,2'])
+    assert rows[:2] == [{'dir': '/tmp', 'ext': 'py', 'depth': '1'}, {'dir': '/tmp', 'ext': 'py', 'depth': '2'}]
+    assert len(rows) == 4
+
+
+@pytest.mark.unit
+def test_prepare_commands_asks_once_for_arguments_missing_in_rows():
+    snp = Snippet('find', "find <@arg>dir</@arg> -name '*.<@arg>ext</@arg>'", 'find files')
+    with patch('rich.prompt.Prompt.ask') as mocked_ask:
+        mocked_ask.side_effect = ['py']
+        result = utils.prepare_commands(snp, [{'dir': '/tmp'}, {'dir': '/home', 'ext': 'txt'}])
+    assert result == ["find /tmp -name '*.py'", "find /home -name '*.txt'"]
+    mocked_ask.assert_called_once()
@@ -0,0 +1,107 @@
+import os
+import threading
+from tempfile import mkdtemp
+
+import pytest
+
+import snips.domain as dm
+from snips.entrypoints import daemon
+from snips.entrypoints.cli.cli import app
+
+
+@pytest.mark.e2e
+class TestSnipsDaemon:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.path = os.path.join(mkdtemp(), 'daemon.sock')
+        self.sut = daemon.SnipsDaemon(app, self.path)
+        app.repository.remove_all()
+        app.service.create(dm.SnippetDto(alias='test1', snippet='ls <@arg>directory</@arg>', tags=['bash']))
+        yield
+        app.repository.remove_all()
+
+    def _request(self, *argv: str, **kwargs) -> dict:
+        return {'argv': list(argv), 'cwd': os.getcwd(), 'environ': dict(os.environ), 'tty': False, 'columns': 120,
+                **kwargs}
+
+    @pytest.fixture
+    def serving(self):
+        thread = threading.Thread(target=self.sut.serve)
+        thread.start()
+        while not os.path.exists(self.path):
+            pass
+        yield
+        daemon.stop(self.path)
+        thread.join()
+
+    def test_execute_captures_output_and_exit_code(self):
+        result = self.sut.execute(self._request('show', 'test1', '--help'))
+        assert result['code'] == 0
+        assert 'Show snippet data' in result['stdout']
+
+    def test_execute_reports_error_with_exit_code(self):
+        result = self.sut.execute(self._request('show', 'missing'))
+        assert result['code'] == 1
+        assert 'SnippetNotFound' in result['stderr']
+
+    def test_execute_hands_back_interactive_commands(self):
+        assert self.sut.execute(self._request('run', 'test1')) == {'fallback': True}
+
+    def test_execute_hands_back_command_for_client_with_different_configuration(self):
+        request = self._request('ls', environ={'DB_URI': 'other-db.json'})
+        assert self.sut.execute(request) == {'fallback': True}
+
+    def test_execute_hands_back_command_for_client_without_configuration_set_for_daemon(self, monkeypatch):
+        request = self._request('ls')
+        monkeypatch.setenv('DB_URI', 'daemon-db.json')
+        assert self.sut.execute(request) == {'fallback': True}
+
+    @pytest.mark.parametrize('tty', [True, False])
+    def test_execute_formats_listing_for_client_terminal(self, tty, monkeypatch):
+        from snips.infrastructure.console_logger import TableConsoleLogger
+
+        monkeypatch.setattr(daemon.SnipsDaemon, '_console_logger', lambda sut: TableConsoleLogger(sut._theme))
+        app.service.create(dm.SnippetDto(alias='test2', snippet='echo ' + 'x' * 100))
+
+        from rich.text import Text
+
+        stdout = self.sut.execute(self._request('ls', tty=tty, columns=60))['stdout']
+        lines = Text.from_ansi(stdout).plain.splitlines()
+        if tty:
+            assert all(len(line) <= 60 for line in lines) and '…' in lines[-1]
+        else:
+            assert 'x' * 100 in lines[-1]
+
+    def test_execute_hands_back_export_streamed_by_client(self):
+        assert self.sut.execute(self._request('export')) == {'fallback': True}
+
+    def test_execute_hands_back_listing_that_would_be_paged(self):
+        app.service.create(dm.SnippetDto(alias='test2', snippet='pwd'))
+        assert self.sut.execute(self._request('ls', tty=True, lines=2)) == {'fallback': True}
+        assert self.sut.execute(self._request('ls', tty=True, lines=200))['code'] == 0
+
+    def test_execute_hands_back_output_exceeding_limit(self, monkeypatch):
+        monkeypatch.setattr(daemon, 'OUTPUT_LIMIT', 10)
+        assert self.sut.execute(self._request('ls')) == {'fallback': True}
+        assert self.sut.execute(self._request('rm', 'test1'))['code'] == 0
+
+    def test_execute_rebuilds_container_when_database_changes(self):
+        self.sut.execute(self._request('ls'))
+        repository = app.repository
+        self.sut.execute(self._request('ls'))
+        assert app.repository is repository
+
+        app.service.create(dm.SnippetDto(alias='test2', snippet='pwd'))
+        self.sut.execute(self._request('ls'))
+        assert app.repository is not repository
+
+    def test_forward_without_daemon_returns_none(self):
+        assert daemon.forward(['ls'], self.path) is None
+
+    def test_forward_skips_commands_not_served_by_daemon(self, serving):
+        assert daemon.forward(['run', 'test1'], self.path) is None
+
+    def test_forward_prints_daemon_output(self, serving, capsys):
+        assert daemon.forward(['show', 'missing'], self.path) == 1
+        assert "'missing' not found" in capsys.readouterr().err
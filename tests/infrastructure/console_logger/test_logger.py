@@ -1,3 +1,5 @@
+import sys
+
 import snips.infrastructure.console_logger as log
 import pytest
 
@@ -37,3 +39,95 @@ class TestTableConsoleLogger(ConsoleLoggerTestCase):
         self.sut = log.TableConsoleLogger(
             DEFAULT_THEME
         )
+
+
+class _UnpagedOutput:
+    """Terminal output never handed to pager"""
+
+    def __init__(self, height: int):
+        self.closed = False
+
+    def write(self, text: str) -> int:
+        return sys.stdout.write(text)
+
+    def flush(self) -> None:
+        sys.stdout.flush()
+
+    def isatty(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.unit
+class TestTableConsoleLoggerStreaming:
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        from rich.console import Console
+
+        self.sut = log.TableConsoleLogger(DEFAULT_THEME)
+        self.sut._console = Console(width=60)
+        self.sut._CHUNK_SIZE = 2
+
+    def _snippets(self, count: int):
+        return (Snippet(f'alias{n}', 'echo ' + 'x' * 100, 'description ' * 10) for n in range(count))
+
+    def test_rows_are_cut_to_terminal_width_with_single_header(self, capsys, monkeypatch):
+        from rich.console import Console
+
+        self.sut._console = Console(width=60, force_terminal=True, color_system=None)
+        monkeypatch.setattr(log, '_PagerOutput', _UnpagedOutput)
+        monkeypatch.setattr(sys.stdout, 'isatty', lambda: True)
+        self.sut.stream_snippets(self._snippets(5))
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 6
+        assert sum('snippet' in line for line in lines) == 1
+        assert all(len(line) <= 60 for line in lines)
+        assert all('…' in line for line in lines[1:])
+
+    def test_wide_rows_keep_whole_values(self, capsys):
+        self.sut.stream_snippets(self._snippets(3), wide=True)
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 4
+        assert all('x' * 100 in line for line in lines[1:])
+
+    def test_rows_not_going_to_terminal_keep_whole_values(self, capsys):
+        self.sut.stream_snippets(self._snippets(3))
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 4
+        assert all('x' * 100 in line and '…' not in line for line in lines[1:])
+
+    def test_terminal_output_captured_by_daemon_is_cut_but_not_paged(self, capsys, monkeypatch):
+        from rich.console import Console
+
+        # console of daemon's client terminal, stdout of daemon itself is not a terminal
+        self.sut._console = Console(width=60, force_terminal=True, color_system=None)
+        monkeypatch.setattr(log, '_PagerOutput', None)
+        self.sut.stream_snippets(self._snippets(3))
+        lines = capsys.readouterr().out.splitlines()
+        assert all(len(line) <= 60 and '…' in line for line in lines[1:])
+
+    def test_other_loggers_stream_as_log_snippets(self, capsys):
+        log.PoorConsoleLoger(DEFAULT_THEME).stream_snippets(self._snippets(2))
+        assert capsys.readouterr().out.count("'alias': ") == 2
+
+
+@pytest.mark.unit
+class TestPagerOutput:
+
+    def test_short_output_is_written_to_stdout(self, capsys):
+        output = log._PagerOutput(height=3)
+        output.write('one\ntwo\n')
+        output.close()
+        assert capsys.readouterr().out == 'one\ntwo\n'
+
+    def test_output_exceeding_screen_goes_through_pager(self, capsys, tmp_path, monkeypatch):
+        paged = tmp_path / 'paged'
+        monkeypatch.setenv('PAGER', f'cat > {paged}')
+        output = log._PagerOutput(height=3)
+        output.write('one\ntwo\n')
+        output.write('three\nfour\n')
+        output.close()
+        assert capsys.readouterr().out == ''
+        assert paged.read_text() == 'one\ntwo\nthree\nfour\n'
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from snips.domain.history import HistoryEntry, HistoryAction, FRECENCY_HALF_LIFE
+from snips.infrastructure.history import BinaryHistory
+
+
+@pytest.mark.unit
+class TestBinaryHistory:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, tmp_path):
+        self.path = str(tmp_path / 'snips-db-history.bin')
+        self.sut = BinaryHistory(self.path, str(tmp_path / 'snips-db-frecency.json'))
+
+    def test_appended_entries_are_read_back_in_order(self):
+        entries = [HistoryEntry(1.5, 'docker-ps', HistoryAction.run, 0.25, 3),
+                   HistoryEntry(2.0, 'zażółć', HistoryAction.get)]
+        self.sut.append(entries[:1])
+        self.sut.append(entries[1:])
+        assert list(self.sut.iter_entries()) == entries
+
+    def test_record_cut_off_at_end_of_log_is_skipped(self):
+        self.sut.append([HistoryEntry(1.0, 'a', HistoryAction.run), HistoryEntry(2.0, 'b', HistoryAction.run)])
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        assert [entry.alias for entry in self.sut.iter_entries()] == ['a']
+
+    @pytest.mark.parametrize('cut', [1, 5, 20])
+    def test_reading_resumes_after_record_cut_off_before_later_appends(self, cut):
+        self.sut.append([HistoryEntry(1.0, 'a', HistoryAction.run)])
+        self.sut.append([HistoryEntry(2.0, 'torn', HistoryAction.run)])
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - cut)
+        self.sut.append([HistoryEntry(3.0, 'b', HistoryAction.get), HistoryEntry(4.0, 'c', HistoryAction.run, 0.5, 2)])
+        assert list(self.sut.iter_entries()) == [
+            HistoryEntry(1.0, 'a', HistoryAction.run),
+            HistoryEntry(3.0, 'b', HistoryAction.get),
+            HistoryEntry(4.0, 'c', HistoryAction.run, 0.5, 2),
+        ]
+
+    def test_garbage_between_records_is_skipped(self):
+        self.sut.append([HistoryEntry(1.0, 'a', HistoryAction.run)])
+        with open(self.path, 'ab') as f:
+            f.write(b'\xff\xa7' + bytes(range(256)))
+        self.sut.append([HistoryEntry(2.0, 'b', HistoryAction.run)])
+        assert [entry.alias for entry in self.sut.iter_entries()] == ['a', 'b']
+
+    def test_missing_log_has_no_entries_and_scores(self):
+        assert list(self.sut.iter_entries()) == []
+        assert self.sut.frecency() == {}
+
+    def test_frecency_prefers_recent_uses(self):
+        self.sut.append([HistoryEntry(0.0, 'old', HistoryAction.run)] * 3)
+        self.sut.append([HistoryEntry(2 * FRECENCY_HALF_LIFE, 'new', HistoryAction.get)] * 2)
+        scores = self.sut.frecency(now=2 * FRECENCY_HALF_LIFE)
+        assert scores == {'old': 0.75, 'new': 2.0}
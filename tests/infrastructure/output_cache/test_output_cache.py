@@ -0,0 +1,58 @@
+import os
+import time
+from tempfile import gettempdir
+
+import pytest
+
+from snips.domain.cache import CachedOutput, CacheStats, cache_key
+from snips.infrastructure.output_cache import SqliteOutputCache
+
+
+@pytest.mark.unit
+class TestSqliteOutputCache:
+    _TEST_CACHE_URI = os.path.join(gettempdir(), 'snips-db-cache.sqlite3')
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.sut = SqliteOutputCache(self._TEST_CACHE_URI, max_size=10)
+        yield
+        self.sut.connection.close()
+        os.remove(self._TEST_CACHE_URI)
+
+    def test_get_returns_stored_output_and_counts_hits_and_misses(self):
+        self.sut.put('a', CachedOutput('out\n', 'err\n'), ttl=60)
+        assert self.sut.get('a') == CachedOutput('out\n', 'err\n')
+        assert self.sut.get('b') is None
+        assert self.sut.stats() == CacheStats(entries=1, size=8, hits=1, misses=1)
+
+    def test_expired_output_is_removed(self):
+        self.sut.put('a', CachedOutput('out', ''), ttl=0.05)
+        time.sleep(0.1)
+        assert self.sut.get('a') is None
+        assert self.sut.stats() == CacheStats(entries=0, size=0, hits=0, misses=1)
+
+    def test_least_recently_used_outputs_are_evicted_over_size_limit(self):
+        self.sut.put('a', CachedOutput('aaaa', ''), ttl=60)
+        self.sut.put('b', CachedOutput('bbbb', ''), ttl=60)
+        self.sut.get('a')
+        self.sut.put('c', CachedOutput('cccc', ''), ttl=60)
+        assert self.sut.get('b') is None
+        assert self.sut.get('a') is not None and self.sut.get('c') is not None
+        assert self.sut.stats().size == 8
+
+    def test_output_over_size_limit_is_not_stored(self):
+        self.sut.put('a', CachedOutput('a' * 11, ''), ttl=60)
+        assert self.sut.stats().entries == 0
+
+    def test_clear_removes_outputs_and_resets_counters(self):
+        self.sut.put('a', CachedOutput('out', ''), ttl=60)
+        self.sut.get('a')
+        self.sut.clear()
+        assert self.sut.stats() == CacheStats(0, 0, 0, 0)
+
+
+@pytest.mark.unit
+def test_cache_key_depends_on_command_and_directory():
+    assert cache_key('ls', '/tmp') == cache_key('ls', '/tmp')
+    assert cache_key('ls', '/tmp') != cache_key('ls', '/home')
+    assert cache_key('ls', '/tmp') != cache_key('ls -a', '/tmp')
@@ -0,0 +1,122 @@
+from typing import List
+
+import snips.infrastructure.repository.binary_repository as bin
+import snips.infrastructure.repository.tinydb_repository as tdb
+import snips.domain.snippet as snp
+import snips.domain.exceptions as ex
+import pytest
+import os
+from tempfile import gettempdir
+
+
+@pytest.mark.unit
+class TestBinaryRepository:
+    _TEST_DB_URI = os.path.join(gettempdir(), 'snips-db.bin')
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.sut = bin.BinarySnippetRepository(self._TEST_DB_URI)
+        yield
+        self.sut.close()
+        os.remove(self._TEST_DB_URI)
+
+    def _insert_random_snippet(self, id: str = 'drop db', tags: List[str] = None) -> snp.Snippet:
+        e = snp.Snippet(
+            alias=id,
+            snippet='DROP DATABASE',
+            desc='drops database',
+            tags=tags if tags else ['sql', 'db'],
+            defaults={'name': 'db'}
+        )
+        self.sut.save(e)
+        return e
+
+    def test_db_inits(self):
+        assert os.path.exists(self._TEST_DB_URI)
+        assert self.sut.get_all() == []
+
+    def test_saves_and_reads_all_fields(self):
+        e = self._insert_random_snippet()
+        reopened = bin.BinarySnippetRepository(self._TEST_DB_URI)
+        assert reopened.get_by_id(e.alias) == e
+        reopened.close()
+
+    def test_get_by_id_finds_each_alias(self):
+        aliases = ['k', 'b', 'zeta', 'a', 'ąę', 'm']
+        for alias in aliases:
+            self._insert_random_snippet(alias)
+
+        for alias in aliases:
+            assert self.sut.get_by_id(alias).alias == alias
+        assert [s.alias for s in self.sut.get_all()] == aliases
+
+    def test_should_throw_SnippetNotFound_when_snippet_doesnt_exist(self):
+        self._insert_random_snippet('a')
+        with pytest.raises(ex.SnippetNotFound):
+            self.sut.get_by_id('b')
+
+    def test_save_existing_alias_keeps_created_at(self):
+        created = self._insert_random_snippet()
+        updated = self.sut.save(snp.Snippet('drop db', 'DROP TABLE', 'drops table'))
+
+        assert len(self.sut.get_all()) == 1
+        assert updated.snippet == 'DROP TABLE'
+        assert updated.created_at == created.created_at
+
+    def test_delete_by_id_should_remove(self):
+        e = self._insert_random_snippet()
+        self.sut.delete_by_id(e.alias)
+        assert not self.sut.exists(e.alias)
+
+    def test_get_by_tags(self):
+        self._insert_random_snippet(tags=['sql', 'python'])
+        self._insert_random_snippet(id='bash-list', tags=['bash'])
+
+        assert len(self.sut.get_by_tags(['sql', 'bash'])) == 2
+        assert len(self.sut.get_by_tags(['sql', 'bash'], mode='all')) == 0
+        assert len(self.sut.get_by_tags(['sql'], mode='all')) == 1
+
+    def test_batch_rewrites_file_once_and_sees_pending_changes(self):
+        self._insert_random_snippet('a')
+        inode = os.stat(self._TEST_DB_URI).st_ino
+        with self.sut.batch():
+            self._insert_random_snippet('b')
+            self.sut.delete_by_id('a')
+            assert [s.alias for s in self.sut.get_all()] == ['b']
+            assert os.stat(self._TEST_DB_URI).st_ino == inode
+
+        assert [s.alias for s in bin.BinarySnippetRepository(self._TEST_DB_URI).get_all()] == ['b']
+
+    def test_remove_all(self):
+        self._insert_random_snippet('a')
+        self._insert_random_snippet('b')
+        self.sut.remove_all()
+        assert self.sut.get_all() == []
+
+    def test_convert_from_tinydb_preserves_snippets(self):
+        json_path = os.path.join(gettempdir(), 'snips-db-to-convert.json')
+        source = tdb.TinyDbSnippetRepository(json_path)
+        source.remove_all()
+        source.save(snp.Snippet('a', 'cmd a', 'desc', ['x'], {'k': 'v'}))
+        source.save(snp.Snippet('b', 'cmd b', 'desc'))
+
+        try:
+            assert bin.convert_from_tinydb(json_path, self._TEST_DB_URI) == 2
+            converted = bin.BinarySnippetRepository(self._TEST_DB_URI)
+            assert converted.get_all() == source.get_all()
+        finally:
+            os.remove(json_path)
+
+    def test_update_of_stale_snippet_raises_concurrent_modification(self):
+        self._insert_random_snippet('a')
+        stale = self.sut.get_by_id('a')
+        self.sut.save(self.sut.get_by_id('a'))
+
+        with pytest.raises(ex.ConcurrentModification):
+            self.sut.save(stale)
+
+    def test_changes_written_by_other_handle_are_visible(self):
+        other = bin.BinarySnippetRepository(self._TEST_DB_URI)
+        self._insert_random_snippet('a')
+        assert other.exists('a')
+        other.close()
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import json
+from tempfile import gettempdir
+
+import pytest
+
+import snips.domain.exceptions as ex
+import snips.domain.snippet as snp
+import snips.infrastructure.repository.tinydb_repository as tdb
+from snips.infrastructure.repository.locking import FileLock
+
+_TEST_DB_URI = os.path.join(gettempdir(), 'snips-db-concurrent.json')
+_WRITERS = 4
+_SNIPPETS_PER_WRITER = 15
+
+
+def _write_snippets(writer: int) -> None:
+    repository = tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+    for i in range(_SNIPPETS_PER_WRITER):
+        repository.save(snp.Snippet(f'writer{writer}-{i}', 'cmd', 'desc', [f'writer{writer}']))
+
+
+def _read_file_repeatedly(_) -> int:
+    reads = 0
+    for _ in range(50):
+        with open(_TEST_DB_URI) as f:
+            content = f.read()
+        if content:
+            json.loads(content)
+            reads += 1
+    return reads
+
+
+@pytest.fixture
+def clean_db():
+    for path in (_TEST_DB_URI, _TEST_DB_URI + '.lock'):
+        if os.path.exists(path):
+            os.remove(path)
+    yield
+    for path in (_TEST_DB_URI, _TEST_DB_URI + '.lock'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@pytest.mark.e2e
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires fork")
+def test_parallel_writers_do_not_lose_updates(clean_db):
+    tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+    context = multiprocessing.get_context('fork')
+    with context.Pool(_WRITERS * 2) as pool:
+        readers = pool.map_async(_read_file_repeatedly, range(_WRITERS))
+        pool.map(_write_snippets, range(_WRITERS))
+        readers.get()
+
+    repository = tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+    assert len(repository.get_all()) == _WRITERS * _SNIPPETS_PER_WRITER
+    for writer in range(_WRITERS):
+        assert len(repository.get_by_tags([f'writer{writer}'])) == _SNIPPETS_PER_WRITER
+
+
+@pytest.mark.unit
+def test_indexes_are_refreshed_after_change_by_other_handle(clean_db):
+    first = tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+    second = tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+
+    first.save(snp.Snippet('a', 'cmd', 'desc', ['x']))
+    assert second.exists('a')
+    assert second.get_by_tags(['x'])[0].alias == 'a'
+
+    second.save(snp.Snippet('b', 'cmd', 'desc'))
+    assert {s.alias for s in first.get_all()} == {'a', 'b'}
+
+
+@pytest.mark.unit
+def test_update_of_stale_snippet_raises_concurrent_modification(clean_db):
+    first = tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+    second = tdb.TinyDbSnippetRepository(_TEST_DB_URI)
+    first.save(snp.Snippet('a', 'cmd', 'desc'))
+
+    stale = second.get_by_id('a')
+    fresh = first.get_by_id('a')
+    fresh.snippet = 'fresh'
+    first.save(fresh)
+
+    stale.snippet = 'stale'
+    with pytest.raises(ex.ConcurrentModification):
+        second.save(stale)
+    assert first.get_by_id('a').snippet == 'fresh'
+
+
+@pytest.mark.unit
+def test_file_lock_is_reentrant_and_upgrades(clean_db):
+    lock = FileLock(_TEST_DB_URI)
+    with lock.shared():
+        with lock.exclusive():
+            with lock.shared():
+                pass
+        with lock.shared():
+            pass
+    assert lock._fd is None
@@ -0,0 +1,152 @@
+from typing import List
+
+import snips.infrastructure.repository.sqlite_repository as sql
+import snips.domain.snippet as snp
+import snips.domain.exceptions as ex
+import pytest
+import os
+from tempfile import gettempdir
+
+
+@pytest.mark.unit
+class TestSqliteRepository:
+    _TEST_DB_URI = os.path.join(gettempdir(), 'snips-db.sqlite3')
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.sut = sql.SqliteSnippetRepository(self._TEST_DB_URI)
+        yield
+        self.sut.connection.close()
+        os.remove(self._TEST_DB_URI)
+
+    def _insert_random_snippet(self, id: str = 'drop db', tags: List[str] = None) -> snp.Snippet:
+        e = snp.Snippet(
+            alias=id,
+            snippet='DROP DATABASE',
+            desc='drops database',
+            tags=tags if tags else ['sql', 'db']
+        )
+        self.sut.save(e)
+        return e
+
+    def test_db_inits(self):
+        assert os.path.exists(self._TEST_DB_URI)
+        assert self.sut.get_all() == []
+
+    def test_saves_and_reads_all_fields(self):
+        e = snp.Snippet(
+            alias='find',
+            snippet='find <@arg>dir</@arg>',
+            desc='find files',
+            tags=['bash', 'files'],
+            defaults={'dir': '.'}
+        )
+        self.sut.save(e)
+        result = self.sut.get_by_id('find')
+
+        assert result.snippet == e.snippet
+        assert result.desc == e.desc
+        assert result.tags == ['bash', 'files']
+        assert result.defaults == {'dir': '.'}
+        assert result.created_at and result.updated_at
+
+    def test_adds_new_columns_to_existing_database(self):
+        self.sut.connection.close()
+        os.remove(self._TEST_DB_URI)
+        connection = sql.sqlite3.connect(self._TEST_DB_URI)
+        connection.executescript(sql._SCHEMA.replace(',\n    arguments TEXT,\n    cache_ttl INTEGER', ''))
+        connection.execute("INSERT INTO snippets (alias, snippet) VALUES ('old', 'ls <@arg>dir</@arg>')")
+        connection.commit()
+        connection.close()
+
+        self.sut = sql.SqliteSnippetRepository(self._TEST_DB_URI)
+        assert self.sut.get_by_id('old').arguments is None
+        self.sut.save(snp.Snippet('new', 'ls <@arg>dir</@arg>', 'list', arguments=['dir'], cache_ttl=60))
+        assert self.sut.get_by_id('new').arguments == ['dir']
+        assert self.sut.get_by_id('new').cache_ttl == 60
+
+    def test_save_existing_alias_updates_and_keeps_created_at(self):
+        created = self.sut.save(snp.Snippet('alias', 'first', 'desc', ['a']))
+        updated = self.sut.save(snp.Snippet('alias', 'second', 'desc', ['b']))
+
+        assert len(self.sut.get_all()) == 1
+        assert updated.snippet == 'second'
+        assert updated.tags == ['b']
+        assert updated.created_at == created.created_at
+
+    def test_should_throw_SnippetNotFound_when_snippet_doesnt_exist(self):
+        with pytest.raises(ex.SnippetNotFound):
+            self.sut.get_by_id('drop database')
+
+    def test_exists(self):
+        self._insert_random_snippet()
+        assert self.sut.exists('drop db')
+        assert not self.sut.exists('create db')
+
+    def test_delete_by_id_should_remove(self):
+        e = self._insert_random_snippet()
+        self.sut.delete_by_id(e.alias)
+
+        with pytest.raises(ex.SnippetNotFound):
+            self.sut.get_by_id(e.alias)
+        assert self.sut.get_by_tags(['sql']) == []
+
+    def test_get_by_tags_with_matching_mode_any_matches_any_tag(self):
+        self._insert_random_snippet()
+        self._insert_random_snippet(id='bash-list', tags=['bash'])
+        self._insert_random_snippet(id='xxx', tags=['xxx'])
+
+        result = self.sut.get_by_tags(['sql', 'bash'])
+        assert [s.alias for s in result] == ['drop db', 'bash-list']
+
+    def test_get_by_tags_with_matching_mode_all_matches_only_when_snippet_inlcudes_all_tags(self):
+        self._insert_random_snippet(tags=['sql', 'python'])
+        self._insert_random_snippet(id='bash-list', tags=['bash'])
+
+        assert len(self.sut.get_by_tags(['sql', 'bash'], mode='all')) == 0
+        assert len(self.sut.get_by_tags(['sql'], mode='all')) == 1
+        assert len(self.sut.get_by_tags(['sql', 'python'], mode='all')) == 1
+
+    def test_remove_all(self):
+        self._insert_random_snippet()
+        self.sut.remove_all()
+        assert self.sut.get_all() == []
+
+    def test_batch_commits_once_on_exit(self):
+        with self.sut.batch():
+            self._insert_random_snippet('a')
+            self._insert_random_snippet('b')
+            assert self.sut.connection.in_transaction
+        assert not self.sut.connection.in_transaction
+        assert len(self.sut.get_all()) == 2
+
+    def test_batch_rolls_back_on_error(self):
+        self._insert_random_snippet('a')
+        with pytest.raises(RuntimeError):
+            with self.sut.batch():
+                self._insert_random_snippet('b')
+                self.sut.delete_by_id('a')
+                raise RuntimeError
+
+        assert [s.alias for s in self.sut.get_all()] == ['a']
+
+    def test_save_many_and_delete_many(self):
+        self.sut.save_many(snp.Snippet(alias, 'cmd', 'desc', ['tag']) for alias in ['a', 'b', 'c'])
+        self.sut.delete_many(['a', 'c'])
+
+        assert [s.alias for s in self.sut.get_by_tags(['tag'])] == ['b']
+
+    def test_iter_all_and_iter_by_tags(self):
+        self._insert_random_snippet('a', tags=['sql'])
+        self._insert_random_snippet('b', tags=['bash'])
+
+        assert [s.alias for s in self.sut.iter_all()] == ['a', 'b']
+        assert [s.alias for s in self.sut.iter_by_tags(['bash'])] == ['b']
+
+    def test_update_of_stale_snippet_raises_concurrent_modification(self):
+        self._insert_random_snippet('a')
+        stale = self.sut.get_by_id('a')
+        self.sut.save(self.sut.get_by_id('a'))
+
+        with pytest.raises(ex.ConcurrentModification):
+            self.sut.save(stale)
@@ -0,0 +1,116 @@
+import json
+import os
+from tempfile import gettempdir
+
+import pytest
+from tinydb import TinyDB
+
+import snips.domain.snippet as snp
+import snips.infrastructure.repository.storages as st
+import snips.infrastructure.repository.tinydb_repository as tdb
+
+
+def _read_records(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.unit
+class TestLogStorage:
+    _TEST_DB_URI = os.path.join(gettempdir(), 'snips-db.jsonl')
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        if os.path.exists(self._TEST_DB_URI):
+            os.remove(self._TEST_DB_URI)
+        self.sut = tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        yield
+        os.remove(self._TEST_DB_URI)
+
+    def _snippet(self, alias: str, snippet: str = 'DROP DATABASE') -> snp.Snippet:
+        return snp.Snippet(alias=alias, snippet=snippet, desc='drops database', tags=['sql'])
+
+    def test_write_appends_only_changed_documents(self):
+        self.sut.save(self._snippet('a'))
+        self.sut.save(self._snippet('b'))
+        self.sut.save(self._snippet('a', 'DROP TABLE'))
+        self.sut.delete_by_id('b')
+
+        records = _read_records(self._TEST_DB_URI)
+        assert [r['op'] for r in records] == ['put', 'put', 'put', 'del']
+        assert records[2]['doc']['snippet'] == 'DROP TABLE'
+
+    def test_state_is_rebuilt_by_replaying_log(self):
+        self.sut.save(self._snippet('a'))
+        self.sut.save(self._snippet('b'))
+        self.sut.save(self._snippet('a', 'DROP TABLE'))
+        self.sut.delete_by_id('b')
+
+        reopened = tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        assert [s.alias for s in reopened.get_all()] == ['a']
+        assert reopened.get_by_id('a').snippet == 'DROP TABLE'
+        assert reopened.get_by_id('a').created_at == self.sut.get_by_id('a').created_at
+
+    def test_records_appended_by_other_handle_are_visible(self):
+        other = tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        other.save(self._snippet('a'))
+
+        assert self.sut.table.get(doc_id=1)['alias'] == 'a'
+
+    def test_torn_append_is_truncated(self):
+        self.sut.save(self._snippet('a'))
+        with open(self._TEST_DB_URI, 'a') as f:
+            f.write('{"op": "put", "tab')
+
+        reopened = tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        reopened.save(self._snippet('b'))
+
+        assert [r['op'] for r in _read_records(self._TEST_DB_URI)] == ['put', 'put']
+        assert {s.alias for s in reopened.get_all()} == {'a', 'b'}
+
+    def test_json_database_is_refused_and_left_intact(self):
+        os.remove(self._TEST_DB_URI)
+        json_db = tdb.TinyDbSnippetRepository(self._TEST_DB_URI)
+        json_db.save(self._snippet('a'))
+        with open(self._TEST_DB_URI) as f:
+            content = f.read()
+
+        with pytest.raises(ValueError, match='convert-jsonl'):
+            tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        with open(self._TEST_DB_URI) as f:
+            assert f.read() == content
+
+    def test_json_database_is_converted_into_snapshot(self):
+        json_path = self._TEST_DB_URI + '.json'
+        json_db = tdb.TinyDbSnippetRepository(json_path)
+        json_db.save(self._snippet('a'))
+        json_db.save(self._snippet('b'))
+        created_at = json_db.get_by_id('a').created_at
+        try:
+            assert tdb.convert_to_log(json_path, self._TEST_DB_URI) == 2
+        finally:
+            os.remove(json_path)
+
+        reopened = tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        assert [r['op'] for r in _read_records(self._TEST_DB_URI)] == ['snapshot']
+        assert {s.alias for s in reopened.get_all()} == {'a', 'b'}
+        assert reopened.get_by_id('a').created_at == created_at
+
+    def test_compacts_into_snapshot_when_dead_records_pass_threshold(self):
+        db = TinyDB(self._TEST_DB_URI, storage=lambda path: st.LogStorage(path, compaction_min_records=4))
+        table = db.table('t')
+        doc_id = table.insert({'value': 0})
+        for value in range(1, 4):
+            table.update({'value': value}, doc_ids=[doc_id])
+
+        records = _read_records(self._TEST_DB_URI)
+        assert len(records) == 1
+        assert records[0]['op'] == 'snapshot'
+        assert TinyDB(self._TEST_DB_URI, storage=st.LogStorage).table('t').all() == [{'value': 3}]
+
+    def test_remove_all_drops_table(self):
+        self.sut.save(self._snippet('a'))
+        self.sut.remove_all()
+
+        reopened = tdb.TinyDbSnippetRepository(self._TEST_DB_URI, storage=st.LogStorage)
+        assert reopened.get_all() == []
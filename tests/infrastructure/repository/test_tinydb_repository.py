@@ -6,6 +6,7 @@ import snips.domain.exceptions as ex
 import pytest
 import os
 from tempfile import gettempdir
+from unittest.mock import patch
 
 
 @pytest.mark.unit
@@ -88,3 +89,82 @@ class TestTinyDbRepository:
 
         assert len(self.sut.get_by_tags(['sql', 'bash'], mode='all')) == 0
         assert len(self.sut.get_by_tags(['sql'], mode='all')) == 1
+
+    def test_save_existing_alias_updates_in_place(self):
+        self._insert_random_snippet()
+        self._insert_random_snippet(tags=['bash'])
+
+        result = self.sut.get_all()
+        assert len(result) == 1
+        assert result[0].tags == ['bash']
+
+    def test_exists(self):
+        e = self._insert_random_snippet()
+        assert self.sut.exists(e.alias)
+        self.sut.delete_by_id(e.alias)
+        assert not self.sut.exists(e.alias)
+
+    def test_alias_index_is_built_from_existing_documents(self):
+        e = self._insert_random_snippet()
+        reopened = tdb.TinyDbSnippetRepository(self._TEST_DB_URI)
+
+        assert reopened.exists(e.alias)
+        assert reopened.get_by_id(e.alias).snippet == e.snippet
+
+    def test_get_by_tags_reflects_updated_and_deleted_snippets(self):
+        self._insert_random_snippet(tags=['sql', 'python'])
+        self._insert_random_snippet(id='bash-list', tags=['bash', 'python'])
+
+        self._insert_random_snippet(tags=['bash'])
+        self.sut.delete_by_id('bash-list')
+
+        assert [s.alias for s in self.sut.get_by_tags(['bash'])] == ['drop db']
+        assert self.sut.get_by_tags(['python', 'sql']) == []
+        assert self.sut.get_by_tags(['bash'], mode='all')[0].alias == 'drop db'
+
+    def test_get_by_tags_returns_snippets_in_insertion_order(self):
+        for alias in ['c', 'a', 'b']:
+            self._insert_random_snippet(id=alias, tags=['sql'])
+
+        assert [s.alias for s in self.sut.get_by_tags(['sql', 'db'])] == ['c', 'a', 'b']
+
+    def _stored_aliases(self) -> List[str]:
+        return [s.alias for s in tdb.TinyDbSnippetRepository(self._TEST_DB_URI).get_all()]
+
+    def test_batch_flushes_once_on_exit(self):
+        with patch.object(self.sut._storage.storage, 'write', wraps=self.sut._storage.storage.write) as write:
+            with self.sut.batch():
+                self._insert_random_snippet('a')
+                self._insert_random_snippet('b')
+                self.sut.delete_by_id('a')
+                assert self.sut.exists('b')
+                assert write.call_count == 0
+            assert write.call_count == 1
+        assert self._stored_aliases() == ['b']
+
+    def test_batch_discards_mutations_on_error(self):
+        self._insert_random_snippet('a')
+        with pytest.raises(RuntimeError):
+            with self.sut.batch():
+                self._insert_random_snippet('b')
+                self.sut.delete_by_id('a')
+                raise RuntimeError
+
+        assert self.sut.exists('a')
+        assert not self.sut.exists('b')
+        assert self._stored_aliases() == ['a']
+
+    def test_save_many_and_delete_many(self):
+        self.sut.save_many(snp.Snippet(alias, 'cmd', 'desc', ['tag']) for alias in ['a', 'b', 'c'])
+        self.sut.delete_many(['a', 'c'])
+
+        assert self._stored_aliases() == ['b']
+        assert [s.alias for s in self.sut.get_by_tags(['tag'])] == ['b']
+
+    def test_iter_all_and_iter_by_tags_yield_lazily(self):
+        self._insert_random_snippet('a', tags=['sql'])
+        self._insert_random_snippet('b', tags=['bash'])
+
+        assert not isinstance(self.sut.iter_all(), list)
+        assert [s.alias for s in self.sut.iter_all()] == ['a', 'b']
+        assert [s.alias for s in self.sut.iter_by_tags(['bash'])] == ['b']
@@ -0,0 +1,159 @@
+import io
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from snips.domain import Flow
+from snips.domain.cache import IOutputCache, CachedOutput, CacheStats, cache_key
+import snips.infrastructure.runner as runner
+from snips.infrastructure.runner import Runner, Job, JobResult, exit_status, TIMEOUT_EXIT_CODE
+
+
+def _running(pid: int) -> bool:
+    """Whether process exists and is not a zombie waiting for its parent"""
+    time.sleep(0.1)
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def _interrupt_after(seconds: float) -> None:
+    """Sends Ctrl-C to this process only, as terminal does; jobs in own session do not get it"""
+    threading.Timer(seconds, os.kill, (os.getpid(), signal.SIGINT)).start()
+
+
+class _MemoryCache(IOutputCache):
+
+    def __init__(self):
+        self.outputs = {}
+
+    def get(self, key):
+        return self.outputs.get(key)
+
+    def put(self, key, output, ttl):
+        self.outputs[key] = output
+
+    def stats(self):
+        return CacheStats(len(self.outputs), 0, 0, 0)
+
+    def clear(self):
+        self.outputs.clear()
+
+
+@pytest.mark.unit
+class TestRunner:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.stdout = io.StringIO()
+        self.stderr = io.StringIO()
+
+    def _runner(self, parallel: int = 1, timeout: float = None, **kwargs) -> Runner:
+        return Runner(parallel, timeout, self.stdout, self.stderr, **kwargs)
+
+    def test_single_job_returns_its_exit_code(self):
+        [result] = self._runner().run([Job('fail', 'exit 3')])
+        assert result.returncode == 3
+
+    def test_output_of_many_jobs_is_prefixed_with_job_name(self):
+        results = self._runner().run([Job('a', 'echo one; echo two >&2'), Job('long-name', 'echo three')])
+        assert [result.returncode for result in results] == [0, 0]
+        assert self.stdout.getvalue().splitlines() == ['[a]         one', '[long-name] three']
+        assert self.stderr.getvalue() == '[a]         two\n'
+
+    def test_jobs_run_concurrently_up_to_parallel_limit(self):
+        jobs = [Job(str(n), 'sleep 0.3') for n in range(4)]
+        started = time.monotonic()
+        self._runner(parallel=2).run(jobs)
+        elapsed = time.monotonic() - started
+        assert 0.6 <= elapsed < 1.1
+
+    @pytest.mark.parametrize('count', [1, 2])
+    def test_timeout_kills_commands_started_by_job(self, tmp_path, count):
+        pid_file = tmp_path / 'pid'
+        jobs = [Job('slow', f'sleep 7 & echo $! > {pid_file}; wait')] + [Job('fast', 'true')] * (count - 1)
+        [result, *_] = self._runner(parallel=count, timeout=0.5).run(jobs)
+        assert result.timed_out
+        assert not _running(int(pid_file.read_text()))
+
+    def test_interrupt_kills_commands_started_by_parallel_jobs(self, tmp_path, monkeypatch):
+        # background commands of shell ignore SIGINT, they are left for the kill after grace period
+        monkeypatch.setattr(runner, '_INTERRUPT_GRACE', 0.2)
+        jobs = [Job(str(n), f'sleep 7 & echo $! > {tmp_path}/{n}; wait') for n in range(2)]
+        _interrupt_after(0.5)
+        with pytest.raises(KeyboardInterrupt):
+            self._runner(parallel=2).run(jobs)
+        assert not any(_running(int((tmp_path / str(n)).read_text())) for n in range(2))
+
+    def test_interrupt_kills_command_of_cached_job(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(runner, '_INTERRUPT_GRACE', 0.2)
+        job = Job('slow', f'sleep 7 & echo $! > {tmp_path}/pid; wait', cache_ttl=60)
+        _interrupt_after(0.5)
+        with pytest.raises(KeyboardInterrupt):
+            self._runner(cache=_MemoryCache()).run([job])
+        assert not _running(int((tmp_path / 'pid').read_text()))
+
+    def test_job_exceeding_timeout_is_killed(self):
+        started = time.monotonic()
+        results = self._runner(timeout=0.2).run([Job('slow', 'sleep 5; echo done'), Job('fast', 'true')])
+        assert time.monotonic() - started < 2
+        assert results[0].timed_out and results[0].returncode == TIMEOUT_EXIT_CODE
+        assert results[1].returncode == 0
+        assert 'done' not in self.stdout.getvalue()
+        assert '[slow] killed' in self.stderr.getvalue()
+
+    def test_flow_passes_step_output_to_dependent_steps(self):
+        flow = Flow.parse('version: v\nbuild: b tag=@{version}')
+        commands = {'v': 'echo 1.2', 'b': 'echo "image:{tag}"'}
+        results = self._runner().run_flow(flow, lambda step, outputs: commands[step.alias].format(
+            **step.resolve_arguments(outputs)))
+        assert [result.output for result in results] == ['1.2\n', 'image:1.2\n']
+
+    def test_flow_runs_independent_steps_concurrently(self):
+        flow = Flow.parse('a: sleep\nb: sleep\nc: sleep after=a,b')
+        started = time.monotonic()
+        self._runner(parallel=2).run_flow(flow, lambda step, outputs: 'sleep 0.3')
+        assert 0.6 <= time.monotonic() - started < 1.1
+
+    def test_flow_skips_steps_depending_on_failed_step(self):
+        flow = Flow.parse('a: fail\nb: echo after=a\nc: echo')
+        commands = {'fail': 'exit 2', 'echo': 'echo ran'}
+        results = self._runner().run_flow(flow, lambda step, outputs: commands[step.alias])
+        assert [(result.returncode, result.skipped) for result in results] == [(2, False), (1, True), (0, False)]
+        assert exit_status(results) == 2
+        assert '[b] skipped, failed: a' in self.stderr.getvalue()
+
+    @pytest.mark.parametrize('count', [1, 2])
+    def test_cached_output_is_replayed_instead_of_running_command(self, tmp_path, count):
+        cache = _MemoryCache()
+        jobs = [Job(str(n), f'echo run >> {tmp_path}/log; echo out', cache_ttl=60) for n in range(count)]
+        self._runner(parallel=2, cache=cache).run(jobs)
+        results = self._runner(parallel=2, cache=cache).run(jobs)
+        assert (tmp_path / 'log').read_text() == 'run\n' * count
+        assert all(result.cached and result.output == 'out\n' for result in results)
+        assert self.stdout.getvalue().count('out') == 2 * count
+
+    def test_refresh_runs_cached_command_and_stores_its_output(self):
+        cache = _MemoryCache()
+        job = Job('a', 'echo new', cache_ttl=60)
+        cache.put(cache_key(job.command, os.getcwd()), CachedOutput('old\n', ''), 60)
+        [result] = self._runner(cache=cache, refresh=True).run([job])
+        assert not result.cached and self.stdout.getvalue() == 'new\n'
+        assert list(cache.outputs.values()) == [CachedOutput('new\n', '')]
+
+    def test_failed_output_is_not_cached(self):
+        cache = _MemoryCache()
+        self._runner(cache=cache).run([Job('a', 'echo out; exit 1', cache_ttl=60)])
+        assert cache.outputs == {}
+
+
+@pytest.mark.unit
+def test_exit_status_is_first_failure_in_job_order():
+    results = [JobResult(Job('a', ''), 0), JobResult(Job('b', ''), 2), JobResult(Job('c', ''), 1)]
+    assert exit_status(results) == 2
+    assert exit_status(results[:1]) == 0
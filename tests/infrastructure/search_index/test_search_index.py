@@ -0,0 +1,97 @@
+import os
+from tempfile import gettempdir
+
+import pytest
+
+from snips.domain import Snippet
+from snips.infrastructure.search_index import SqliteSearchIndex, SqliteAliasIndex
+
+
+@pytest.mark.unit
+class TestSqliteSearchIndex:
+    _TEST_INDEX_URI = os.path.join(gettempdir(), 'snips-db-index.sqlite3')
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.sut = SqliteSearchIndex(self._TEST_INDEX_URI)
+        self.sut.index_many([
+            Snippet('docker-ps', 'docker ps -a', 'list all containers', ['docker']),
+            Snippet('docker-rm', 'docker rm <@arg>container</@arg>', 'remove container', ['docker']),
+            Snippet('find-ext', "find . -name '*.<@arg>ext</@arg>'", 'find files by extension', ['bash']),
+        ])
+        yield
+        self.sut.connection.close()
+        os.remove(self._TEST_INDEX_URI)
+
+    def _aliases(self, query: str):
+        return [alias for alias, _ in self.sut.search(query)]
+
+    def test_search_ranks_best_match_first(self):
+        assert self._aliases('remove container')[0] == 'docker-rm'
+        assert self._aliases('files extension') == ['find-ext']
+
+    def test_search_matches_alias_and_tags(self):
+        assert set(self._aliases('docker')) == {'docker-ps', 'docker-rm'}
+        assert self._aliases('bash') == ['find-ext']
+
+    def test_search_without_matches_returns_empty_list(self):
+        assert self._aliases('kubernetes') == []
+
+    def test_search_respects_limit(self):
+        assert len(self.sut.search('docker', limit=1)) == 1
+
+    def test_reindexing_snippet_replaces_its_terms(self):
+        self.sut.index(Snippet('docker-ps', 'kubectl get pods', 'list pods'))
+        assert self._aliases('pods') == ['docker-ps']
+        assert self._aliases('containers') == []
+
+    def test_remove_and_clear(self):
+        self.sut.remove('find-ext')
+        assert self._aliases('find') == []
+
+        self.sut.clear()
+        assert self.sut.is_empty()
+        assert self._aliases('docker') == []
+
+    def test_indexed_snippets_do_not_make_index_built_until_marked(self):
+        assert not self.sut.is_built()
+        self.sut.mark_built()
+        assert self.sut.is_built()
+
+        self.sut.clear()
+        assert not self.sut.is_built()
+
+
+@pytest.mark.unit
+class TestSqliteAliasIndex:
+    _TEST_INDEX_URI = os.path.join(gettempdir(), 'snips-db-alias-index.sqlite3')
+
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.sut = SqliteAliasIndex(self._TEST_INDEX_URI)
+        self.sut.add_many(['docker-ps', 'docker-rm', 'find-ext', 'git-log'])
+        yield
+        self.sut.connection.close()
+        os.remove(self._TEST_INDEX_URI)
+
+    def test_suggest_orders_by_edit_distance(self):
+        assert self.sut.suggest('dokcer-ps') == [('docker-ps', 1), ('docker-rm', 3)]
+
+    def test_suggest_ignores_distant_aliases(self):
+        assert self.sut.suggest('kubectl') == []
+
+    def test_removed_alias_is_not_suggested(self):
+        self.sut.remove('docker-ps')
+        assert [alias for alias, _ in self.sut.suggest('docker-ps')] == ['docker-rm']
+
+    def test_clear(self):
+        self.sut.clear()
+        assert self.sut.is_empty()
+
+    def test_added_aliases_do_not_make_index_built_until_marked(self):
+        assert not self.sut.is_built()
+        self.sut.mark_built()
+        assert self.sut.is_built()
+
+        self.sut.clear()
+        assert not self.sut.is_built()
@@ -1,3 +1,10 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import snips.settings as settings
 from snips.settings import Configuration
 
 
@@ -17,4 +24,44 @@ def test_string_interpolation():
 """
 
 
-"""
\ No newline at end of file
+"""
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'config.env')
+    monkeypatch.setattr(settings, 'CONFIG_PATH', path)
+    monkeypatch.setattr(settings, '_ENVIRONMENT', {})
+    monkeypatch.setattr(settings, '_cached', None)
+    return path
+
+
+@pytest.mark.unit
+def test_get_config_is_parsed_again_only_when_file_changes(config_path):
+    with open(config_path, 'w') as f:
+        f.write("FORMAT='yaml'\n")
+    config = settings.get_config()
+    assert config.FORMAT == 'yaml'
+    assert config.DB_PROVIDER == 'json'
+    assert settings.get_config() is config
+
+    with open(config_path, 'w') as f:
+        f.write("FORMAT='table'\n")
+    assert settings.get_config().FORMAT == 'table'
+
+
+@pytest.mark.unit
+def test_environment_overrides_configuration_file(config_path, monkeypatch):
+    with open(config_path, 'w') as f:
+        f.write("FORMAT='yaml'\n")
+    monkeypatch.setattr(settings, '_ENVIRONMENT', {'FORMAT': 'json'})
+    assert settings.CONFIG.FORMAT == 'json'
+
+
+@pytest.mark.unit
+def test_reading_configuration_does_not_create_files(tmp_path):
+    config_home = str(tmp_path / 'snips')
+    code = 'import snips.settings as s; print(s.CONFIG.FORMAT)'
+    result = subprocess.run([sys.executable, '-c', code], env={**os.environ, 'CONFIG_HOME': config_home},
+                            capture_output=True, text=True)
+    assert result.stdout.strip() == 'table'
+    assert not os.path.exists(config_home)